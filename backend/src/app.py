@@ -11,6 +11,10 @@ from .routes.user_routes import user_bp
 from .routes.stocks_routes import stocks_bp
 from .routes.api_key_routes import api_key_bp
 from .routes.jobs_routes import jobs_bp
+from .routes.analytics_routes import analytics_bp
+from .routes.events_routes import events_bp
+from .routes.json_provider import FastJSONProvider
+from .routes.compression import ResponseCompressor
 import jwt
 from functools import wraps
 from datetime import datetime, timedelta, timezone
@@ -36,7 +40,11 @@ logger = logging.getLogger()
 
 # Initialize Flask app and enable Cross-Origin Resource Sharing (CORS)
 app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "*"}})
+# Cross-origin clients can only read response headers listed in expose_headers
+CORS(app, resources={r"/*": {"origins": "*"}}, expose_headers=["X-Total-Count", "ETag", "Server-Timing"])
+# Serialize JSON with orjson when installed and compress large responses with brotli or gzip
+app.json = FastJSONProvider(app)
+ResponseCompressor().init_app(app)
 
 # Initialize database manager and polygon data fetcher instances
 db_manager = DBManager()
@@ -138,6 +146,8 @@ app.register_blueprint(user_bp)
 app.register_blueprint(stocks_bp)
 app.register_blueprint(api_key_bp)
 app.register_blueprint(jobs_bp)
+app.register_blueprint(analytics_bp)
+app.register_blueprint(events_bp)
     
 # Print all registered routes for debugging purposes
 # for rule in app.url_map.iter_rules():
@@ -147,10 +157,15 @@ def main():
         if os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
             scheduler.start_scheduler()
             scheduler.add_ticker_data_jobs()
+            scheduler.add_retention_job()
+            scheduler.add_timestamp_migration_job()
+            scheduler.add_analytics_mirror_job()
             scheduler.schedule_existing_jobs()
             scheduler.list_scheduled_jobs()
 
-        app.run(debug=True)
+        # One threaded process: ingest jobs and API share the data versions, response cache and event stream fan-out,
+        # which the debug reloader would split across a watcher and a server process
+        app.run(debug=True, use_reloader=False, threaded=True)
         
     except KeyboardInterrupt:
         logger.debug(f"KeyboardInterrupt received, shutting down...")
@@ -1,15 +1,23 @@
 
 from datetime import datetime, timezone, timedelta
 from .db_manager import DBManager
+from .db_management.time_keys import from_epoch_ms
+from .db_management.rollup_manager import DAY_MS
 import logging 
 logger = logging.getLogger(__name__)
 
+# Legacy scrapes were stored as US Central time with a fixed UTC-6 offset
+CT_UTC_OFFSET = timedelta(hours=-6)
+
 class AuditManager():
     
     def __init__(self):
         self.db_manager = DBManager()
 
-    def fetch_and_convert(self):
+    def fetch_and_convert(self, bulk=True, dry_run=False, before=None, chunk_size=5000):
+        # Convert stored CT scrape timestamps to UTC; bulk mode shifts them in set-based chunks instead of row by row
+        if bulk:
+            return self.bulk_convert(dry_run=dry_run, before=before, chunk_size=chunk_size)
         try:
             scrapes = self.db_manager.scrape_manager.get_scrapes()
             logger.info(f"Found {len(scrapes)} scrapes")
@@ -25,7 +33,7 @@ class AuditManager():
                 ticker = scrape.get('ticker_symbol')
                 if ct_time:
                     ct_datetime = datetime.strptime(ct_time, '%Y-%m-%d %H:%M:%S')
-                    ct_datetime = ct_datetime.replace(tzinfo=timezone(timedelta(hours=-6)))
+                    ct_datetime = ct_datetime.replace(tzinfo=timezone(CT_UTC_OFFSET))
                     
                     utc_datetime = ct_datetime.astimezone(timezone.utc)
                     
@@ -36,8 +44,45 @@ class AuditManager():
                 logger.info(f"Updated timestamp for {ticker} to {new_timestamp}")
                 
             logger.info(f"Successfully converted {len(converted_scrapes)} scrapes to UTC") 
+            # Timestamps moved, so rebuild the latest-snapshot table and the rollups from the converted history
+            self.db_manager.scrape_manager.rebuild_latest_stock_scrapes()
+            self.db_manager.rollup_manager.backfill_rollups(prune=True)
+            self.db_manager.publish_data_change("scrape")
             return scrapes
         
         except Exception as e:
             logger.error(f"Error {e}")
             return []
+
+    def bulk_convert(self, dry_run=False, before=None, chunk_size=5000):
+        # Shift every scrape older than `before` from CT to UTC; pass the last logged cursor as `before` to resume
+        if not self.db_manager.scrape_migrator.is_applied("epoch_ms:stocks_scrape:timestamp"):
+            # Text timestamps do not fall inside integer ranges, so they would be silently left behind
+            logger.error("stocks_scrape still has text timestamps; run the epoch millisecond migration first")
+            return None
+        offset_ms = -CT_UTC_OFFSET // timedelta(milliseconds=1)
+        summary = self.db_manager.scrape_manager.shift_scrape_timestamps(
+            offset_ms, before=before, chunk_size=chunk_size, dry_run=dry_run
+        )
+        if summary["rows"]:
+            # Rollup bars are bucketed by scrape time, so every day between the old minimum and the new maximum is rebuilt
+            rollup_start = summary["earliest"] + min(offset_ms, 0)
+            rollup_end = summary["before"] - 1 + max(offset_ms, 0)
+            summary["rollup_backfill"] = {
+                "start": from_epoch_ms(rollup_start).isoformat(),
+                "end": from_epoch_ms(rollup_end).isoformat(),
+                "days": rollup_end // DAY_MS - rollup_start // DAY_MS + 1,
+            }
+        if dry_run:
+            logger.info(f"Dry run: {summary['rows']} scrapes would be converted to UTC")
+            if summary["rows"]:
+                backfill = summary["rollup_backfill"]
+                logger.info(f"Dry run: rollups would be rebuilt for {backfill['days']} days from {backfill['start']} to {backfill['end']}")
+            return summary
+        logger.info(f"Successfully converted {summary['shifted']} scrapes to UTC ({summary['skipped']} skipped)")
+        # Timestamps moved, so rebuild the latest-snapshot table and the rollups from the converted history
+        self.db_manager.scrape_manager.rebuild_latest_stock_scrapes()
+        if summary["shifted"]:
+            summary["rollup_backfill"]["bars"] = self.db_manager.rollup_manager.backfill_rollups(rollup_start, rollup_end, prune=True)
+        self.db_manager.publish_data_change("scrape")
+        return summary
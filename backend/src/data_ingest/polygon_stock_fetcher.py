@@ -58,7 +58,25 @@ class PolygonStockFetcher:
         # Check if stock data batch is not empty
         if stock_data_batch:
             # Perform batch insertion to improve database operation efficiency
-            self.database_connect.stock_manager.insert_stock_batch(stock_data_batch)
+            if not self.database_connect.stock_manager.insert_stock_batch(stock_data_batch):
+                return
+            # Publish the updated latest bars to the API's read snapshot and response cache
+            versions = self.database_connect.publish_data_change("polygon_stocks")
+            # Push the committed bars to event stream clients in the shape /api/stocks/<ticker> returns
+            self.database_connect.push_event("polygon_bars", lambda: {
+                "version": versions[0],
+                "bars": [
+                    {
+                        "ticker_symbol": stock["T"],
+                        "open_price": stock["o"],
+                        "close_price": stock["c"],
+                        "highest_price": stock["h"],
+                        "lowest_price": stock["l"],
+                        "timestamp_end": stock["t"],
+                    }
+                    for stock in stock_data_batch
+                ],
+            })
 
     def producer_thread(self, start_date, end_date, rate_limit_counter):
         # Producer thread to fetch stock data sequentially for a date range
@@ -1,6 +1,7 @@
 # stock_analysis_fetcher.py
 import requests
 from ..db_manager import DBManager
+from .ticker_data_staging import TickerDataStaging
 import time
 import random
 from datetime import datetime, timezone, timedelta
@@ -81,6 +82,10 @@ class StockAnalysisFetcher:
         # Store a batch of stock data in the database
         self.db_manager.scrape_manager.create_scrape_batch(stock_data_list)
         logger.info(f"Stock data of {len(stock_data_list)} rows stored successfully.")
+        # Fold the new batch into the intraday OHLCV rollups
+        self.db_manager.rollup_manager.apply_scrape_batch(stock_data_list)
+        # Publish the new latest prices to the API's read snapshot and response cache
+        self.db_manager.publish_data_change("scrape")
 
     def fetch_and_store_stock_data(self):
         # Initial delay set to 0 seconds
@@ -115,6 +120,12 @@ class StockAnalysisFetcher:
         # Lists to store API endpoints and their corresponding metric identifiers
         urls=[]
         identifiers=[]
+
+        # Stage metric columns in memory and merge them into ticker_scrape at checkpoints
+        # Each checkpoint merge is published, so the API picks up ticker stats during the long run
+        staging = TickerDataStaging(
+            self.db_manager.scrape_manager, on_merge=lambda: self.db_manager.publish_data_change("scrape_ticker")
+        )
         
         try:
             # Read and process the CSV file containing metric definitions
@@ -132,7 +143,7 @@ class StockAnalysisFetcher:
                 # Process each metric endpoint
                 for identifier, url in ticker_data.items():
                     stock_list = []
-                    stock_data_list = [] 
+                    metric_values = {}
                     logger.info(f"Identifier: {identifier}, URL: {url}")
                     response = requests.get(url.strip(), headers=self.HEADERS)
                     response.raise_for_status() 
@@ -144,6 +155,7 @@ class StockAnalysisFetcher:
                     # Validate response format
                     if not isinstance(stock_list, list):
                         logger.info("Unexpected format: stock_list is not a list.")
+                        staging.merge()
                         return
 
                     # Process each stock entry
@@ -153,16 +165,12 @@ class StockAnalysisFetcher:
                             if not isinstance(stock[1], float):
                                 continue 
 
-                        # Create stock data entry with special handling for index data
-                        stock_data = {
-                            "ticker_symbol": stock[0],
-                            identifier: stock[1] if identifier != 'in_index' else json.dumps(stock[1])  
-                        }
-                        stock_data_list.append(stock_data)
+                        # Stage the metric value with special handling for index data
+                        metric_values[stock[0]] = stock[1] if identifier != 'in_index' else json.dumps(stock[1])
 
-                    # Batch store the processed stock data
-                    self.db_manager.scrape_manager.batch_create_or_update_scrape_ticker_stats(stock_data_list)
-                    logger.info(f"Stock data of {len(stock_data_list)} rows stored successfully for {identifier}.")
+                    # Stage the metric column; a merge runs when the checkpoint size is reached
+                    staging.add_metric(identifier, metric_values)
+                    logger.info(f"Staged {len(metric_values)} rows for {identifier}.")
 
                     # Rate limiting delay between API requests
                     time.sleep(30)
@@ -172,6 +180,12 @@ class StockAnalysisFetcher:
         except Exception as e:
             logger.error(f"An error occurred while reading the CSV file: {e}")
 
+        # Merge any metrics staged since the last checkpoint
+        try:
+            staging.merge()
+        except Exception as e:
+            logger.error(f"Error merging staged ticker data: {e}")
+
         # Calculate and log the total time taken
         end_time = time.time()
         total_time = end_time - start_time
@@ -0,0 +1,44 @@
+# data_ingest/ticker_data_staging.py
+import logging
+logger = logging.getLogger(__name__)
+
+
+class TickerDataStaging:
+    def __init__(self, scrape_manager, checkpoint_every=25, on_merge=None):
+        # Columnar staging area: metric identifier -> {ticker_symbol: value}
+        self.scrape_manager = scrape_manager
+        self.checkpoint_every = checkpoint_every
+        # Called after each merge commits, e.g. to publish the new rows to API readers
+        self.on_merge = on_merge
+        self.columns = {}
+
+    def add_metric(self, identifier, values):
+        # Stage one metric column for every ticker and merge once a checkpoint is reached
+        self.columns[identifier] = values
+        if len(self.columns) >= self.checkpoint_every:
+            return self.merge()
+        return 0
+
+    def pivot(self):
+        # Pivot the staged columns into one wide row per ticker
+        rows = {}
+        for identifier, values in self.columns.items():
+            for ticker_symbol, value in values.items():
+                row = rows.get(ticker_symbol)
+                if row is None:
+                    row = rows[ticker_symbol] = {"ticker_symbol": ticker_symbol}
+                row[identifier] = value
+        return list(rows.values())
+
+    def merge(self):
+        # Write all staged columns to ticker_scrape in a single transaction and reset the stage
+        if not self.columns:
+            return 0
+        rows = self.pivot()
+        metric_count = len(self.columns)
+        affected_rows = self.scrape_manager.batch_create_or_update_scrape_ticker_stats(rows)
+        logger.info(f"Merged {metric_count} staged metrics into {len(rows)} ticker rows.")
+        self.columns = {}
+        if self.on_merge is not None:
+            self.on_merge()
+        return affected_rows
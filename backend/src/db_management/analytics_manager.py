@@ -0,0 +1,295 @@
+# db_management/analytics_manager.py
+import csv
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import logging
+logger = logging.getLogger(__name__)
+
+try:
+    import duckdb
+except ImportError:  # Analytics is optional; the rest of the app runs without DuckDB installed
+    duckdb = None
+
+# Analytical views and the query each one is built from, with company and industry names joined back.
+# {db} is the schema holding the tables: the attached database name in DuckDB, "main" in SQLite.
+ANALYTICS_TABLES = {
+    "stocks": (
+        "polygon_stocks",
+        "SELECT ticker_symbol, close_price, highest_price, lowest_price, open_price, timestamp_end FROM {db}.stocks",
+    ),
+    "stocks_scrape": (
+        "scrape",
+        "SELECT s.ticker_symbol, t.company_name, s.price, s.change, i.industry, s.volume, s.pe_ratio, s.timestamp "
+        "FROM {db}.stocks_scrape s "
+        "LEFT JOIN {db}.scrape_tickers t ON t.ticker_id = s.ticker_id "
+        "LEFT JOIN {db}.scrape_industries i ON i.industry_id = s.industry_id",
+    ),
+    "ticker_scrape": ("scrape_ticker", "SELECT * FROM {db}.ticker_scrape"),
+}
+
+# Price series the returns query can run over: view, price column, time column
+RETURN_SOURCES = {
+    "daily": ("stocks", "close_price", "timestamp_end"),
+    "scrape": ("stocks_scrape", "price", "timestamp"),
+}
+
+# SQLite declared types mapped to the DuckDB types of the analytics views and the Parquet mirror
+MIRROR_TYPES = {"INTEGER": "BIGINT", "FLOAT": "DOUBLE", "REAL": "DOUBLE", "BOOLEAN": "BOOLEAN"}
+# Epoch millisecond time keys; upgraded databases still declare them DATETIME, so their type never comes from the schema
+EPOCH_MS_COLUMNS = {"timestamp", "timestamp_end", "created_at", "updated_at"}
+MIRRORED_TABLES = ("stocks", "stocks_scrape", "scrape_tickers", "scrape_industries", "ticker_scrape")
+NUMERIC_TYPES = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "FLOAT", "DOUBLE", "DECIMAL")
+GROUP_COLUMNS = ("sector", "market_cap_group", "exchange", "country")
+
+
+def analytics_source():
+    # Where DuckDB reads from: the live SQLite files (needs the sqlite extension) or the Parquet mirror
+    return os.environ.get("CLIPSE_ANALYTICS_SOURCE", "sqlite").lower()
+
+
+class AnalyticsManager:
+    def __init__(self, db_file_paths, mirror_dir, source=None):
+        # Initialize with the SQLite files to analyse and the folder holding their Parquet mirror
+        self.db_file_paths = db_file_paths
+        self.mirror_dir = mirror_dir
+        self.source = source or analytics_source()
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # Open one in-memory DuckDB with read-only views over the configured source; cursors share it per request
+        if duckdb is None:
+            raise RuntimeError("DuckDB is not installed; install duckdb to enable analytics")
+        with self._lock:
+            if self._connection is not None:
+                return self._connection
+            connection = duckdb.connect(":memory:")
+            if self.source == "parquet":
+                parquet_paths = []
+                for view in ANALYTICS_TABLES:
+                    parquet_path = os.path.abspath(os.path.join(self.mirror_dir, f"{view}.parquet"))
+                    if not os.path.exists(parquet_path):
+                        raise RuntimeError(f"Parquet mirror for {view} is missing; run build_parquet_mirror first")
+                    connection.execute(f"CREATE VIEW {view} AS SELECT * FROM read_parquet('{parquet_path}')")
+                    parquet_paths.append(parquet_path)
+                # Queries may only touch the mirror files, so COPY and file readers cannot reach anything else
+                connection.execute("SET allowed_paths = ?", [parquet_paths])
+                connection.execute("SET enable_external_access = false")
+            else:
+                connection.execute("INSTALL sqlite")
+                connection.execute("LOAD sqlite")
+                # The scanner would type columns by their declared type and reject integers in a DATETIME column,
+                # so values arrive as text and each view casts them to the types _column_types derives
+                connection.execute("SET sqlite_all_varchar = true")
+                for db_name in {db_name for db_name, _ in ANALYTICS_TABLES.values()}:
+                    db_file_path = os.path.abspath(self.db_file_paths[db_name])
+                    # READ_ONLY attaches cannot be written through, whatever SQL runs on this connection
+                    connection.execute(f"ATTACH '{db_file_path}' AS {db_name} (TYPE sqlite, READ_ONLY)")
+                for view, (db_name, query) in ANALYTICS_TABLES.items():
+                    with self._sqlite_connect(db_name) as conn:
+                        column_types = self._column_types(conn, query.format(db="main"))
+                    connection.execute(f"CREATE VIEW {view} AS {self._typed_select(column_types, f'({query.format(db=db_name)})')}")
+            # Settings such as access_mode or external access cannot be changed by later queries
+            connection.execute("SET lock_configuration = true")
+            self._connection = connection
+            logger.info(f"Analytics engine ready over the {self.source} source.")
+            return connection
+
+    def mirror_exists(self):
+        # Check whether every analytics table has a Parquet file in the mirror folder
+        return all(os.path.exists(os.path.join(self.mirror_dir, f"{view}.parquet")) for view in ANALYTICS_TABLES)
+
+    def _query(self, sql, params=None):
+        # Run a query on its own cursor and return rows as dictionaries
+        start_time = time.perf_counter()
+        cursor = self._connect().cursor()
+        try:
+            cursor.execute(sql, params or [])
+            columns = [description[0] for description in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+        logger.debug(f"Analytics query returned {len(rows)} rows in {time.perf_counter() - start_time:.3f}s.")
+        return rows
+
+    def _numeric_columns(self, view):
+        # Numeric columns of a view, used to validate metric names before they are placed in SQL
+        return {
+            row["column_name"]
+            for row in self._query(f"DESCRIBE {view}")
+            if row["column_type"].startswith(NUMERIC_TYPES)
+        }
+
+    def cross_sectional_ranks(self, metric, group_by=None, limit=50, ascending=False):
+        # Rank every ticker on one ticker_scrape metric, overall or within a sector, exchange or other category
+        if metric not in self._numeric_columns("ticker_scrape"):
+            raise ValueError(f"Unknown numeric metric '{metric}'")
+        if group_by is not None and group_by not in GROUP_COLUMNS:
+            raise ValueError(f"Cannot group by '{group_by}'")
+        partition = f'PARTITION BY "{group_by}"' if group_by else ""
+        direction = "ASC" if ascending else "DESC"
+        group_column = f'"{group_by}" AS group_name,' if group_by else "NULL AS group_name,"
+        return self._query(
+            f"""
+            SELECT ticker_symbol, {group_column} "{metric}" AS value,
+                rank() OVER ({partition} ORDER BY "{metric}" {direction}) AS rank,
+                percent_rank() OVER ({partition} ORDER BY "{metric}") AS percentile,
+                ("{metric}" - avg("{metric}") OVER ({partition})) / NULLIF(stddev_samp("{metric}") OVER ({partition}), 0) AS zscore,
+                count(*) OVER ({partition}) AS group_size
+            FROM ticker_scrape
+            WHERE "{metric}" IS NOT NULL AND isfinite("{metric}"::DOUBLE)
+            QUALIFY rank <= ?
+            ORDER BY group_name, rank
+            """,
+            [limit],
+        )
+
+    def _returns_sql(self, source, periods, tickers, as_of):
+        # Trailing returns per ticker over the given numbers of bars, from the latest bar at or before as_of
+        view, price, timestamp = RETURN_SOURCES[source]
+        filters = [f"{timestamp} <= ?"]
+        params = [as_of if as_of is not None else 2 ** 62]
+        if tickers:
+            filters.append(f"ticker_symbol IN ({', '.join('?' for _ in tickers)})")
+            params.extend(tickers)
+        return_columns = ", ".join(
+            f"max({price}) FILTER (WHERE bar = 1) / NULLIF(max({price}) FILTER (WHERE bar = {period + 1}), 0) - 1 AS return_{period}"
+            for period in periods
+        )
+        sql = f"""
+            WITH bars AS (
+                SELECT ticker_symbol, {price}, {timestamp},
+                    row_number() OVER (PARTITION BY ticker_symbol ORDER BY {timestamp} DESC) AS bar
+                FROM {view}
+                WHERE {' AND '.join(filters)}
+                QUALIFY bar <= {max(periods) + 1}
+            )
+            SELECT ticker_symbol,
+                max({timestamp}) FILTER (WHERE bar = 1) AS as_of,
+                max({price}) FILTER (WHERE bar = 1) AS last_price,
+                {return_columns}
+            FROM bars
+            GROUP BY ticker_symbol
+        """
+        return sql, params
+
+    @staticmethod
+    def _validate_periods(source, periods):
+        # Periods are bar counts that are placed in the SQL text, so only small positive integers are accepted
+        if source not in RETURN_SOURCES:
+            raise ValueError(f"Unknown returns source '{source}'")
+        periods = sorted({int(period) for period in periods})
+        if not periods or periods[0] < 1 or periods[-1] > 5000:
+            raise ValueError("Periods must be between 1 and 5000 bars")
+        return periods
+
+    def returns(self, periods=(1, 5, 21), tickers=None, as_of=None, source="daily"):
+        # Trailing returns for every ticker (or the given ones) over daily bars or 5-minute scrapes
+        periods = self._validate_periods(source, periods)
+        sql, params = self._returns_sql(source, periods, tickers, as_of)
+        return self._query(f"{sql} ORDER BY ticker_symbol", params)
+
+    def fundamentals_with_returns(self, columns, periods=(21,), as_of=None, source="daily", sort=None, limit=100):
+        # Join chosen ticker_scrape fundamentals with trailing returns, optionally sorted by any output column
+        periods = self._validate_periods(source, periods)
+        available = self._numeric_columns("ticker_scrape") | set(GROUP_COLUMNS)
+        unknown = [column for column in columns if column not in available]
+        if unknown:
+            raise ValueError(f"Unknown fundamentals columns: {', '.join(unknown)}")
+        returns_sql, params = self._returns_sql(source, periods, None, as_of)
+        output_columns = list(columns) + ["last_price", "as_of"] + [f"return_{period}" for period in periods]
+        sort = sort or f"return_{periods[0]}"
+        descending = sort.startswith("-")
+        sort = sort.lstrip("-")
+        if sort not in output_columns:
+            raise ValueError(f"Cannot sort by '{sort}'")
+        selected = ", ".join([f'f."{column}"' for column in columns] + [f'r."{column}"' for column in output_columns[len(columns):]])
+        return self._query(
+            f"""
+            WITH r AS ({returns_sql})
+            SELECT f.ticker_symbol, {selected}
+            FROM ticker_scrape f
+            JOIN r ON r.ticker_symbol = f.ticker_symbol
+            ORDER BY "{sort}" {'DESC' if descending else 'ASC'} NULLS LAST
+            LIMIT ?
+            """,
+            params + [limit],
+        )
+
+    def _sqlite_connect(self, db_name):
+        source_path = os.path.abspath(self.db_file_paths[db_name])
+        return sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+
+    @staticmethod
+    def _column_types(conn, query):
+        # DuckDB types of a SQLite query's columns: epoch millisecond keys are BIGINT, the rest follow the declared type
+        columns = [description[0] for description in conn.execute(f"SELECT * FROM ({query}) LIMIT 0").description]
+        declared = {}
+        for table in MIRRORED_TABLES:
+            for row in conn.execute(f'PRAGMA table_info("{table}")'):
+                declared.setdefault(row[1], row[2].upper())
+        return {
+            column: "BIGINT" if column in EPOCH_MS_COLUMNS else MIRROR_TYPES.get(declared.get(column, ""), "VARCHAR")
+            for column in columns
+        }
+
+    @staticmethod
+    def _typed_select(column_types, source):
+        # Cast text columns from `source` to their DuckDB types
+        # Legacy text time keys not yet converted to epoch milliseconds read as NULL rather than failing the query
+        casts = ", ".join(
+            f'{"TRY_CAST" if name in EPOCH_MS_COLUMNS else "CAST"}("{name}" AS {column_type}) AS "{name}"'
+            for name, column_type in column_types.items()
+        )
+        return f"SELECT {casts} FROM {source}"
+
+    def _export_csv(self, db_name, query, csv_path):
+        # Stream one SQLite query into a CSV file and return its columns' DuckDB types
+        with self._sqlite_connect(db_name) as conn:
+            column_types = self._column_types(conn, query)
+            cursor = conn.execute(query)
+            with open(csv_path, "w", newline="") as csv_file:
+                writer = csv.writer(csv_file)
+                writer.writerow(column_types)
+                while True:
+                    rows = cursor.fetchmany(50000)
+                    if not rows:
+                        break
+                    writer.writerows(rows)
+        return column_types
+
+    def build_parquet_mirror(self):
+        # Export the analytics tables to Parquet through CSV so no DuckDB extension is needed; files swap in atomically
+        if duckdb is None:
+            raise RuntimeError("DuckDB is not installed; install duckdb to build the Parquet mirror")
+        os.makedirs(self.mirror_dir, exist_ok=True)
+        summary = {}
+        connection = duckdb.connect(":memory:")
+        try:
+            for view, (db_name, query) in ANALYTICS_TABLES.items():
+                start_time = time.perf_counter()
+                with tempfile.TemporaryDirectory(dir=self.mirror_dir) as staging_dir:
+                    csv_path = os.path.join(staging_dir, f"{view}.csv")
+                    parquet_path = os.path.join(staging_dir, f"{view}.parquet")
+                    column_types = self._export_csv(db_name, query.format(db="main"), csv_path)
+                    # Read every CSV column as text and cast it the same way the live SQLite views do
+                    csv_source = f"read_csv('{csv_path}', header = true, all_varchar = true)"
+                    connection.execute(
+                        f"COPY ({self._typed_select(column_types, csv_source)}) "
+                        f"TO '{parquet_path}' (FORMAT parquet, COMPRESSION zstd)"
+                    )
+                    row_count = connection.execute(f"SELECT count(*) FROM read_parquet('{parquet_path}')").fetchone()[0]
+                    os.replace(parquet_path, os.path.join(self.mirror_dir, f"{view}.parquet"))
+                summary[view] = {"rows": row_count, "seconds": round(time.perf_counter() - start_time, 3)}
+                logger.info(f"Mirrored {row_count} {view} rows to Parquet in {summary[view]['seconds']}s.")
+        finally:
+            connection.close()
+        # Views over the old files stay valid, but reconnect so new queries plan against the new files
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+        return summary
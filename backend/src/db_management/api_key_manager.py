@@ -1,40 +1,20 @@
 # db_management/api_key_manager.py
-from sqlalchemy import select, update, func
+from sqlalchemy import select, update, func, bindparam
+from .core_access import CoreReader
+from .resilience import retry_on_exception, raise_if_retryable
 import logging 
-import time
 from datetime import datetime, timezone
 logger = logging.getLogger(__name__)
 
 
-def retry_on_exception(max_retries=3, delay=1):
-    # Decorator to retry a function call if it raises an exception
-    def decorator(func):
-        # Wrapper function that will replace the original function
-        def wrapper(*args, **kwargs):
-            # Attempt to call the function up to max_retries times
-            for attempt in range(max_retries):
-                try:
-                    # Call the original function and return its result
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    # If an exception occurs and it's not the last attempt
-                    if attempt < max_retries - 1:
-                        # Log a warning and wait before retrying
-                        logger.warning(f"Retrying {func.__name__} due to error: {e}")
-                        time.sleep(delay)
-                    else:
-                        # Log an error if max retries are exceeded and raise the exception
-                        logger.error(f"Max retries exceeded for {func.__name__}: {e}")
-                        raise
-        return wrapper
-    return decorator
-
 class ApiKeyManager:
     def __init__(self, session, api_keys_table, cipher):
         # Initialize the session, API keys table, and cipher for encryption/decryption
         self.Session = session
         self.api_keys = api_keys_table
         self.cipher = cipher
+        # Cached statements on pooled Core connections for hot reads
+        self.reader = CoreReader.for_session(session)
 
     def encrypt_api_key(self, api_key):
         # Encrypt the API key using the provided cipher
@@ -65,6 +45,8 @@ class ApiKeyManager:
                 logger.debug(f"No API key found for {service}.")
                 
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Rollback if an error occurs and log the error
             session.rollback()
             logger.error(f"Error deleting API key for {service}: {e}")
@@ -118,6 +100,8 @@ class ApiKeyManager:
             session.commit()
         
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Rollback if an error occurs and log the error
             session.rollback()
             logger.error(f"Error inserting/updating API key for {service}: {e}")
@@ -128,17 +112,13 @@ class ApiKeyManager:
 
     @retry_on_exception()
     def select_api_key(self, service):
-        # Open a new session for database interaction
-        session = self.Session()
         try:
             # Query the encrypted API key for the specified service
-            select_stmt = select(self.api_keys.c.encrypted_api_key).where(
-                self.api_keys.c.service == service
+            encrypted_key = self.reader.fetch_scalar(
+                "api_keys.select_api_key",
+                lambda: select(self.api_keys.c.encrypted_api_key).where(self.api_keys.c.service == bindparam("service")),
+                service=service,
             )
-            
-            # Execute the select statement
-            result = session.execute(select_stmt)
-            encrypted_key = result.scalar()
 
             if encrypted_key:
                 # Decrypt and return the API key if found
@@ -152,13 +132,11 @@ class ApiKeyManager:
                 return None
             
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Log any error that occurs
             logger.error(f"Error selecting API key for {service}: {e}")
             return None
-        
-        finally:
-            # Close the session to free up resources
-            session.close()
 
     @retry_on_exception()
     def select_all_api_keys(self):
@@ -206,6 +184,8 @@ class ApiKeyManager:
             return api_keys_list
         
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Log any error that occurs
             logger.error(f"Error selecting all API keys: {e}")
             return []
@@ -0,0 +1,110 @@
+# db_management/core_access.py
+import threading
+from sqlalchemy.exc import DBAPIError
+import logging
+logger = logging.getLogger(__name__)
+
+
+class CompiledQuery:
+    # A select compiled once to driver SQL, with its bind order, defaults and type processors resolved up front
+    __slots__ = ("sql", "param_names", "defaults", "bind_processors", "columns", "result_processors")
+
+    def __init__(self, stmt, dialect):
+        compiled = stmt.compile(dialect=dialect)
+        self.sql = str(compiled)
+        self.param_names = tuple(compiled.positiontup or ())
+        # Values bound into the statement itself (e.g. literal comparisons) are used unless overridden
+        self.defaults = dict(compiled.params)
+        self.bind_processors = tuple(
+            compiled.binds[name].type.dialect_impl(dialect).bind_processor(dialect) for name in self.param_names
+        )
+        self.columns = tuple(column.name for column in stmt.selected_columns)
+        self.result_processors = tuple(
+            column.type.dialect_impl(dialect).result_processor(dialect, None) for column in stmt.selected_columns
+        )
+        if not any(self.result_processors):
+            self.result_processors = None
+
+    def parameters(self, params):
+        # Order keyword parameters positionally and apply the same bind conversions SQLAlchemy would
+        values = []
+        for name, processor in zip(self.param_names, self.bind_processors):
+            value = params[name] if name in params else self.defaults[name]
+            values.append(processor(value) if processor is not None and value is not None else value)
+        return tuple(values)
+
+    def rows(self, raw_rows):
+        # Convert driver tuples to result values, only paying for columns whose type needs processing
+        if self.result_processors is None:
+            return raw_rows
+        processors = self.result_processors
+        return [
+            tuple(processor(value) if processor is not None else value for processor, value in zip(processors, row))
+            for row in raw_rows
+        ]
+
+
+class CoreReader:
+    # Read path on pooled Core connections: no ORM session, no per-call compilation or cache key generation
+    _readers = {}
+    _readers_lock = threading.Lock()
+
+    def __init__(self, engine, max_statements=256):
+        self.engine = engine
+        # Client-chosen projections and sort orders name new statements, so the cache is bounded
+        self.max_statements = max_statements
+        self._queries = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_session(cls, session_factory):
+        # Share one reader, and so one statement cache, per engine behind a sessionmaker
+        engine = session_factory.kw["bind"]
+        with cls._readers_lock:
+            reader = cls._readers.get(engine)
+            if reader is None:
+                reader = cls._readers[engine] = cls(engine)
+            return reader
+
+    def prepare(self, name, build_stmt):
+        # Compile a statement the first time its name is used; build_stmt is only called on a cache miss
+        query = self._queries.get(name)
+        if query is None:
+            with self._lock:
+                query = self._queries.get(name)
+                if query is None:
+                    query = CompiledQuery(build_stmt(), self.engine.dialect)
+                    # Past the bound a statement is compiled for this call only and the cache stays as it is
+                    if len(self._queries) < self.max_statements:
+                        self._queries[name] = query
+        return query
+
+    def fetch_rows(self, name, build_stmt, **params):
+        # Run a cached statement and return (column names, row tuples)
+        query = self.prepare(name, build_stmt)
+        parameters = query.parameters(params)
+        with self.engine.connect() as conn:
+            # A DBAPI cursor on the pooled connection skips per-call result metadata built from cursor.description
+            cursor = conn.connection.cursor()
+            try:
+                # Raw cursors bypass engine events, so forward them for listeners such as the query plan check
+                for listener in self.engine.dispatch.before_cursor_execute:
+                    listener(conn, cursor, query.sql, parameters, None, False)
+                cursor.execute(query.sql, parameters)
+                raw_rows = cursor.fetchall()
+            except self.engine.dialect.loaded_dbapi.Error as e:
+                # Raise the same wrapped exception an ORM session would, so callers' SQLAlchemyError handlers still apply
+                raise DBAPIError.instance(query.sql, parameters, e, self.engine.dialect.loaded_dbapi.Error) from e
+            finally:
+                cursor.close()
+        return query.columns, query.rows(raw_rows)
+
+    def fetch_all(self, name, build_stmt, **params):
+        # Run a cached statement and map each row tuple to a dictionary keyed by column name
+        columns, rows = self.fetch_rows(name, build_stmt, **params)
+        return [dict(zip(columns, row)) for row in rows]
+
+    def fetch_scalar(self, name, build_stmt, **params):
+        # Run a cached statement and return the first column of the first row, or None
+        columns, rows = self.fetch_rows(name, build_stmt, **params)
+        return rows[0][0] if rows else None
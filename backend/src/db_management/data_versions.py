@@ -0,0 +1,28 @@
+# db_management/data_versions.py
+import threading
+import logging
+logger = logging.getLogger(__name__)
+
+
+class DataVersions:
+    def __init__(self, db_names):
+        # One counter per database, bumped after an ingest commits so cached API payloads know they are stale
+        self._versions = dict.fromkeys(db_names, 0)
+        self._lock = threading.Lock()
+
+    def bump(self, db_names):
+        # Advance the counters of the given databases and return their new values
+        with self._lock:
+            for db_name in db_names:
+                self._versions[db_name] = self._versions.get(db_name, 0) + 1
+            logger.debug(f"Data versions bumped for {', '.join(db_names)}: {self._versions}")
+            return self.current(db_names)
+
+    def current(self, db_names):
+        # Version tuple for a set of databases; a payload built from them is valid while this tuple is unchanged
+        return tuple(self._versions.get(db_name, 0) for db_name in db_names)
+
+    def snapshot(self):
+        # Copy of every counter, for metrics
+        with self._lock:
+            return dict(self._versions)
@@ -11,9 +11,12 @@ from sqlalchemy import (
     DateTime,
     Boolean,
     PrimaryKeyConstraint,
+    UniqueConstraint,
     Index,
+    Computed,
     func,
 )
+from .time_keys import now_epoch_ms
 import logging
 
 logger = logging.getLogger(__name__)
@@ -90,6 +93,23 @@ class DBSchemaManager:
             stocks.c.timestamp_end,
         )
 
+        # Define the stocks_latest table holding the most recent bar per ticker with derived fields
+        stocks_latest = Table(
+            "stocks_latest",
+            self.polygon_stocks_metadata,
+            Column("ticker_symbol", String, primary_key=True),
+            Column("close_price", Float),
+            Column("highest_price", Float),
+            Column("lowest_price", Float),
+            Column("open_price", Float),
+            Column("timestamp_end", Integer, nullable=False),
+            Column("previous_close", Float),  # Close of the bar before timestamp_end
+            Column("previous_timestamp_end", Integer),
+            Column("day_change", Float, Computed("close_price - previous_close", persisted=True)),
+            Column("day_change_percentage", Float, Computed("(close_price - previous_close) * 100.0 / NULLIF(previous_close, 0)", persisted=True)),
+            Column("insert_timestamp", DateTime),
+        )
+
         # Define the api_keys table for storing encrypted API keys
         api_keys = Table(
             "api_keys",
@@ -117,18 +137,36 @@ class DBSchemaManager:
             Column("updated_at", DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc)),
         )
 
-        # Define the stocks_scrape table for storing scraped stock data
+        # Define the scrape_tickers dimension holding each ticker's company name under a compact id
+        scrape_tickers = Table(
+            "scrape_tickers",
+            self.scrape_metadata,
+            Column("ticker_id", Integer, primary_key=True, autoincrement=True),
+            Column("ticker_symbol", String, nullable=False),
+            Column("company_name", String, nullable=False),
+            UniqueConstraint("ticker_symbol", "company_name"),  # A renamed company gets a new id, older rows keep the old name
+        )
+
+        # Define the scrape_industries dimension holding each distinct industry name under a compact id
+        scrape_industries = Table(
+            "scrape_industries",
+            self.scrape_metadata,
+            Column("industry_id", Integer, primary_key=True, autoincrement=True),
+            Column("industry", String, nullable=False, unique=True),
+        )
+
+        # Define the stocks_scrape table for storing scraped stock data; names live in the dimension tables
         stocks_scrape = Table(
             "stocks_scrape",
             self.scrape_metadata,
             Column("ticker_symbol", String, nullable=False),
-            Column("company_name", String),
+            Column("ticker_id", Integer),  # scrape_tickers.ticker_id, NULL when no company name was scraped
             Column("price", Float),
             Column("change", Float),
-            Column("industry", String),
+            Column("industry_id", Integer),  # scrape_industries.industry_id, NULL when no industry was scraped
             Column("volume", Float),
             Column("pe_ratio", Float),
-            Column("timestamp", DateTime, nullable=False),  # New timestamp column
+            Column("timestamp", Integer, nullable=False),  # Epoch milliseconds (UTC)
             PrimaryKeyConstraint("ticker_symbol", "timestamp"),  # Composite primary key
         )
 
@@ -139,6 +177,54 @@ class DBSchemaManager:
             stocks_scrape.c.timestamp,
         )
 
+        # Define the stocks_scrape_latest table holding the most recent scrape row per ticker
+        stocks_scrape_latest = Table(
+            "stocks_scrape_latest",
+            self.scrape_metadata,
+            Column("ticker_symbol", String, primary_key=True),
+            Column("company_name", String),
+            Column("price", Float),
+            Column("change", Float),
+            Column("industry", String),
+            Column("volume", Float),
+            Column("pe_ratio", Float),
+            Column("timestamp", Integer, nullable=False),  # Epoch milliseconds (UTC)
+            # Ingest stamp in epoch milliseconds, strictly increasing per batch; the cursor for delta reads
+            # NULL on rows written before the column existed, which only full reads return
+            Column("ingested_at", Integer),
+        )
+
+        # Create an index on stocks_scrape_latest so delta reads only touch the rows changed since a cursor
+        Index(
+            "idx_stocks_scrape_latest_ingested_at",
+            stocks_scrape_latest.c.ingested_at,
+        )
+
+        # Define the stocks_scrape_rollup table holding 15m, 1h and 1d OHLCV bars built from scrapes
+        stocks_scrape_rollup = Table(
+            "stocks_scrape_rollup",
+            self.scrape_metadata,
+            Column("ticker_symbol", String, nullable=False),
+            Column("resolution", String, nullable=False),  # Possible resolutions: 15m, 1h, 1d
+            Column("bucket_start", Integer, nullable=False),  # Epoch milliseconds (UTC)
+            Column("open_price", Float),
+            Column("high_price", Float),
+            Column("low_price", Float),
+            Column("close_price", Float),
+            Column("volume", Float),  # Cumulative day volume reported by the last sample in the bar
+            Column("sample_count", Integer),
+            Column("first_timestamp", Integer),
+            Column("last_timestamp", Integer),
+            PrimaryKeyConstraint("ticker_symbol", "resolution", "bucket_start"),
+        )
+
+        # Create an index on stocks_scrape_rollup for backfill and retention lookups by bucket across all tickers
+        Index(
+            "idx_stocks_scrape_rollup_bucket",
+            stocks_scrape_rollup.c.bucket_start,
+            stocks_scrape_rollup.c.resolution,
+        )
+
         # Define the jobs_schedule table for managing scheduled jobs
         jobs_schedule = Table(
             "jobs_schedule",
@@ -349,9 +435,18 @@ class DBSchemaManager:
             Column("200_day_moving_average", Float),
             Column("price_change_50_day_moving_average", Float),
             Column("price_change_200_day_moving_average", Float),
-            Column("created_at", DateTime, default=datetime.now(timezone.utc)),
-            Column("updated_at", DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc)),
+            Column("created_at", Integer, default=now_epoch_ms),  # Epoch milliseconds (UTC)
+            Column("updated_at", Integer, default=now_epoch_ms, onupdate=now_epoch_ms),  # Epoch milliseconds (UTC)
         )
 
+        # Create indexes on the metrics screens filter on most, so common screens seek instead of scanning every ticker
+        # Kept to a few columns: each one is rewritten whenever the stock analysis fetcher merges that metric
+        Index("idx_ticker_scrape_sector_pe_forward", ticker_scrape.c.sector, ticker_scrape.c.pe_forward)
+        Index("idx_ticker_scrape_market_cap_group", ticker_scrape.c.market_cap_group)
+        Index("idx_ticker_scrape_exchange", ticker_scrape.c.exchange)
+        Index("idx_ticker_scrape_pe_forward", ticker_scrape.c.pe_forward)
+        Index("idx_ticker_scrape_dividend_yield", ticker_scrape.c.dividend_yield)
+        Index("idx_ticker_scrape_free_cash_flow_yield", ticker_scrape.c.free_cash_flow_yield)
+
         # Return all defined tables for easy access
-        return stocks, api_keys, users, stocks_scrape, jobs_schedule, ticker_scrape
+        return stocks, api_keys, users, stocks_scrape, jobs_schedule, ticker_scrape, stocks_scrape_latest, stocks_latest, stocks_scrape_rollup, scrape_tickers, scrape_industries
@@ -0,0 +1,74 @@
+# db_management/event_broker.py
+import queue
+import threading
+from .. import json_codec
+import logging
+logger = logging.getLogger(__name__)
+
+
+class EventBroker:
+    def __init__(self, queue_size=64):
+        # In-process fan-out of committed changes to Server-Sent Events clients
+        self.queue_size = queue_size
+        self._subscriptions = set()
+        # Clients that fell behind and missed messages; their streams tell them to resync and close
+        self._lagging = set()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.published = 0
+        self.dropped_clients = 0
+
+    def subscribe(self):
+        # Register a client and return its bounded queue of encoded messages; unsubscribe when its stream ends
+        subscription = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+            self._lagging.discard(subscription)
+
+    def is_lagging(self, subscription):
+        return subscription in self._lagging
+
+    def has_subscribers(self):
+        # Lets publishers skip building payloads nobody will receive
+        return bool(self._subscriptions)
+
+    @staticmethod
+    def encode(event, data, event_id=None):
+        # Format one SSE message; JSON never contains raw newlines, so the data fits on a single line
+        # The encoder is the one the REST routes use, so pushed rows parse like polled ones
+        header = f"id: {event_id}\n" if event_id is not None else ""
+        return f"{header}event: {event}\ndata: ".encode() + json_codec.dumps(data) + b"\n\n"
+
+    def publish(self, event, data):
+        # Serialize once and hand the same bytes to every client without blocking the publishing thread
+        with self._lock:
+            self._next_id += 1
+            message = self.encode(event, data, self._next_id)
+            subscriptions = list(self._subscriptions)
+            self.published += 1
+        for subscription in subscriptions:
+            try:
+                subscription.put_nowait(message)
+            except queue.Full:
+                # A slow client must not hold memory or stall ingest; it stops receiving and resyncs over REST
+                with self._lock:
+                    self._subscriptions.discard(subscription)
+                    self._lagging.add(subscription)
+                    self.dropped_clients += 1
+                logger.warning("Dropping an event stream client that fell behind.")
+        return len(subscriptions)
+
+    def metrics(self):
+        # Connected clients, messages published and clients dropped for falling behind
+        with self._lock:
+            return {
+                "subscribers": len(self._subscriptions),
+                "queue_size": self.queue_size,
+                "published": self.published,
+                "dropped_clients": self.dropped_clients,
+            }
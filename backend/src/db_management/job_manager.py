@@ -1,39 +1,29 @@
 # db_management/job_manager.py
-from sqlalchemy import select, update
+from sqlalchemy import select, update, bindparam
+from .core_access import CoreReader
+from .list_query import ListQuery
 from datetime import datetime, timezone
-import time
+from .resilience import retry_on_exception, raise_if_retryable
 import logging 
 logger = logging.getLogger(__name__)
 
-def retry_on_exception(max_retries=3, delay=1):
-    # Decorator to retry a function call if it raises an exception
-    def decorator(func):
-        # Wrapper function that will replace the original function
-        def wrapper(*args, **kwargs):
-            # Attempt to call the function up to max_retries times
-            for attempt in range(max_retries):
-                try:
-                    # Call the original function and return its result
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    # If an exception occurs and it's not the last attempt
-                    if attempt < max_retries - 1:
-                        # Log a warning and wait before retrying
-                        logger.warning(f"Retrying {func.__name__} due to error: {e}")
-                        time.sleep(delay)
-                    else:
-                        # Log an error if max retries are exceeded and raise the exception
-                        logger.error(f"Max retries exceeded for {func.__name__}: {e}")
-                        raise
-        return wrapper
-    return decorator
 
 class JobManager:
-    def __init__(self, session, jobs_schedule_table):
+    def __init__(self, session, jobs_schedule_table, event_broker=None, on_change=None):
         # Initialize the session for database interaction
         self.Session = session
         # Set the jobs and jobs_schedule tables for managing job records
         self.jobs_schedule = jobs_schedule_table
+        # Optional broker that pushes committed status changes to event stream clients
+        self.event_broker = event_broker
+        # Optional callback run after every committed write, so cached job schedule responses go stale
+        self.on_change = on_change
+        # Cached statements on pooled Core connections for hot reads
+        self.reader = CoreReader.for_session(session)
+
+    def _publish_change(self):
+        if self.on_change is not None:
+            self.on_change()
 
     @retry_on_exception()
     def insert_job_schedule(
@@ -76,9 +66,12 @@ class JobManager:
             session.execute(insert_stmt)
             # Commit the transaction to save changes to the database
             session.commit()
+            self._publish_change()
             # Print a success message
             logger.debug(f"The {job_type} for {service} scheduled successfully.")
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Rollback the transaction if an error occurs
             session.rollback()
             # Print an error message with details
@@ -89,31 +82,32 @@ class JobManager:
 
     @retry_on_exception()
     def select_job_schedule(self, job_type, service, frequency, scheduled_start_date):
-        # Open a new session for database interaction
-        session = self.Session()
         try:
-            # Prepare a SQL select statement to retrieve a job schedule that matches the given parameters
-            select_stmt = select(self.jobs_schedule).where(
-                self.jobs_schedule.c.job_type == job_type,
-                self.jobs_schedule.c.service == service,
-                self.jobs_schedule.c.frequency == frequency,
-                self.jobs_schedule.c.scheduled_start_date == scheduled_start_date,
+            # Retrieve the job schedule that matches the given parameters with a cached statement
+            jobs = self.reader.fetch_all(
+                "jobs_schedule.select_job_schedule",
+                lambda: select(self.jobs_schedule).where(
+                    self.jobs_schedule.c.job_type == bindparam("job_type"),
+                    self.jobs_schedule.c.service == bindparam("service"),
+                    self.jobs_schedule.c.frequency == bindparam("frequency"),
+                    self.jobs_schedule.c.scheduled_start_date == bindparam("scheduled_start_date"),
+                ),
+                job_type=job_type,
+                service=service,
+                frequency=frequency,
+                scheduled_start_date=scheduled_start_date,
             )
-            # Execute the select statement
-            result = session.execute(select_stmt)
-            # Fetch the first matching result (or None if no match found)
-            job = result.fetchone()
+            job = jobs[0] if jobs else None
             # Log a message indicating if the job was found or not
             logger.debug(f"The {job_type} {service} Job exists with a frequency of '{frequency}' starting {scheduled_start_date} exists." if job else "Job not found.")
-            # Convert the row to a dictionary, or return None if no job found
-            return job._asdict() if job else None
+            # Return the job as a dictionary, or None if no job found
+            return job
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Print error details and return None if an exception occurs
             logger.error(f"Error selecting job: {e}")
             return None
-        finally:
-            # Close the database session to free resources
-            session.close()
 
     @retry_on_exception()
     def delete_job_schedule(self, job_type, service, frequency, scheduled_start_date):
@@ -131,6 +125,7 @@ class JobManager:
             result = session.execute(delete_stmt)
             # Commit the delete transaction to the database
             session.commit()
+            self._publish_change()
             # Check if any rows were affected and print the appropriate message
             if result.rowcount > 0:
                 logger.debug(f"The {job_type} {service} Job exists with a frequency of '{frequency}' starting {scheduled_start_date} exists.")
@@ -138,14 +133,23 @@ class JobManager:
                 logger.debug(f"No {job_type} {service} Job found with a frequency of '{frequency}' starting {scheduled_start_date} exists. Nothing deleted.")
         # Handle any exceptions that occur, roll back the transaction, and print the error
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             session.rollback()
             logger.error(f"Error deleting job: {e}")
         finally:
             # Close the database session to free resources
             session.close()
 
+    def job_schedules_select(self):
+        # Columns the job schedules endpoint serves; list queries project and sort within these
+        return select(self.jobs_schedule)
+
     @retry_on_exception()
-    def select_all_job_schedules(self):
+    def select_all_job_schedules(self, list_query=None):
+        # A ListQuery pushes the requested columns, order and page window down into SQL
+        if list_query is not None and not list_query.is_default:
+            return self._select_job_schedules_page(list_query)
         # Open a new session for database interaction
         session = self.Session()
         try:
@@ -163,6 +167,8 @@ class JobManager:
             # Return the list of job schedules as a list of dictionaries
             return jobs_list
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Print error details if an exception occurs and return an empty list
             logger.error(f"Error selecting all job schedules: {e}")
             return []
@@ -170,6 +176,36 @@ class JobManager:
             # Close the database session to free resources
             session.close()
 
+    def _select_job_schedules_page(self, list_query):
+        try:
+            # Primary key columns break sort ties, so consecutive pages never overlap
+            jobs_list = self.reader.fetch_all(
+                list_query.cache_name("jobs_schedule.select_all_job_schedules"),
+                lambda: list_query.statement(self.job_schedules_select(), list(self.jobs_schedule.primary_key.columns)),
+                **list_query.parameters(),
+            )
+            logger.debug(f"Retrieved {len(jobs_list)} job schedules." if jobs_list else "No job schedules found.")
+            return jobs_list
+        except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
+            logger.error(f"Error selecting job schedules: {e}")
+            return []
+
+    @retry_on_exception()
+    def count_job_schedules(self):
+        # Number of job schedules, for paged responses; None on error
+        try:
+            return self.reader.fetch_scalar(
+                "jobs_schedule.count_job_schedules",
+                lambda: ListQuery.count_statement(self.job_schedules_select()),
+            )
+        except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
+            logger.error(f"Error counting job schedules: {e}")
+            return None
+
     @retry_on_exception()
     def update_job_schedule(self, job_type, service, frequency, scheduled_start_date, **update_values):
         # Open a new session for database interaction
@@ -192,9 +228,12 @@ class JobManager:
             result = session.execute(update_stmt)
             # Commit the transaction to apply the updates
             session.commit()
+            self._publish_change()
             # Check if any rows were affected and print appropriate message
             logger.debug(f"Job {job_type}-{service}-{frequency}-{scheduled_start_date} updated." if result.rowcount else "Job not found.")
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Rollback the transaction if an error occurs
             session.rollback()
             # Print an error message with details
@@ -225,6 +264,7 @@ class JobManager:
             result = session.execute(update_stmt)
             # Commit the transaction to apply the update
             session.commit()
+            self._publish_change()
             # Check if any rows were affected to confirm the update
             if result.rowcount > 0:
                 logger.info(f"Job {job_type}-{service}-{frequency}-{scheduled_start_date} run time updated to '{run_time}' successfully.")
@@ -232,6 +272,8 @@ class JobManager:
                 # Print a message if no matching job was found
                 logger.info(f"No job found with name {job_type}-{service}-{frequency}-{scheduled_start_date} scheduled for {scheduled_start_date}.")
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Rollback the transaction if an error occurs
             session.rollback()
             # Print an error message with details
@@ -262,13 +304,25 @@ class JobManager:
             result = session.execute(update_stmt)
             # Commit the transaction to apply the update
             session.commit()
+            self._publish_change()
             # Check if any rows were affected to confirm the update
             if result.rowcount > 0:
                 logger.info(f"Job {job_type}-{service}-{frequency}-{scheduled_start_date} status updated to '{status}' successfully.")
+                if self.event_broker is not None:
+                    self.event_broker.publish("job_status", {
+                        "job_type": job_type,
+                        "service": service,
+                        "frequency": frequency,
+                        "scheduled_start_date": scheduled_start_date,
+                        "status": status,
+                        "updated_at": update_values["updated_at"],
+                    })
             else:
                 # Print a message if no matching job was found
                 logger.info(f"No job found with name {job_type}-{service}-{frequency}-{scheduled_start_date} scheduled for {scheduled_start_date}.")
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Rollback the transaction if an error occurs
             session.rollback()
             # Print an error message with details
@@ -0,0 +1,96 @@
+# db_management/list_query.py
+from sqlalchemy import select, func, bindparam
+import logging
+logger = logging.getLogger(__name__)
+
+# Upper bound on one page, so a client cannot ask for an unbounded read through `limit`
+MAX_PAGE_SIZE = 1000
+
+
+class ListQuery:
+    def __init__(self, fields=None, sort=None, limit=None, offset=0):
+        # Validated list options: projected column names, (column name, descending) sort keys and a page window
+        self.fields = tuple(fields) if fields else None
+        self.sort = tuple(sort) if sort else ()
+        self.limit = limit
+        self.offset = offset
+
+    @classmethod
+    def from_args(cls, args, base_select, default_limit=None):
+        # Parse `fields`, `sort`, `limit` and `offset` query parameters against the columns a list endpoint serves
+        # Raises ValueError with a message suitable for a 400 response; default_limit makes the endpoint always paged
+        available = [column.name for column in base_select.selected_columns]
+
+        fields = None
+        if args.get("fields"):
+            requested = [name.strip() for name in args["fields"].split(",") if name.strip()]
+            unknown = [name for name in requested if name not in available]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}; available: {', '.join(available)}")
+            # Keep the endpoint's column order so equivalent requests share one compiled statement
+            fields = [name for name in available if name in requested]
+
+        sort = []
+        if args.get("sort"):
+            for key in args["sort"].split(","):
+                key = key.strip()
+                descending = key.startswith("-")
+                name = key.lstrip("+-")
+                if name not in available:
+                    raise ValueError(f"Cannot sort by '{name}'; available: {', '.join(available)}")
+                sort.append((name, descending))
+
+        limit = default_limit
+        if args.get("limit") is not None:
+            try:
+                limit = int(args["limit"])
+            except ValueError:
+                raise ValueError("limit must be an integer")
+            if not 1 <= limit <= MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        offset = 0
+        if args.get("offset") is not None:
+            try:
+                offset = int(args["offset"])
+            except ValueError:
+                raise ValueError("offset must be an integer")
+            if offset < 0:
+                raise ValueError("offset must not be negative")
+            if offset and limit is None:
+                raise ValueError("offset requires limit")
+        return cls(fields, sort, limit, offset)
+
+    @property
+    def is_default(self):
+        # True when the request asks for every row and column in the endpoint's natural order
+        return self.fields is None and not self.sort and self.limit is None and not self.offset
+
+    def cache_name(self, prefix):
+        # Name for the reader's statement cache; the page window is bound, so only projection and order vary
+        fields = ",".join(self.fields) if self.fields else "*"
+        sort = ",".join(f"{'-' if descending else ''}{name}" for name, descending in self.sort)
+        return f"{prefix}[{fields}|{sort}|{'page' if self.limit is not None else 'all'}]"
+
+    def statement(self, base_select, key_columns):
+        # Push projection, order and page window into SQL; key columns break ties so pages never overlap
+        columns = {column.name: column for column in base_select.selected_columns}
+        stmt = base_select
+        if self.fields:
+            stmt = stmt.with_only_columns(*(columns[name] for name in self.fields))
+        order_by = [columns[name].desc() if descending else columns[name].asc() for name, descending in self.sort]
+        sorted_names = {name for name, _ in self.sort}
+        order_by.extend(column for column in key_columns if column.name not in sorted_names)
+        if self.sort or self.limit is not None:
+            stmt = stmt.order_by(*order_by)
+        if self.limit is not None:
+            stmt = stmt.limit(bindparam("limit")).offset(bindparam("offset"))
+        return stmt
+
+    def parameters(self):
+        # Bound values for the page window of `statement`
+        return {"limit": self.limit, "offset": self.offset} if self.limit is not None else {}
+
+    @staticmethod
+    def count_statement(base_select):
+        # Row count of the whole list, for the X-Total-Count header of paged responses
+        return select(func.count()).select_from(base_select.subquery())
@@ -0,0 +1,109 @@
+# db_management/read_snapshot.py
+import os
+import sqlite3
+import threading
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from .sqlite_pragmas import apply_pragmas
+from .time_keys import now_epoch_ms
+import logging
+logger = logging.getLogger(__name__)
+
+# Tables the API list endpoints read, keyed by the database they are ingested into
+HOT_TABLES = {
+    "scrape": ["stocks_scrape_latest"],
+    "polygon_stocks": ["stocks_latest"],
+    "scrape_ticker": ["ticker_scrape"],
+}
+
+
+def read_snapshot_enabled():
+    # The snapshot is opt-in; set CLIPSE_READ_SNAPSHOT=1 to serve API reads from it
+    return os.environ.get("CLIPSE_READ_SNAPSHOT", "0").lower() in ("1", "true", "yes")
+
+
+class ReadSnapshotManager:
+    def __init__(self, db_file_paths, snapshot_db_file_path, pages_per_step=256):
+        # Initialize with the source database files and the read-only snapshot file the API reads from
+        self.db_file_paths = db_file_paths
+        self.snapshot_db_file_path = snapshot_db_file_path
+        self.pages_per_step = pages_per_step
+        self.refreshed_at = {}
+        self.last_refresh_seconds = None
+        self.refresh_count = 0
+        self._lock = threading.Lock()
+        # In-memory staging copy of the hot tables; only the tables of the database that changed are recopied
+        self._staging = sqlite3.connect("file:read_snapshot_staging?mode=memory", uri=True, check_same_thread=False)
+
+        # API connections only read; query_only rather than mode=ro so a reader can still open the WAL index
+        self.engine = create_engine(f"sqlite:///{snapshot_db_file_path}")
+        apply_pragmas(self.engine, {"busy_timeout": 5000, "query_only": 1})
+        self.Session = sessionmaker(bind=self.engine)
+
+    def _copy_tables(self, db_name):
+        # Replace the staged copy of one database's hot tables, including their indexes
+        source_path = os.path.abspath(self.db_file_paths[db_name])
+        self._staging.execute("ATTACH DATABASE ? AS source", (f"file:{source_path}?mode=ro",))
+        try:
+            with self._staging:
+                for table in HOT_TABLES[db_name]:
+                    schema = self._staging.execute(
+                        "SELECT type, sql FROM source.sqlite_master WHERE tbl_name = ? AND sql IS NOT NULL "
+                        "ORDER BY type = 'index'",
+                        (table,),
+                    ).fetchall()
+                    if not schema:
+                        continue
+                    self._staging.execute(f'DROP TABLE IF EXISTS main."{table}"')
+                    for _, ddl in schema:
+                        self._staging.execute(ddl)
+                    # Generated columns (hidden 2 and 3) are recomputed on insert and cannot be copied
+                    columns = ", ".join(
+                        f'"{row[1]}"' for row in self._staging.execute(f"PRAGMA source.table_xinfo(\"{table}\")") if row[6] == 0
+                    )
+                    self._staging.execute(f'INSERT INTO main."{table}" ({columns}) SELECT {columns} FROM source."{table}"')
+        finally:
+            self._staging.execute("DETACH DATABASE source")
+
+    def refresh(self, db_names=None):
+        # Recopy the hot tables of the given databases and publish the staging copy with the online backup API
+        db_names = list(HOT_TABLES) if db_names is None else [db_name for db_name in db_names if db_name in HOT_TABLES]
+        if not db_names:
+            return None
+        start_time = time.perf_counter()
+        with self._lock:
+            try:
+                for db_name in db_names:
+                    self._copy_tables(db_name)
+                snapshot = sqlite3.connect(self.snapshot_db_file_path, timeout=15)
+                try:
+                    # In WAL mode API readers keep reading the previous copy until the backup commits
+                    snapshot.execute("PRAGMA journal_mode=WAL")
+                    self._staging.backup(snapshot, pages=self.pages_per_step)
+                finally:
+                    snapshot.close()
+            except sqlite3.Error as e:
+                logger.error(f"Error refreshing read snapshot for {', '.join(db_names)}: {e}")
+                return None
+            refreshed_at = now_epoch_ms()
+            for db_name in db_names:
+                self.refreshed_at[db_name] = refreshed_at
+            self.last_refresh_seconds = time.perf_counter() - start_time
+            self.refresh_count += 1
+        logger.debug(f"Refreshed read snapshot for {', '.join(db_names)} in {self.last_refresh_seconds:.3f}s.")
+        return self.last_refresh_seconds
+
+    def age_seconds(self):
+        # Seconds since each database's hot tables were last copied into the snapshot
+        now = now_epoch_ms()
+        return {db_name: round((now - self.refreshed_at[db_name]) / 1000, 3) if db_name in self.refreshed_at else None for db_name in HOT_TABLES}
+
+    def metrics(self):
+        # Snapshot freshness and refresh cost, reported by the read snapshot metrics endpoint
+        return {
+            "enabled": True,
+            "age_seconds": self.age_seconds(),
+            "last_refresh_seconds": self.last_refresh_seconds,
+            "refresh_count": self.refresh_count,
+        }
@@ -0,0 +1,108 @@
+# db_management/resilience.py
+import functools
+import random
+import sqlite3
+import threading
+import time
+from sqlalchemy.exc import DBAPIError
+import logging
+logger = logging.getLogger(__name__)
+
+# SQLite primary result codes for lock contention; extended codes keep these in the low byte
+CONTENTION_CODES = (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+CONTENTION_MESSAGES = ("database is locked", "database table is locked", "database is busy")
+
+_stats = {}
+_stats_lock = threading.Lock()
+# Set while a retried call is running, so nested retried calls leave retrying to the outermost one
+_active = threading.local()
+
+
+def is_retryable(exc):
+    # True only for SQLite busy/locked errors, looking through SQLAlchemy wrappers and exception chains
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, sqlite3.OperationalError):
+            error_code = getattr(exc, "sqlite_errorcode", None)
+            if error_code is not None:
+                return error_code & 0xFF in CONTENTION_CODES
+            return any(message in str(exc).lower() for message in CONTENTION_MESSAGES)
+        if isinstance(exc, DBAPIError) and exc.orig is not None:
+            exc = exc.orig
+        else:
+            exc = exc.__cause__
+    return False
+
+
+def raise_if_retryable(exc):
+    # Re-raise lock contention from a method's own error handler so the retry decorator can see it
+    if is_retryable(exc):
+        raise exc
+
+
+def _record(name, calls=0, retries=0, wait_seconds=0.0, exhausted=0, failures=0):
+    with _stats_lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = {"calls": 0, "retries": 0, "wait_seconds": 0.0, "exhausted": 0, "failures": 0}
+        stats["calls"] += calls
+        stats["retries"] += retries
+        stats["wait_seconds"] += wait_seconds
+        stats["exhausted"] += exhausted
+        stats["failures"] += failures
+
+
+def retry_metrics():
+    # Calls, retries, total backoff wait, deadline/attempt exhaustions and non-retryable failures per method
+    with _stats_lock:
+        return {
+            name: dict(stats, wait_seconds=round(stats["wait_seconds"], 4))
+            for name, stats in sorted(_stats.items())
+        }
+
+
+def reset_retry_metrics():
+    with _stats_lock:
+        _stats.clear()
+
+
+def retry_on_exception(max_retries=4, base_delay=0.05, max_delay=1.0, deadline=5.0):
+    # Decorator to retry a call on SQLite lock contention with jittered exponential backoff.
+    # Other errors are raised immediately; no retry starts once `deadline` seconds have passed since the first attempt.
+    def decorator(func):
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(_active, "depth", 0):
+                # An outer retried call owns the retry loop; retrying here too would multiply the attempts
+                return func(*args, **kwargs)
+            _active.depth = 1
+            start_time = time.monotonic()
+            attempt = 0
+            try:
+                while True:
+                    try:
+                        result = func(*args, **kwargs)
+                    except Exception as e:
+                        if not is_retryable(e):
+                            _record(name, calls=1, failures=1)
+                            raise
+                        attempt += 1
+                        # Full jitter spreads contending writers out instead of having them collide again in step
+                        delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+                        if attempt > max_retries or time.monotonic() - start_time + delay > deadline:
+                            _record(name, calls=1, exhausted=1)
+                            logger.error(f"Giving up on {name} after {attempt} attempts: {e}")
+                            raise
+                        logger.warning(f"Retrying {name} in {delay:.3f}s (attempt {attempt}) due to lock contention: {e}")
+                        _record(name, retries=1, wait_seconds=delay)
+                        time.sleep(delay)
+                    else:
+                        _record(name, calls=1)
+                        return result
+            finally:
+                _active.depth = 0
+        return wrapper
+    return decorator
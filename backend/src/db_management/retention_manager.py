@@ -0,0 +1,179 @@
+# db_management/retention_manager.py
+import os
+from sqlalchemy import select, delete, func, literal_column, bindparam
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime, timezone, timedelta
+from .time_keys import to_epoch_ms, from_epoch_ms
+from .rollup_manager import DAY_MS
+import time
+import logging
+logger = logging.getLogger(__name__)
+
+# Default retention policy; raw_retention_days can be overridden with CLIPSE_SCRAPE_RETENTION_DAYS
+DEFAULT_RETENTION_POLICY = {
+    "raw_retention_days": int(os.environ.get("CLIPSE_SCRAPE_RETENTION_DAYS", 30)),
+    "delete_chunk_size": 5000,        # Rows deleted per transaction so the write lock is held briefly
+    "chunk_pause_seconds": 0.05,      # Pause between chunks to let readers and the scrape job in
+    "vacuum_pages_per_step": 2000,    # Pages returned to the filesystem per incremental_vacuum step
+}
+
+
+class RetentionManager:
+    def __init__(self, session, engine, scrape_table, rollup_manager, policy=None, migrator=None):
+        # Initialize with the scrape session factory, its engine for PRAGMA work and the rollup manager
+        self.Session = session
+        self.engine = engine
+        self.scrape = scrape_table
+        self.rollup_manager = rollup_manager
+        # Schema migrator of the scrape database, consulted before expiring rows by their time keys
+        self.migrator = migrator
+        self.policy = dict(DEFAULT_RETENTION_POLICY, **(policy or {}))
+
+    def retention_cutoff(self, now=None, raw_retention_days=None):
+        # Raw rows before this UTC midnight are removed, so deletes always cover whole days
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=raw_retention_days if raw_retention_days is not None else self.policy["raw_retention_days"])
+        return cutoff.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def run_retention(self, raw_retention_days=None):
+        # Apply the retention policy: roll up, delete expired raw scrapes in chunks, then reclaim space
+        start_time = time.perf_counter()
+        cutoff = self.retention_cutoff(raw_retention_days=raw_retention_days)
+        if self.migrator is not None and not self.migrator.is_applied(f"epoch_ms:{self.scrape.name}:timestamp"):
+            # Legacy text timestamps sort above every integer, so neither the rowid search, the rollup backfill
+            # nor the delete can tell which of them expired; the next run after the background migration catches up
+            logger.info("Skipping scrape retention until stocks_scrape timestamps are converted to epoch milliseconds.")
+            return {"cutoff": cutoff, "rows_deleted": 0, "bytes_freed": 0, "skipped": True}
+        self._ensure_rollups_before(cutoff)
+        rows_deleted = self._delete_expired_scrapes(cutoff)
+        bytes_freed = self._reclaim_space() if rows_deleted else 0
+        summary = {
+            "cutoff": cutoff,
+            "rows_deleted": rows_deleted,
+            "bytes_freed": bytes_freed,
+            "seconds": round(time.perf_counter() - start_time, 3),
+        }
+        logger.info(f"Scrape retention finished: {summary}")
+        return summary
+
+    def _ensure_rollups_before(self, cutoff):
+        # Backfill rollups for any expiring day that has no daily bar yet, before its raw rows go away
+        session = self.Session()
+        try:
+            # Rows are appended in time order, so the first row by rowid is the oldest; a rowid seek avoids a table scan
+            rowid = literal_column("rowid")
+            oldest = session.execute(
+                select(self.scrape.c.timestamp).where(rowid == select(func.min(rowid)).select_from(self.scrape).scalar_subquery())
+            ).scalar()
+            if oldest is None:
+                return
+            rollup = self.rollup_manager.rollup
+            day_ms = to_epoch_ms(oldest) - to_epoch_ms(oldest) % DAY_MS
+            cutoff_ms = to_epoch_ms(cutoff)
+            missing_days = []
+            while day_ms < cutoff_ms:
+                has_rollup = session.execute(
+                    select(rollup.c.bucket_start).where(
+                        rollup.c.resolution == "1d",
+                        rollup.c.bucket_start == day_ms,
+                    ).limit(1)
+                ).first()
+                if not has_rollup:
+                    missing_days.append(day_ms)
+                day_ms += DAY_MS
+        finally:
+            session.close()
+
+        for day_ms in missing_days:
+            self.rollup_manager.backfill_rollups(from_epoch_ms(day_ms), from_epoch_ms(day_ms + DAY_MS - 1))
+
+    def _expired_rowid_range(self, cutoff_ms):
+        # Find [first rowid, first rowid at or after the cutoff) with rowid seeks only, outside any write transaction
+        # Rows are appended in time order, so a binary search over rowid finds the boundary without a timestamp index
+        rowid = literal_column("rowid")
+        session = self.Session()
+        try:
+            # min() and max() of rowid are each a single b-tree lookup when queried on their own
+            low = session.execute(select(func.min(rowid)).select_from(self.scrape)).scalar()
+            high = session.execute(select(func.max(rowid)).select_from(self.scrape)).scalar()
+            if low is None:
+                return None
+            first_rowid = low
+            high += 1
+            probe = select(rowid, self.scrape.c.timestamp).where(rowid >= bindparam("rowid")).order_by(rowid).limit(1)
+            while low < high:
+                middle = (low + high) // 2
+                row = session.execute(probe, {"rowid": middle}).first()
+                if row is None or row[1] >= cutoff_ms:
+                    high = middle
+                else:
+                    low = row[0] + 1
+            return first_rowid, low
+        finally:
+            session.close()
+
+    def _delete_expired_scrapes(self, cutoff):
+        # Delete raw scrapes older than the cutoff in bounded rowid ranges, committing after each one
+        chunk_size = self.policy["delete_chunk_size"]
+        cutoff_ms = to_epoch_ms(cutoff)
+        total_deleted = 0
+        try:
+            expired_range = self._expired_rowid_range(cutoff_ms)
+        except SQLAlchemyError as e:
+            logger.error(f"Error finding expired scrapes: {e}")
+            return 0
+        if expired_range is None:
+            logger.info(f"Deleted 0 raw scrapes older than {cutoff}.")
+            return 0
+        first_rowid, end_rowid = expired_range
+        rowid = literal_column("rowid")
+        # Each chunk is a rowid range seek, so the write lock is held for at most chunk_size rows
+        # The timestamp check keeps any out-of-order newer row inside a range
+        delete_stmt = delete(self.scrape).where(
+            rowid >= bindparam("start"),
+            rowid < bindparam("end"),
+            self.scrape.c.timestamp < cutoff_ms,
+        )
+        for start in range(first_rowid, end_rowid, chunk_size):
+            session = self.Session()
+            try:
+                result = session.execute(delete_stmt, {"start": start, "end": min(start + chunk_size, end_rowid)})
+                session.commit()
+                total_deleted += max(result.rowcount, 0)
+            except SQLAlchemyError as e:
+                session.rollback()
+                logger.error(f"Error deleting expired scrapes: {e}")
+                break
+            finally:
+                session.close()
+            logger.debug(f"Deleted {total_deleted} expired scrapes so far.")
+            time.sleep(self.policy["chunk_pause_seconds"])
+        logger.info(f"Deleted {total_deleted} raw scrapes older than {cutoff}.")
+        return total_deleted
+
+    def _reclaim_space(self):
+        # Return free pages to the filesystem in small incremental_vacuum steps and report bytes freed
+        raw_connection = self.engine.raw_connection()
+        try:
+            sqlite_connection = raw_connection.driver_connection
+            page_size = sqlite_connection.execute("PRAGMA page_size").fetchone()[0]
+            pages_before = sqlite_connection.execute("PRAGMA page_count").fetchone()[0]
+            if sqlite_connection.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                # Without incremental auto_vacuum the free pages are only reused by future inserts
+                free_pages = sqlite_connection.execute("PRAGMA freelist_count").fetchone()[0]
+                logger.info(f"auto_vacuum is not INCREMENTAL; {free_pages * page_size} bytes are free for reuse but not returned to disk.")
+                return 0
+            pages_per_step = self.policy["vacuum_pages_per_step"]
+            while sqlite_connection.execute("PRAGMA freelist_count").fetchone()[0] > 0:
+                # executescript steps the pragma to completion; a plain execute frees only one page
+                sqlite_connection.executescript(f"PRAGMA incremental_vacuum({pages_per_step})")
+                time.sleep(self.policy["chunk_pause_seconds"])
+            pages_after = sqlite_connection.execute("PRAGMA page_count").fetchone()[0]
+            bytes_freed = (pages_before - pages_after) * page_size
+            logger.info(f"Incremental vacuum returned {bytes_freed} bytes to the filesystem.")
+            return bytes_freed
+        except Exception as e:
+            logger.error(f"Error reclaiming space after retention: {e}")
+            return 0
+        finally:
+            raw_connection.close()
@@ -0,0 +1,223 @@
+# db_management/rollup_manager.py
+from sqlalchemy import select, insert, delete, func, case
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime, timezone
+from .time_keys import to_epoch_ms, from_epoch_ms
+from .resilience import retry_on_exception, raise_if_retryable
+import logging
+logger = logging.getLogger(__name__)
+
+# Rollup resolutions ordered from finest to coarsest, in milliseconds
+ROLLUP_RESOLUTIONS = {
+    "15m": 15 * 60 * 1000,
+    "1h": 60 * 60 * 1000,
+    "1d": 24 * 60 * 60 * 1000,
+}
+DAY_MS = ROLLUP_RESOLUTIONS["1d"]
+
+
+class RollupManager:
+    def __init__(self, session, scrape_table, rollup_table):
+        # Initialize the session factory, the raw scrape table and the OHLCV rollup table
+        self.Session = session
+        self.scrape = scrape_table
+        self.rollup = rollup_table
+
+    @staticmethod
+    def aggregate_samples(samples):
+        # Build OHLCV bars for every resolution from (ticker_symbol, epoch_ms, price, volume) samples
+        bars = {}
+        for ticker_symbol, epoch_ms, price, volume in sorted(samples, key=lambda sample: (sample[0], sample[1])):
+            if price is None:
+                continue
+            for resolution, resolution_ms in ROLLUP_RESOLUTIONS.items():
+                key = (ticker_symbol, resolution, epoch_ms - epoch_ms % resolution_ms)
+                bar = bars.get(key)
+                if bar is None:
+                    # Samples are sorted, so the first one seen in a bucket is its open
+                    bars[key] = {
+                        "ticker_symbol": ticker_symbol,
+                        "resolution": resolution,
+                        "bucket_start": key[2],
+                        "open_price": price,
+                        "high_price": price,
+                        "low_price": price,
+                        "close_price": price,
+                        "volume": volume,
+                        "sample_count": 1,
+                        "first_timestamp": epoch_ms,
+                        "last_timestamp": epoch_ms,
+                    }
+                else:
+                    bar["high_price"] = max(bar["high_price"], price)
+                    bar["low_price"] = min(bar["low_price"], price)
+                    bar["close_price"] = price
+                    bar["volume"] = volume
+                    bar["sample_count"] += 1
+                    bar["last_timestamp"] = epoch_ms
+        return list(bars.values())
+
+    def _merge_rollup_stmt(self):
+        # Build an upsert that merges partial bars into existing ones; SET expressions see the old row
+        rollup = self.rollup
+        insert_stmt = sqlite_insert(rollup)
+        incoming = insert_stmt.excluded
+        is_later = incoming.last_timestamp >= rollup.c.last_timestamp
+        return insert_stmt.on_conflict_do_update(
+            index_elements=[rollup.c.ticker_symbol, rollup.c.resolution, rollup.c.bucket_start],
+            set_={
+                "open_price": case((incoming.first_timestamp < rollup.c.first_timestamp, incoming.open_price), else_=rollup.c.open_price),
+                "high_price": func.max(rollup.c.high_price, incoming.high_price),
+                "low_price": func.min(rollup.c.low_price, incoming.low_price),
+                "close_price": case((is_later, incoming.close_price), else_=rollup.c.close_price),
+                "volume": case((is_later, incoming.volume), else_=rollup.c.volume),
+                "sample_count": rollup.c.sample_count + incoming.sample_count,
+                "first_timestamp": func.min(rollup.c.first_timestamp, incoming.first_timestamp),
+                "last_timestamp": func.max(rollup.c.last_timestamp, incoming.last_timestamp),
+            },
+        )
+
+    @retry_on_exception()
+    def apply_scrape_batch(self, stock_data_list):
+        # Merge a freshly stored scrape batch into the 15m, 1h and 1d bars
+        bars = self.aggregate_samples(
+            (stock["ticker_symbol"], to_epoch_ms(stock["timestamp"]), stock.get("price"), stock.get("volume"))
+            for stock in stock_data_list
+        )
+        if not bars:
+            return 0
+        session = self.Session()
+        try:
+            session.execute(self._merge_rollup_stmt(), bars)
+            session.commit()
+            logger.debug(f"Merged {len(stock_data_list)} scrape rows into {len(bars)} rollup bars.")
+            return len(bars)
+        except SQLAlchemyError as e:
+            logger.error(f"Error applying scrape batch to rollups: {e}")
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @retry_on_exception()
+    def backfill_rollups(self, start=None, end=None, prune=False):
+        # Rebuild rollups from raw scrape history one UTC day at a time; safe to re-run
+        # Only buckets the remaining raw rows cover are replaced, so bars whose raw rows retention removed survive
+        # prune=True replaces whole days, for callers that moved raw rows and left bars at their old buckets
+        session = self.Session()
+        try:
+            if start is None or end is None:
+                first, last = session.execute(
+                    select(func.min(self.scrape.c.timestamp), func.max(self.scrape.c.timestamp))
+                ).one()
+                if first is None:
+                    logger.info("No scrape history to roll up.")
+                    return 0
+                start = start or first
+                end = end or last
+            # Day windows keep every 15m, 1h and 1d bucket inside a single window
+            window_ms = to_epoch_ms(start) - to_epoch_ms(start) % DAY_MS
+            end_ms = to_epoch_ms(end)
+            total_bars = 0
+            # A conflict can only hit a first bucket kept below, which stays as it is
+            insert_stmt = sqlite_insert(self.rollup).on_conflict_do_nothing()
+            while window_ms <= end_ms:
+                window_end_ms = window_ms + DAY_MS
+                rows = session.execute(
+                    select(
+                        self.scrape.c.ticker_symbol,
+                        self.scrape.c.timestamp,
+                        self.scrape.c.price,
+                        self.scrape.c.volume,
+                    ).where(
+                        self.scrape.c.timestamp >= window_ms,
+                        self.scrape.c.timestamp < window_end_ms,
+                    )
+                ).fetchall()
+                samples = [(row.ticker_symbol, to_epoch_ms(row.timestamp), row.price, row.volume) for row in rows]
+                if not samples and not prune:
+                    # Nothing to rebuild from; the day's bars may be all that is left of it
+                    window_ms = window_end_ms
+                    continue
+                bars = self.aggregate_samples(samples)
+                window_bars = (self.rollup.c.bucket_start >= window_ms) & (self.rollup.c.bucket_start < window_end_ms)
+                if prune:
+                    session.execute(delete(self.rollup).where(window_bars))
+                else:
+                    first_ms = min(sample[1] for sample in samples)
+                    last_ms = max(sample[1] for sample in samples)
+                    for resolution, resolution_ms in ROLLUP_RESOLUTIONS.items():
+                        first_bucket = first_ms - first_ms % resolution_ms
+                        # The first bucket keeps its bar when that bar saw samples older than any raw row left
+                        session.execute(
+                            delete(self.rollup).where(
+                                window_bars,
+                                self.rollup.c.resolution == resolution,
+                                self.rollup.c.bucket_start >= first_bucket,
+                                self.rollup.c.bucket_start <= last_ms - last_ms % resolution_ms,
+                                (self.rollup.c.bucket_start > first_bucket) | (self.rollup.c.first_timestamp >= first_ms),
+                            )
+                        )
+                if bars:
+                    session.execute(insert_stmt, bars)
+                session.commit()
+                total_bars += len(bars)
+                logger.info(f"Backfilled {len(bars)} rollup bars from {len(rows)} scrapes for {from_epoch_ms(window_ms).date()}.")
+                window_ms = window_end_ms
+            return total_bars
+        except SQLAlchemyError as e:
+            logger.error(f"Error backfilling rollups: {e}")
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def pick_resolution(start_ms, end_ms, max_points=500):
+        # Pick the finest resolution whose bar count for the window stays within max_points
+        window_ms = max(end_ms - start_ms, 0)
+        for resolution, resolution_ms in ROLLUP_RESOLUTIONS.items():
+            if window_ms / resolution_ms <= max_points:
+                return resolution
+        return list(ROLLUP_RESOLUTIONS)[-1]
+
+    @retry_on_exception()
+    def get_rollup_bars(self, ticker_symbol, start=None, end=None, resolution=None, max_points=500):
+        # Retrieve OHLCV bars for a ticker, choosing a resolution that covers the window if none is given
+        end_ms = to_epoch_ms(end) if end is not None else to_epoch_ms(datetime.now(timezone.utc))
+        start_ms = to_epoch_ms(start) if start is not None else end_ms - 7 * DAY_MS
+        if resolution is None:
+            resolution = self.pick_resolution(start_ms, end_ms, max_points)
+        elif resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"Unknown resolution '{resolution}'")
+
+        session = self.Session()
+        try:
+            query = select(self.rollup).where(
+                self.rollup.c.ticker_symbol == ticker_symbol,
+                self.rollup.c.resolution == resolution,
+                self.rollup.c.bucket_start >= start_ms - start_ms % ROLLUP_RESOLUTIONS[resolution],
+                self.rollup.c.bucket_start <= end_ms,
+            ).order_by(self.rollup.c.bucket_start)
+            bars = [
+                {
+                    "ticker_symbol": row.ticker_symbol,
+                    "timestamp": from_epoch_ms(row.bucket_start),
+                    "open_price": row.open_price,
+                    "high_price": row.high_price,
+                    "low_price": row.low_price,
+                    "close_price": row.close_price,
+                    "volume": row.volume,
+                    "sample_count": row.sample_count,
+                }
+                for row in session.execute(query)
+            ]
+            return {"resolution": resolution, "bars": bars}
+        except SQLAlchemyError as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
+            logger.error(f"Error retrieving rollup bars for '{ticker_symbol}': {e}")
+            return {"resolution": resolution, "bars": []}
+        finally:
+            session.close()
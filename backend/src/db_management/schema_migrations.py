@@ -0,0 +1,198 @@
+# db_management/schema_migrations.py
+from sqlalchemy import inspect, text, select, Table, Column, String, Integer
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .time_keys import now_epoch_ms
+import time
+import logging
+logger = logging.getLogger(__name__)
+
+# SQL expression turning a SQLite datetime string into epoch milliseconds, dropping sub-millisecond digits like time_keys.to_epoch_ms
+# Whole seconds come from strftime and the milliseconds straight from the text; julianday rounds and picks up float error
+EPOCH_MS_SQL = "CAST(strftime('%s', substr({column}, 1, 19)) AS INTEGER) * 1000 + CAST(substr({column} || '000', 21, 3) AS INTEGER)"
+
+
+class SchemaMigrator:
+    def __init__(self, engine, metadata):
+        # Initialize with the engine and metadata of the database whose existing tables may need reshaping
+        self.engine = engine
+        self.metadata = metadata
+        # Record of completed data migrations, so long conversions are not rescanned on every start
+        self.applied = Table(
+            "_schema_migrations",
+            metadata,
+            Column("name", String, primary_key=True),
+            Column("applied_at", Integer, nullable=False),  # Epoch milliseconds (UTC)
+            extend_existing=True,
+        )
+        self.applied.create(bind=self.engine, checkfirst=True)
+        # Resume points of chunked data migrations, saved in the same transaction as each chunk
+        self.progress = Table(
+            "_schema_migration_progress",
+            metadata,
+            Column("name", String, primary_key=True),
+            Column("last_rowid", Integer, nullable=False),
+            Column("updated_at", Integer, nullable=False),  # Epoch milliseconds (UTC)
+            extend_existing=True,
+        )
+        self.progress.create(bind=self.engine, checkfirst=True)
+
+    def is_applied(self, name):
+        # Check whether a named data migration has already completed on this database
+        with self.engine.connect() as conn:
+            return conn.execute(self.applied.select().where(self.applied.c.name == name)).first() is not None
+
+    def mark_applied(self, name):
+        # Record a named data migration as completed
+        with self.engine.begin() as conn:
+            conn.execute(self.applied.insert().prefix_with("OR IGNORE"), {"name": name, "applied_at": now_epoch_ms()})
+
+    def load_progress(self, name):
+        # Return the last rowid a chunked migration completed, or 0 if it has not started
+        with self.engine.connect() as conn:
+            last_rowid = conn.execute(select(self.progress.c.last_rowid).where(self.progress.c.name == name)).scalar()
+        return last_rowid or 0
+
+    def save_progress(self, conn, name, last_rowid):
+        # Record a chunk as done inside the caller's transaction, so a restart resumes after it
+        conn.execute(
+            sqlite_insert(self.progress)
+            .values(name=name, last_rowid=last_rowid, updated_at=now_epoch_ms())
+            .on_conflict_do_update(index_elements=["name"], set_={"last_rowid": last_rowid, "updated_at": now_epoch_ms()})
+        )
+
+    def has_column(self, table_name, column_name):
+        # Check whether an existing table has a column its declared schema may no longer list
+        return column_name in self._column_names(table_name)
+
+    def _column_names(self, table_name):
+        # Return the column names an existing table currently has, or an empty set if it does not exist
+        inspector = inspect(self.engine)
+        if not inspector.has_table(table_name):
+            return set()
+        return {column["name"] for column in inspector.get_columns(table_name)}
+
+    def ensure_indexes(self):
+        # create_all skips tables that already exist, so add indexes defined since a table was first created
+        inspector = inspect(self.engine)
+        existing = {
+            index["name"]
+            for table_name in inspector.get_table_names()
+            for index in inspector.get_indexes(table_name)
+        }
+        created = []
+        for table in self.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(bind=self.engine, checkfirst=True)
+                    created.append(index.name)
+        if created:
+            logger.info(f"Created missing indexes: {', '.join(created)}")
+        return created
+
+    def add_missing_columns(self, table):
+        # create_all skips tables that already exist, so add nullable columns defined since a table was first created
+        existing = self._column_names(table.name)
+        missing = [column for column in table.columns if existing and column.name not in existing]
+        if not missing:
+            return []
+        with self.engine.begin() as conn:
+            for column in missing:
+                column_type = column.type.compile(dialect=self.engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+        added = [column.name for column in missing]
+        logger.info(f"Added missing columns to {table.name}: {', '.join(added)}")
+        return added
+
+    def migrate_scrape_dimensions(self, stocks_scrape, chunk_size=5000, pause_seconds=0.0):
+        # Move legacy company_name and industry strings in stocks_scrape into the dimension tables
+        # Runs as a background job in short rowid-range transactions; startup only adds the id columns (see add_missing_columns)
+        # The rows keep their table, rowids and indexes, so there is no copy to swap in and no index to rebuild
+        migration_name = f"scrape_dimensions:{stocks_scrape.name}"
+        if self.is_applied(migration_name):
+            return 0
+        if not self.has_column(stocks_scrape.name, "company_name"):
+            # Created with the dimension ids from the start
+            self.mark_applied(migration_name)
+            return 0
+
+        start_time = time.perf_counter()
+        with self.engine.connect() as conn:
+            # Rows written after this point already carry ids; the managers never write the legacy strings
+            max_rowid = conn.execute(text(f"SELECT max(rowid) FROM {stocks_scrape.name}")).scalar() or 0
+        low = self.load_progress(migration_name)
+        if low:
+            logger.info(f"Resuming the stocks_scrape dimension migration after rowid {low} of {max_rowid}.")
+        chunk_filter = "rowid > :low AND rowid <= :high"
+        fill_industries = text(
+            "INSERT OR IGNORE INTO scrape_industries (industry) "
+            f"SELECT DISTINCT industry FROM {stocks_scrape.name} WHERE {chunk_filter} AND industry IS NOT NULL"
+        )
+        fill_tickers = text(
+            "INSERT OR IGNORE INTO scrape_tickers (ticker_symbol, company_name) "
+            f"SELECT DISTINCT ticker_symbol, company_name FROM {stocks_scrape.name} WHERE {chunk_filter} AND company_name IS NOT NULL"
+        )
+        # Ids come from the dimensions' unique indexes; clearing the strings frees their space for reuse
+        convert_stmt = text(
+            f"UPDATE {stocks_scrape.name} SET "
+            "ticker_id = COALESCE(ticker_id, (SELECT t.ticker_id FROM scrape_tickers t "
+            f"WHERE t.ticker_symbol = {stocks_scrape.name}.ticker_symbol AND t.company_name = {stocks_scrape.name}.company_name)), "
+            "industry_id = COALESCE(industry_id, (SELECT i.industry_id FROM scrape_industries i "
+            f"WHERE i.industry = {stocks_scrape.name}.industry)), "
+            "company_name = NULL, industry = NULL "
+            f"WHERE {chunk_filter} AND (company_name IS NOT NULL OR industry IS NOT NULL)"
+        )
+
+        converted = 0
+        for step, chunk_low in enumerate(range(low, max_rowid, chunk_size), start=1):
+            chunk = {"low": chunk_low, "high": chunk_low + chunk_size}
+            with self.engine.begin() as conn:
+                conn.execute(fill_industries, chunk)
+                conn.execute(fill_tickers, chunk)
+                converted += max(conn.execute(convert_stmt, chunk).rowcount, 0)
+                self.save_progress(conn, migration_name, chunk["high"])
+            if step % 200 == 0:
+                logger.info(f"Moved names to dimension ids for {converted} stocks_scrape rows ({chunk['high']}/{max_rowid} rowids).")
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+        self.mark_applied(migration_name)
+        logger.info(
+            f"Migrated {converted} stocks_scrape rows to dimension ids in {time.perf_counter() - start_time:.2f}s; "
+            "the emptied company_name and industry columns stay in place."
+        )
+        return converted
+
+    def convert_text_times_to_epoch_ms(self, table, column_names, chunk_size=5000, pause_seconds=0.0):
+        # Rewrite legacy text datetimes as integer epoch milliseconds, one short rowid-range transaction at a time
+        migration_name = f"epoch_ms:{table.name}:{','.join(column_names)}"
+        if self.is_applied(migration_name):
+            return 0
+
+        start_time = time.perf_counter()
+        with self.engine.connect() as conn:
+            # Rows inserted after this point are written as integers by the managers
+            max_rowid = conn.execute(text(f"SELECT max(rowid) FROM {table.name}")).scalar() or 0
+        set_clause = ", ".join(
+            f"{column} = CASE WHEN typeof({column}) = 'text' THEN {EPOCH_MS_SQL.format(column=column)} ELSE {column} END"
+            for column in column_names
+        )
+        text_filter = " OR ".join(f"typeof({column}) = 'text'" for column in column_names)
+        # If a converted legacy row collides with an integer row written since the upgrade, OR REPLACE deletes the integer
+        # row and keeps the converted one; both describe the same scrape, so either may stand
+        convert_stmt = text(
+            f"UPDATE OR REPLACE {table.name} SET {set_clause} "
+            f"WHERE rowid > :low AND rowid <= :high AND ({text_filter})"
+        )
+
+        converted = 0
+        for step, low in enumerate(range(0, max_rowid, chunk_size), start=1):
+            with self.engine.begin() as conn:
+                converted += max(conn.execute(convert_stmt, {"low": low, "high": low + chunk_size}).rowcount, 0)
+            if step % 200 == 0:
+                logger.info(f"Converted {converted} {table.name} rows to epoch milliseconds ({low + chunk_size}/{max_rowid} rowids).")
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+        self.mark_applied(migration_name)
+        logger.info(f"Converted {converted} {table.name} rows to epoch milliseconds in {time.perf_counter() - start_time:.2f}s.")
+        return converted
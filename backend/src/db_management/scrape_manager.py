@@ -1,41 +1,150 @@
 # db_management/scrape_manager.py
-from sqlalchemy import select, insert, update, delete, func
+from sqlalchemy import select, insert, update, delete, func, bindparam, literal, literal_column, case, Integer
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timezone
+from .time_keys import to_epoch_ms, from_epoch_ms, as_utc_datetime, now_epoch_ms
+from .core_access import CoreReader
+from .list_query import ListQuery
+from .schema_migrations import EPOCH_MS_SQL
 import time
+from .resilience import retry_on_exception, raise_if_retryable
 import logging 
 logger = logging.getLogger(__name__)
 
-def retry_on_exception(max_retries=3, delay=1):
-    # Decorator to retry a function call if it raises an exception
-    def decorator(func):
-        # Wrapper function that will replace the original function
-        def wrapper(*args, **kwargs):
-            # Attempt to call the function up to max_retries times
-            for attempt in range(max_retries):
-                try:
-                    # Call the original function and return its result
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    # If an exception occurs and it's not the last attempt
-                    if attempt < max_retries - 1:
-                        # Log a warning and wait before retrying
-                        logger.warning(f"Retrying {func.__name__} due to error: {e}")
-                        time.sleep(delay)
-                    else:
-                        # Log an error if max retries are exceeded and raise the exception
-                        logger.error(f"Max retries exceeded for {func.__name__}: {e}")
-                        raise
-        return wrapper
-    return decorator
 
 class ScrapeManager:
-    def __init__(self, session, ticker_scrape_session, scrape_table, ticker_scrape_table):
+    def __init__(self, session, ticker_scrape_session, scrape_table, ticker_scrape_table, scrape_latest_table, scrape_tickers_table, scrape_industries_table, read_session=None, legacy_names=False):
         # Initialize session and table reference for managing scrapes
         self.Session = session
         self.TickerScrapeSession = ticker_scrape_session
+        # Latest-snapshot and ticker stats reads go to the read snapshot when one is configured
+        self.ReadSession = read_session or session
+        self.TickerScrapeReadSession = read_session or ticker_scrape_session
+        # Cached statements on pooled Core connections for hot reads
+        self.reader = CoreReader.for_session(session)
+        self.latest_reader = CoreReader.for_session(self.ReadSession)
+        self.ticker_scrape_reader = CoreReader.for_session(self.TickerScrapeReadSession)
         self.scrape = scrape_table
         self.ticker_scrape = ticker_scrape_table
+        self.scrape_latest = scrape_latest_table
+        self.scrape_tickers = scrape_tickers_table
+        self.scrape_industries = scrape_industries_table
+        # True while stocks_scrape still has its pre-dimension company_name and industry columns
+        self.legacy_names = legacy_names
+        # Dimension ids seen in committed batches, so steady-state scrapes skip the lookups
+        self._ticker_ids = {}
+        self._industry_ids = {}
+
+    def _dimension_ids(self, session, table, id_column, key_columns, keys, cache):
+        # Map dimension keys to integer ids, inserting keys that are not stored yet
+        resolved = {key: cache[key] for key in keys if key in cache}
+        missing = [key for key in keys if key not in resolved]
+        if missing:
+            session.execute(sqlite_insert(table).on_conflict_do_nothing(), [dict(zip(key_columns, key)) for key in missing])
+            lookup_column = table.c[key_columns[0]]
+            # Look ids up in chunks to stay well under SQLite's bound parameter limit
+            for start in range(0, len(missing), 500):
+                chunk_values = {key[0] for key in missing[start:start + 500]}
+                rows = session.execute(
+                    select(table.c[id_column], *(table.c[name] for name in key_columns)).where(lookup_column.in_(chunk_values))
+                )
+                for row in rows:
+                    resolved[tuple(row[1:])] = row[0]
+        return resolved
+
+    def _history_rows(self, session, stock_data_list):
+        # Replace company_name and industry with dimension ids for rows written to stocks_scrape
+        ticker_ids = self._dimension_ids(
+            session, self.scrape_tickers, "ticker_id", ("ticker_symbol", "company_name"),
+            {(stock["ticker_symbol"], stock["company_name"]) for stock in stock_data_list if stock.get("company_name") is not None},
+            self._ticker_ids,
+        )
+        industry_ids = self._dimension_ids(
+            session, self.scrape_industries, "industry_id", ("industry",),
+            {(stock["industry"],) for stock in stock_data_list if stock.get("industry") is not None},
+            self._industry_ids,
+        )
+        history_rows = [
+            {
+                "ticker_symbol": stock["ticker_symbol"],
+                "ticker_id": ticker_ids.get((stock["ticker_symbol"], stock.get("company_name"))),
+                "price": stock.get("price"),
+                "change": stock.get("change"),
+                "industry_id": industry_ids.get((stock.get("industry"),)),
+                "volume": stock.get("volume"),
+                "pe_ratio": stock.get("pe_ratio"),
+                "timestamp": to_epoch_ms(stock["timestamp"]),
+            }
+            for stock in stock_data_list
+        ]
+        return history_rows, ticker_ids, industry_ids
+
+    @staticmethod
+    def _latest_rows(stock_data_list, ingested_at):
+        # Copy scrape rows for the latest-snapshot table with integer epoch millisecond timestamps and the batch's ingest stamp
+        return [dict(stock, timestamp=to_epoch_ms(stock["timestamp"]), ingested_at=ingested_at) for stock in stock_data_list]
+
+    def _next_ingest_stamp(self, session):
+        # The current time, but always after every stamp already handed out, so cursors never skip a batch
+        # Callers take it after their first write, when SQLite's write lock keeps other batches from sharing it
+        last_stamp = session.execute(select(func.max(self.scrape_latest.c.ingested_at))).scalar()
+        return max(now_epoch_ms(), (last_stamp or 0) + 1)
+
+    def _dimension_values(self, session, ticker_symbol, values):
+        # Turn company_name and industry keyword updates into ticker_id and industry_id values
+        values = dict(values)
+        if "company_name" in values:
+            company_name = values.pop("company_name")
+            ticker_ids = self._dimension_ids(
+                session, self.scrape_tickers, "ticker_id", ("ticker_symbol", "company_name"),
+                {(ticker_symbol, company_name)} if company_name is not None else set(), self._ticker_ids,
+            )
+            values["ticker_id"] = ticker_ids.get((ticker_symbol, company_name))
+        if "industry" in values:
+            industry = values.pop("industry")
+            industry_ids = self._dimension_ids(
+                session, self.scrape_industries, "industry_id", ("industry",),
+                {(industry,)} if industry is not None else set(), self._industry_ids,
+            )
+            values["industry_id"] = industry_ids.get((industry,))
+        return values
+
+    def _history_with_names(self, timestamp=None):
+        # Select scrape history with company_name and industry joined back from the dimension tables
+        company_name = self.scrape_tickers.c.company_name
+        industry = self.scrape_industries.c.industry
+        if self.legacy_names:
+            # Rows the background dimension migration has not reached yet still carry their names inline
+            company_name = func.coalesce(company_name, literal_column(f"{self.scrape.name}.company_name"))
+            industry = func.coalesce(industry, literal_column(f"{self.scrape.name}.industry"))
+        return select(
+            self.scrape.c.ticker_symbol,
+            company_name.label("company_name"),
+            self.scrape.c.price,
+            self.scrape.c.change,
+            industry.label("industry"),
+            self.scrape.c.volume,
+            self.scrape.c.pe_ratio,
+            (timestamp if timestamp is not None else self.scrape.c.timestamp).label("timestamp"),
+        ).select_from(
+            self.scrape
+            .outerjoin(self.scrape_tickers, self.scrape.c.ticker_id == self.scrape_tickers.c.ticker_id)
+            .outerjoin(self.scrape_industries, self.scrape.c.industry_id == self.scrape_industries.c.industry_id)
+        )
+
+    def _upsert_latest_stmt(self):
+        # Build an upsert that only replaces a ticker's latest row with a newer or equal timestamp
+        insert_stmt = sqlite_insert(self.scrape_latest)
+        return insert_stmt.on_conflict_do_update(
+            index_elements=[self.scrape_latest.c.ticker_symbol],
+            set_={
+                column.name: insert_stmt.excluded[column.name]
+                for column in self.scrape_latest.columns
+                if column.name != 'ticker_symbol'
+            },
+            where=insert_stmt.excluded.timestamp >= self.scrape_latest.c.timestamp,
+        )
 
     @retry_on_exception()
     def create_scrape_batch(self, stock_data_list):
@@ -45,10 +154,17 @@ class ScrapeManager:
             # Prepare an insert statement for the scrape table
             # `stock_data_list` is a list of dictionaries, where each dictionary represents a record
             insert_stmt = insert(self.scrape)
+            # Store company_name and industry as dimension ids in the history table
+            history_rows, ticker_ids, industry_ids = self._history_rows(session, stock_data_list)
             # Execute the insert statement with batch data, inserting all records at once
-            session.execute(insert_stmt, stock_data_list)
+            session.execute(insert_stmt, history_rows)
+            # Keep the latest-snapshot table in step within the same transaction
+            session.execute(self._upsert_latest_stmt(), self._latest_rows(stock_data_list, self._next_ingest_stamp(session)))
             # Commit the transaction to save changes in the database
             session.commit()
+            # Only cache ids once the dimension rows they point to are committed
+            self._ticker_ids.update(ticker_ids)
+            self._industry_ids.update(industry_ids)
             logger.debug(f"Batch insert of {len(stock_data_list)} records completed successfully.")
         except Exception as e:
             # Rollback the transaction if an error occurs to maintain data integrity
@@ -65,22 +181,28 @@ class ScrapeManager:
         session = self.Session() # Open a new session for database interaction
         try:
             # Prepare an insert statement with specified values for the new scrape record
-            insert_stmt = self.scrape.insert().values(
-                ticker_symbol=ticker_symbol,
-                company_name=company_name,
-                price=price,
-                change=change,
-                industry=industry,
-                volume=volume if volume is not None else 0.0,
-                pe_ratio=pe_ratio if pe_ratio is not None else 0.0,
-                timestamp=timestamp or datetime.now(timezone.utc)
-            )
+            scrape_row = {
+                "ticker_symbol": ticker_symbol,
+                "company_name": company_name,
+                "price": price,
+                "change": change,
+                "industry": industry,
+                "volume": volume if volume is not None else 0.0,
+                "pe_ratio": pe_ratio if pe_ratio is not None else 0.0,
+                "timestamp": timestamp or datetime.now(timezone.utc),
+            }
+            history_rows, _, _ = self._history_rows(session, [scrape_row])
+            insert_stmt = self.scrape.insert().values(**history_rows[0])
             # Execute the insert statement to add the new record
             session.execute(insert_stmt)
+            # Keep the latest-snapshot table in step within the same transaction
+            session.execute(self._upsert_latest_stmt(), self._latest_rows([scrape_row], self._next_ingest_stamp(session)))
             # Commit the transaction to save the changes in the database
             session.commit()
             logger.debug(f"Scrape for {ticker_symbol} at {timestamp} created successfully.")
         except SQLAlchemyError as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Rollback the transaction in case of an error to maintain data integrity
             logger.error(f"Error creating scrape: {e}")
             session.rollback()
@@ -93,19 +215,23 @@ class ScrapeManager:
         # Retrieve all scrape records from the scrape table
         session = self.Session()# Open a new session for database interaction
         try:
-            # Prepare a select statement to fetch all records from the scrape table
-            select_stmt = select(self.scrape)
+            # Prepare a select statement to fetch all records from the scrape table with their names
+            select_stmt = self._history_with_names()
             # Execute the select statement and fetch all results
             result = session.execute(select_stmt)
             scrapes = result.fetchall() # Fetch all records
             # Get column names for the scrape table to format each record as a dictionary
-            column_names = [column.name for column in self.scrape.columns]
+            column_names = [column.name for column in select_stmt.selected_columns]
             scrapes_list = [dict(zip(column_names, row)) for row in scrapes] # Convert each row to a dictionary
+            for scrape in scrapes_list:
+                scrape["timestamp"] = as_utc_datetime(scrape["timestamp"])
             # Log the number of records retrieved
             logger.debug(f"Retrieved {len(scrapes_list)} scrapes.")
             # Return the list of scrape records as dictionaries
             return scrapes_list
         except SQLAlchemyError as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Log error if retrieval fails and return an empty list
             logger.error(f"Error retrieving scrapes: {e}")
             return []
@@ -119,15 +245,16 @@ class ScrapeManager:
         session = self.Session()# Open a new session for database interaction
         try:
             # Prepare a select statement with conditions to match the specified ticker symbol and timestamp
-            select_stmt = select(self.scrape).where(
+            select_stmt = self._history_with_names().where(
                 self.scrape.c.ticker_symbol == ticker_symbol,
-                self.scrape.c.timestamp == timestamp
+                self.scrape.c.timestamp == to_epoch_ms(timestamp)
             )
             # Execute the select statement and fetch a single result
             result = session.execute(select_stmt).fetchone()
             # If a record is found, convert it to a dictionary with column names as keys
             if result:
-                scrape = dict(zip([column.name for column in self.scrape.columns], result))
+                scrape = dict(zip([column.name for column in select_stmt.selected_columns], result))
+                scrape["timestamp"] = as_utc_datetime(scrape["timestamp"])
                 logger.debug(f"Scrape for {ticker_symbol} at {timestamp} retrieved successfully.")
                 return scrape # Return the scrape record as a dictionary
             else:
@@ -135,6 +262,8 @@ class ScrapeManager:
                 logger.debug("Scrape not found.")
                 return None
         except SQLAlchemyError as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Log any error that occurs during retrieval
             logger.error(f"Error retrieving scrape: {e}")
             return None
@@ -148,11 +277,11 @@ class ScrapeManager:
         session = self.Session() # Open a new session for database interaction
         try:
             # Prepare an update statement with conditions to match the specified ticker symbol and timestamp
-            # `kwargs` contains the new values to update
+            # `kwargs` contains the new values to update; names are stored as dimension ids
             update_stmt = update(self.scrape).where(
                 self.scrape.c.ticker_symbol == ticker_symbol,
-                self.scrape.c.timestamp == timestamp
-            ).values(**kwargs)
+                self.scrape.c.timestamp == to_epoch_ms(timestamp)
+            ).values(**self._dimension_values(session, ticker_symbol, kwargs))
             # Execute the update statement
             result = session.execute(update_stmt)
             # Commit the transaction to save the changes in the database
@@ -166,6 +295,8 @@ class ScrapeManager:
                 logger.debug("Scrape not found for update.")
                 return False # Return False to indicate that no record was updated
         except SQLAlchemyError as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Rollback the transaction in case of an error to maintain data integrity
             logger.error(f"Error updating scrape: {e}")
             session.rollback()
@@ -182,7 +313,7 @@ class ScrapeManager:
             # Prepare a delete statement with conditions to match the specified ticker symbol and timestamp
             delete_stmt = delete(self.scrape).where(
                 self.scrape.c.ticker_symbol == ticker_symbol,
-                self.scrape.c.timestamp == timestamp
+                self.scrape.c.timestamp == to_epoch_ms(timestamp)
             )
             # Execute the delete statement
             result = session.execute(delete_stmt)
@@ -197,6 +328,8 @@ class ScrapeManager:
                 logger.debug("Scrape not found for deletion.")
                 return False # Return False to indicate that no record was deleted
         except SQLAlchemyError as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Rollback the transaction in case of an error to maintain data integrity
             logger.error(f"Error deleting scrape: {e}")
             session.rollback()
@@ -212,7 +345,7 @@ class ScrapeManager:
             # Select existing scrape
             select_stmt = select(self.scrape).where(
                 self.scrape.c.ticker_symbol == ticker_symbol,
-                self.scrape.c.timestamp == timestamp
+                self.scrape.c.timestamp == to_epoch_ms(timestamp)
             )
             existing_row = session.execute(select_stmt).fetchone()
             if not existing_row:
@@ -224,11 +357,11 @@ class ScrapeManager:
             # Delete existing scrape
             delete_stmt = delete(self.scrape).where(
                 self.scrape.c.ticker_symbol == ticker_symbol,
-                self.scrape.c.timestamp == timestamp
+                self.scrape.c.timestamp == to_epoch_ms(timestamp)
             )
             session.execute(delete_stmt)
-            row_data['timestamp'] = new_timestamp
-            row_data.update(kwargs)
+            row_data['timestamp'] = to_epoch_ms(new_timestamp)
+            row_data.update(self._dimension_values(session, ticker_symbol, kwargs))
             # Insert new scrape with new timestamp
             insert_stmt = insert(self.scrape).values(row_data)
             session.execute(insert_stmt)
@@ -236,128 +369,318 @@ class ScrapeManager:
             logger.info(f"Scrape for {ticker_symbol} at {timestamp} replaced with {new_timestamp}.")
             return True
         except SQLAlchemyError as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             logger.error(f"Error replacing scrape: {e}")
             session.rollback()
             return False
         finally:
             session.close()
 
+    def _shift_window(self, session, offset_ms, cursor, before_ms, chunk_size):
+        # Pick the next [low, high) timestamp window of about chunk_size rows, walking away from where rows move to.
+        # Capping the width at the offset keeps shifted rows out of the window and out of every window still to come.
+        timestamp = self.scrape.c.timestamp
+        if offset_ms > 0:
+            boundary = session.execute(
+                select(timestamp).where(timestamp < cursor).order_by(timestamp.desc()).limit(1).offset(chunk_size - 1)
+            ).scalar()
+            if boundary is None:
+                boundary = session.execute(select(func.min(timestamp)).where(timestamp < cursor)).scalar()
+                if boundary is None:
+                    return None
+            return max(boundary, cursor - offset_ms), cursor
+        if cursor >= before_ms:
+            return None
+        boundary = session.execute(
+            select(timestamp).where(timestamp >= cursor, timestamp < before_ms).order_by(timestamp).limit(1).offset(chunk_size)
+        ).scalar()
+        high = min(boundary if boundary is not None else before_ms, cursor - offset_ms, before_ms)
+        return cursor, max(high, cursor + 1)
+
+    def shift_scrape_timestamps(self, offset_ms, before=None, chunk_size=5000, dry_run=False, pause_seconds=0.0):
+        # Move every stocks_scrape row older than `before` by offset_ms with set-based UPDATEs, one transaction per window
+        timestamp = self.scrape.c.timestamp
+        session = self.Session()
+        try:
+            if before is None:
+                latest = session.execute(select(func.max(timestamp))).scalar()
+                before_ms = latest + 1 if latest is not None else 0
+            else:
+                before_ms = to_epoch_ms(before)
+            pending = session.execute(select(func.count()).where(timestamp < before_ms)).scalar()
+            earliest = session.execute(select(func.min(timestamp)).where(timestamp < before_ms)).scalar()
+        finally:
+            session.close()
+
+        summary = {
+            "rows": pending, "shifted": 0, "skipped": 0, "chunks": 0,
+            "before": before_ms, "earliest": earliest, "dry_run": dry_run,
+        }
+        if dry_run or not pending or not offset_ms:
+            logger.info(f"{pending} stocks_scrape rows before {from_epoch_ms(before_ms)} would shift by {offset_ms} ms.")
+            return summary
+
+        # OR IGNORE leaves a row in place if another row already holds its shifted key; those are reported as skipped
+        shift_stmt = (
+            update(self.scrape)
+            .prefix_with("OR IGNORE")
+            .where(timestamp >= bindparam("low"), timestamp < bindparam("high"))
+            .values(timestamp=timestamp + offset_ms)
+        )
+        count_stmt = select(func.count()).where(timestamp >= bindparam("low"), timestamp < bindparam("high"))
+        start_time = time.perf_counter()
+        cursor = before_ms if offset_ms > 0 else earliest
+        while True:
+            session = self.Session()
+            try:
+                window = self._shift_window(session, offset_ms, cursor, before_ms, chunk_size)
+                if window is None:
+                    break
+                params = {"low": window[0], "high": window[1]}
+                in_window = session.execute(count_stmt, params).scalar()
+                shifted = max(session.execute(shift_stmt, params).rowcount, 0)
+                session.commit()
+            except SQLAlchemyError as e:
+                session.rollback()
+                # The cursor is the boundary of the last committed window; pass it back as `before` to resume
+                logger.error(f"Error shifting scrape timestamps at {from_epoch_ms(cursor)} after {summary['shifted']} rows: {e}")
+                raise
+            finally:
+                session.close()
+
+            cursor = window[0] if offset_ms > 0 else window[1]
+            summary["shifted"] += shifted
+            summary["skipped"] += in_window - shifted
+            summary["chunks"] += 1
+            if summary["chunks"] % 50 == 0:
+                elapsed = time.perf_counter() - start_time
+                logger.info(
+                    f"Shifted {summary['shifted']}/{pending} stocks_scrape rows "
+                    f"({summary['shifted'] / elapsed:,.0f} rows/s), cursor {from_epoch_ms(cursor)}."
+                )
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+        summary["seconds"] = round(time.perf_counter() - start_time, 3)
+        logger.info(
+            f"Shifted {summary['shifted']} stocks_scrape rows by {offset_ms} ms in {summary['chunks']} chunks "
+            f"({summary['seconds']}s); {summary['skipped']} rows skipped on key conflicts."
+        )
+        return summary
+
     @retry_on_exception()
     def get_stock_scrape_data_by_ticker(self, ticker_symbol):
         # Retrieve all stock scrape data for a specific ticker symbol from the stocks_scrape table
-        session = self.Session()  # Open a new session for database interaction
         try:
-            # Prepare a select query to fetch records for the specified ticker symbol
-            query = select(
-                self.scrape.c.ticker_symbol,
-                self.scrape.c.company_name,
-                self.scrape.c.price,
-                self.scrape.c.change,
-                self.scrape.c.industry,
-                self.scrape.c.volume,
-                self.scrape.c.pe_ratio,
-                self.scrape.c.timestamp,
-            ).where(self.scrape.c.ticker_symbol == ticker_symbol)
-            # Execute the query to retrieve the stock scrape data for the given ticker symbol
-            result = session.execute(query)
-            # Convert each row of the result into a dictionary and store it in a list
-            stocks_scrape_data = [
-                {
-                    "ticker_symbol": row.ticker_symbol,
-                    "company_name": row.company_name,
-                    "price": row.price,
-                    "change": row.change,
-                    "industry": row.industry,
-                    "volume": row.volume,
-                    "pe_ratio": row.pe_ratio,
-                    "timestamp": row.timestamp,
-                }
-                for row in result
-            ]
+            # Execute the cached query for the ticker; timestamps are stored as epoch milliseconds
+            stocks_scrape_data = self.reader.fetch_all(
+                "stocks_scrape.get_stock_scrape_data_by_ticker",
+                lambda: self._history_with_names().where(self.scrape.c.ticker_symbol == bindparam("ticker_symbol")),
+                ticker_symbol=ticker_symbol,
+            )
+            for scrape in stocks_scrape_data:
+                scrape["timestamp"] = as_utc_datetime(scrape["timestamp"])
             # Return the list of dictionaries containing stock scrape data for the specified ticker
             return stocks_scrape_data
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Print an error message and return an empty list if an error occurs
             logger.error(f"Error retrieving stock scrape data for '{ticker_symbol}': {e}")
             return []
-        finally:
-            # Close the session to free resources
-            session.close()
+
+    def _latest_select(self):
+        # Columns the API serves from the latest-snapshot table
+        return select(
+            self.scrape_latest.c.ticker_symbol,
+            self.scrape_latest.c.company_name,
+            self.scrape_latest.c.price,
+            self.scrape_latest.c.change,
+            self.scrape_latest.c.industry,
+            self.scrape_latest.c.volume,
+            self.scrape_latest.c.pe_ratio,
+            self.scrape_latest.c.timestamp,
+        )
+
+    def recent_stock_scrapes_select(self):
+        # Columns the stock scrapes endpoint serves; list queries project and sort within these
+        return self._latest_select()
 
     @retry_on_exception()
-    def get_recent_stock_scrapes(self):
-        # Retrieve the most recent stock scrape data for each ticker symbol
-        session = self.Session()
+    def get_recent_stock_scrapes(self, list_query=None):
+        # Retrieve the most recent stock scrape data for each ticker symbol from the latest-snapshot table
+        # A ListQuery pushes the requested columns, order and page window down into SQL
         try:
-            # Define a subquery to get the latest timestamp for each ticker symbol
-            subquery = (
-                select(
-                    self.scrape.c.ticker_symbol,
-                    func.max(self.scrape.c.timestamp).label("max_timestamp"),
+            if list_query is None or list_query.is_default:
+                stocks_data = self.latest_reader.fetch_all("stocks_scrape_latest.get_recent_stock_scrapes", self._latest_select)
+            else:
+                stocks_data = self.latest_reader.fetch_all(
+                    list_query.cache_name("stocks_scrape_latest.get_recent_stock_scrapes"),
+                    lambda: list_query.statement(self._latest_select(), [self.scrape_latest.c.ticker_symbol]),
+                    **list_query.parameters(),
                 )
-                .group_by(self.scrape.c.ticker_symbol)
-                .subquery()
-            )
-            # Define the main query to get stock scrape data with the most recent timestamp for each ticker
-            query = select(
-                self.scrape.c.ticker_symbol,
-                self.scrape.c.company_name,
-                self.scrape.c.price,
-                self.scrape.c.change,
-                self.scrape.c.industry,
-                self.scrape.c.volume,
-                self.scrape.c.pe_ratio,
-                self.scrape.c.timestamp,
-                subquery.c.max_timestamp,
-            ).join(
-                subquery,
-                (self.scrape.c.ticker_symbol == subquery.c.ticker_symbol)
-                & (self.scrape.c.timestamp == subquery.c.max_timestamp),
-            )
-            # Execute the query to retrieve the latest stock scrape data for each ticker
-            result = session.execute(query)
-            # Convert each row of result into a dictionary and store it in a list
-            stocks_data = [
-                {
-                    "ticker_symbol": row.ticker_symbol,
-                    "company_name": row.company_name,
-                    "price": row.price,
-                    "change": row.change,
-                    "industry": row.industry,
-                    "volume": row.volume,
-                    "pe_ratio": row.pe_ratio,
-                    "timestamp": row.timestamp,
-                }
-                for row in result
-            ]
+            for stock in stocks_data:
+                if "timestamp" in stock:
+                    stock["timestamp"] = as_utc_datetime(stock["timestamp"])
             return stocks_data
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             logger.error(f"Error retrieving recent stock scrape data: {e}")
             return []
+
+    @retry_on_exception()
+    def count_recent_stock_scrapes(self):
+        # Number of tickers in the latest-snapshot table, for paged responses; None on error
+        try:
+            return self.latest_reader.fetch_scalar(
+                "stocks_scrape_latest.count_recent_stock_scrapes",
+                lambda: ListQuery.count_statement(self._latest_select()),
+            )
+        except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
+            logger.error(f"Error counting recent stock scrapes: {e}")
+            return None
+
+    def _last_ingest_stamp(self):
+        # Newest ingest stamp in the latest-snapshot table, read from the end of its index; 0 when empty
+        return self.latest_reader.fetch_scalar(
+            "stocks_scrape_latest.last_ingest_stamp",
+            lambda: select(func.max(self.scrape_latest.c.ingested_at)),
+        ) or 0
+
+    @retry_on_exception()
+    def get_last_ingest_stamp(self):
+        # The cursor a client holding the current latest rows would send next; None on error
+        try:
+            return self._last_ingest_stamp()
+        except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
+            logger.error(f"Error retrieving the last scrape ingest stamp: {e}")
+            return None
+
+    @retry_on_exception()
+    def get_stock_scrapes_since(self, cursor):
+        # Latest rows changed after an ingest cursor, plus the cursor to send next time; None on error
+        # A cursor of 0, or one newer than anything stored (e.g. after a database reset), returns the full table
+        try:
+            last_stamp = self._last_ingest_stamp()
+            full = cursor <= 0 or cursor > last_stamp
+            if full:
+                stocks_data = self.latest_reader.fetch_all("stocks_scrape_latest.get_recent_stock_scrapes", self._latest_select)
+            else:
+                # A batch committing between the two reads is returned now and again next poll, never skipped
+                stocks_data = self.latest_reader.fetch_all(
+                    "stocks_scrape_latest.get_stock_scrapes_since",
+                    lambda: self._latest_select().where(self.scrape_latest.c.ingested_at > bindparam("cursor")),
+                    cursor=cursor,
+                )
+            for stock in stocks_data:
+                stock["timestamp"] = as_utc_datetime(stock["timestamp"])
+            return {"cursor": last_stamp, "full": full, "stock_scrapes": stocks_data}
+        except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
+            logger.error(f"Error retrieving stock scrape changes since {cursor}: {e}")
+            return None
+
+    def _latest_from_history_query(self):
+        # Build the history query that finds each ticker's most recent scrape row
+        # Until the epoch millisecond migration finishes, history mixes legacy text timestamps with integers, and
+        # SQLite sorts text above every integer; integer rows are all newer, so they win, and text is converted
+        timestamp = self.scrape.c.timestamp
+        is_text = func.typeof(timestamp) == "text"
+        subquery = (
+            select(
+                self.scrape.c.ticker_symbol,
+                func.coalesce(func.max(case((~is_text, timestamp))), func.max(timestamp)).label("max_timestamp"),
+            )
+            .group_by(self.scrape.c.ticker_symbol)
+            .subquery()
+        )
+        epoch_ms = literal_column(EPOCH_MS_SQL.format(column=f"{self.scrape.name}.timestamp"), Integer)
+        return self._history_with_names(case((is_text, epoch_ms), else_=timestamp)).join(
+            subquery,
+            (self.scrape.c.ticker_symbol == subquery.c.ticker_symbol)
+            & (self.scrape.c.timestamp == subquery.c.max_timestamp),
+        )
+
+    @retry_on_exception()
+    def rebuild_latest_stock_scrapes(self):
+        # Rebuild the latest-snapshot table from the full scrape history in one transaction
+        session = self.Session()
+        try:
+            session.execute(delete(self.scrape_latest))
+            # Every rebuilt row gets one new ingest stamp, so delta readers fetch the whole rebuilt table
+            history_query = self._latest_from_history_query().add_columns(
+                literal(self._next_ingest_stamp(session)).label("ingested_at")
+            )
+            session.execute(
+                insert(self.scrape_latest).from_select(
+                    [column.name for column in history_query.selected_columns],
+                    history_query,
+                )
+            )
+            row_count = session.execute(select(func.count()).select_from(self.scrape_latest)).scalar()
+            session.commit()
+            logger.info(f"Rebuilt stocks_scrape_latest with {row_count} tickers.")
+            return row_count
+        except SQLAlchemyError as e:
+            logger.error(f"Error rebuilding latest stock scrapes: {e}")
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def ensure_latest_stock_scrapes(self):
+        # Build the latest-snapshot table on first start when history exists but the snapshot is empty
+        session = self.Session()
+        try:
+            has_latest = session.execute(select(self.scrape_latest.c.ticker_symbol).limit(1)).first()
+            has_history = session.execute(select(self.scrape.c.ticker_symbol).limit(1)).first()
         finally:
             session.close()
+        if has_history and not has_latest:
+            self.rebuild_latest_stock_scrapes()
 
     @retry_on_exception()
-    def batch_create_or_update_scrape_ticker_stats(self, data_list):
+    def batch_create_or_update_scrape_ticker_stats(self, data_list, chunk_size=2000):
+        # Upsert ticker stats with one INSERT ... ON CONFLICT(ticker_symbol) DO UPDATE per column subset
         session = self.TickerScrapeSession()
         try:
+            # Group rows by the set of columns they carry, since executemany needs uniform parameters
+            grouped_rows = {}
             for data in data_list:
-                ticker_symbol = data.get('ticker_symbol')
-                if not ticker_symbol:
+                if not data.get('ticker_symbol'):
                     logger.warning("Ticker symbol is missing in the data.")
                     continue
-                
-                select_stmt = select(self.ticker_scrape).where(self.ticker_scrape.c.ticker_symbol == ticker_symbol)
-                existing_record = session.execute(select_stmt).fetchone()
-                
-                if existing_record:
-                    update_stmt = update(self.ticker_scrape).where(self.ticker_scrape.c.ticker_symbol == ticker_symbol).values(**data)
-                    session.execute(update_stmt)
-                else:
-                    insert_stmt = insert(self.ticker_scrape).values(**data)
-                    session.execute(insert_stmt)
+                grouped_rows.setdefault(tuple(sorted(data.keys())), []).append(data)
+
+            updated_at = now_epoch_ms()
+            affected_rows = 0
+            for columns, rows in grouped_rows.items():
+                insert_stmt = sqlite_insert(self.ticker_scrape)
+                # Only the columns present in this group are overwritten on conflict
+                update_columns = {
+                    column: insert_stmt.excluded[column]
+                    for column in columns
+                    if column not in ('ticker_symbol', 'created_at')
+                }
+                update_columns['updated_at'] = updated_at
+                upsert_stmt = insert_stmt.on_conflict_do_update(
+                    index_elements=[self.ticker_scrape.c.ticker_symbol],
+                    set_=update_columns,
+                )
+                # Execute the compiled statement in chunks through executemany
+                for chunk_start in range(0, len(rows), chunk_size):
+                    result = session.execute(upsert_stmt, rows[chunk_start:chunk_start + chunk_size])
+                    affected_rows += max(result.rowcount, 0)
             session.commit()
-            logger.debug(f"Batch create or update of {len(data_list)} records completed successfully.")
+            logger.debug(f"Batch upsert of {len(data_list)} records in {len(grouped_rows)} column groups affected {affected_rows} rows.")
+            return affected_rows
         except SQLAlchemyError as e:
             logger.error(f"Error in batch create or update: {e}")
             session.rollback()
@@ -368,27 +691,72 @@ class ScrapeManager:
     @retry_on_exception()
     def get_scrape_ticker_stats(self, ticker_symbol):
         # Retrieve all ticker scrape records for a specific ticker symbol
-        session = self.TickerScrapeSession()
         try:
-            # Prepare a select statement with conditions to match the specified ticker symbol
-            select_stmt = select(self.ticker_scrape).where(
-                self.ticker_scrape.c.ticker_symbol == ticker_symbol
+            # Execute the cached statement and map each row tuple to a dictionary of its columns
+            ticker_scrapes_list = self.ticker_scrape_reader.fetch_all(
+                "ticker_scrape.get_scrape_ticker_stats",
+                lambda: select(self.ticker_scrape).where(self.ticker_scrape.c.ticker_symbol == bindparam("ticker_symbol")),
+                ticker_symbol=ticker_symbol,
             )
-            # Execute the select statement and fetch all result
-            result = session.execute(select_stmt)
-            ticker_scrapes = result.fetchall()
-            # Get column names for the ticker scrape table to format each record as a dictionary
-            column_names = [column.name for column in self.ticker_scrape.columns]
-            ticker_scrapes_list = [dict(zip(column_names, row)) for row in ticker_scrapes]
+            for ticker_scrape in ticker_scrapes_list:
+                # created_at and updated_at are stored as epoch milliseconds
+                ticker_scrape["created_at"] = as_utc_datetime(ticker_scrape["created_at"])
+                ticker_scrape["updated_at"] = as_utc_datetime(ticker_scrape["updated_at"])
             # Log the number of records retrieved
             logger.debug(f"Retrieved {len(ticker_scrapes_list)} ticker scrapes for {ticker_symbol}.")
             # Return the list of ticker scrape records as dictionaries
             return ticker_scrapes_list
         except SQLAlchemyError as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Log error if retrieval fails and return an empty list
             logger.error(f"Error retrieving ticker scrapes for {ticker_symbol}: {e}")
             return []
-        finally:
-            # Close the session to free resources
-            session.close()
+
+    def screener_select(self):
+        # Every ticker_scrape column can be screened, sorted and returned; the table definition is the allowlist
+        return select(self.ticker_scrape)
+
+    def screener_columns(self):
+        # Allowlisted columns by name, for compiling screener filters
+        return {column.name: column for column in self.ticker_scrape.columns}
+
+    @retry_on_exception()
+    def screen_ticker_stats(self, screener_query, list_query):
+        # Retrieve one page of tickers matching a screener filter, with the requested columns and order; None on error
+        try:
+            # Filters that differ only in their values, and pages of the same screen, share one cached statement
+            ticker_scrapes_list = self.ticker_scrape_reader.fetch_all(
+                screener_query.cache_name(list_query.cache_name("ticker_scrape.screen_ticker_stats")),
+                lambda: list_query.statement(screener_query.where(self.screener_select()), [self.ticker_scrape.c.ticker_symbol]),
+                **screener_query.parameters(),
+                **list_query.parameters(),
+            )
+            for ticker_scrape in ticker_scrapes_list:
+                # created_at and updated_at are stored as epoch milliseconds
+                for column_name in ("created_at", "updated_at"):
+                    if column_name in ticker_scrape:
+                        ticker_scrape[column_name] = as_utc_datetime(ticker_scrape[column_name])
+            logger.debug(f"Screener returned {len(ticker_scrapes_list)} tickers for '{screener_query.shape}'.")
+            return ticker_scrapes_list
+        except SQLAlchemyError as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
+            logger.error(f"Error screening ticker scrapes for '{screener_query.shape}': {e}")
+            return None
+
+    @retry_on_exception()
+    def count_screened_ticker_stats(self, screener_query):
+        # Number of tickers matching a screener filter, for paged responses; None on error
+        try:
+            return self.ticker_scrape_reader.fetch_scalar(
+                screener_query.cache_name("ticker_scrape.count_screened_ticker_stats"),
+                lambda: ListQuery.count_statement(screener_query.where(self.screener_select())),
+                **screener_query.parameters(),
+            )
+        except SQLAlchemyError as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
+            logger.error(f"Error counting screened ticker scrapes for '{screener_query.shape}': {e}")
+            return None
 
@@ -0,0 +1,201 @@
+# db_management/screener_query.py
+import re
+from sqlalchemy import Integer, Float, Numeric, and_, or_, not_, bindparam
+import logging
+logger = logging.getLogger(__name__)
+
+# Bounds that keep one filter cheap to parse, compile and cache
+MAX_FILTER_LENGTH = 2000
+MAX_FILTER_TERMS = 40
+MAX_FILTER_DEPTH = 16
+
+# One token of the filter language; numbers may not run into an identifier, so metric names like 52w_low stay whole
+TOKEN_PATTERN = re.compile(
+    r"""\s*(?:
+        (?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)(?![A-Za-z0-9_.])
+        | (?P<string>'(?:[^']|'')*')
+        | (?P<op><=|>=|!=|<>|=|<|>)
+        | (?P<punct>[(),])
+        | (?P<word>[A-Za-z0-9_]+)
+    )""",
+    re.VERBOSE,
+)
+
+KEYWORDS = {"AND", "OR", "NOT", "IN", "IS", "NULL", "BETWEEN"}
+
+COMPARISONS = {
+    "=": lambda column, value: column == value,
+    "!=": lambda column, value: column != value,
+    "<>": lambda column, value: column != value,
+    "<": lambda column, value: column < value,
+    "<=": lambda column, value: column <= value,
+    ">": lambda column, value: column > value,
+    ">=": lambda column, value: column >= value,
+}
+
+
+class ScreenerQuery:
+    # Filter expression over allowlisted columns, e.g. "pe_forward < 15 AND sector = 'Technology'"
+    # Supports =, !=, <, <=, >, >=, IN (...), BETWEEN x AND y, IS [NOT] NULL, NOT, AND, OR and parentheses
+    # Values are always bound parameters; identifiers must name a column in the allowlist
+
+    def __init__(self, text, columns):
+        # Parse and compile `text` against a {name: Column} allowlist; raises ValueError with a 400-ready message
+        self.columns = columns
+        self.params = {}
+        self.condition = None
+        self.shape = ""
+        text = (text or "").strip()
+        if len(text) > MAX_FILTER_LENGTH:
+            raise ValueError(f"Filter is longer than {MAX_FILTER_LENGTH} characters")
+        self._tokens = self._tokenize(text)
+        self._position = 0
+        self._terms = 0
+        if self._tokens:
+            self.condition, self.shape = self._parse_or(0)
+            if self._position < len(self._tokens):
+                raise ValueError(f"Unexpected '{self._tokens[self._position][1]}' in filter")
+
+    @property
+    def is_empty(self):
+        return self.condition is None
+
+    def where(self, stmt):
+        # Apply the compiled condition to a select over the allowlisted table
+        return stmt if self.condition is None else stmt.where(self.condition)
+
+    def cache_name(self, prefix):
+        # Filters that differ only in their values share one compiled statement
+        return f"{prefix}{{{self.shape}}}"
+
+    def parameters(self):
+        # Bound values for the filter's placeholders
+        return dict(self.params)
+
+    @staticmethod
+    def _tokenize(text):
+        tokens = []
+        position = 0
+        while position < len(text):
+            match = TOKEN_PATTERN.match(text, position)
+            if match is None:
+                offset = len(text) - len(text[position:].lstrip())
+                if offset < len(text):
+                    raise ValueError(f"Unexpected character '{text[offset]}' at position {offset} in filter")
+                break
+            position = match.end()
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind == "word" and value.upper() in KEYWORDS:
+                tokens.append(("keyword", value.upper()))
+            else:
+                tokens.append((kind, value))
+        return tokens
+
+    def _peek(self):
+        return self._tokens[self._position] if self._position < len(self._tokens) else (None, None)
+
+    def _accept(self, kind, value=None):
+        token_kind, token_value = self._peek()
+        if token_kind == kind and (value is None or token_value == value):
+            self._position += 1
+            return token_value
+        return None
+
+    def _expect(self, kind, value, context):
+        if self._accept(kind, value) is None:
+            found = self._peek()[1]
+            raise ValueError(f"Expected '{value}' {context}" + (f", found '{found}'" if found is not None else ""))
+
+    def _parse_or(self, depth):
+        condition, shape = self._parse_and(depth)
+        conditions, shapes = [condition], [shape]
+        while self._accept("keyword", "OR"):
+            condition, shape = self._parse_and(depth)
+            conditions.append(condition)
+            shapes.append(shape)
+        if len(conditions) == 1:
+            return condition, shape
+        return or_(*conditions), " OR ".join(shapes)
+
+    def _parse_and(self, depth):
+        condition, shape = self._parse_not(depth)
+        conditions, shapes = [condition], [shape]
+        while self._accept("keyword", "AND"):
+            condition, shape = self._parse_not(depth)
+            conditions.append(condition)
+            shapes.append(shape)
+        if len(conditions) == 1:
+            return condition, shape
+        return and_(*conditions), " AND ".join(shapes)
+
+    def _parse_not(self, depth):
+        if self._accept("keyword", "NOT"):
+            condition, shape = self._parse_not(depth)
+            return not_(condition), f"NOT {shape}"
+        return self._parse_primary(depth)
+
+    def _parse_primary(self, depth):
+        if self._accept("punct", "("):
+            if depth >= MAX_FILTER_DEPTH:
+                raise ValueError(f"Filter nests deeper than {MAX_FILTER_DEPTH} levels")
+            condition, shape = self._parse_or(depth + 1)
+            self._expect("punct", ")", "to close a group")
+            return condition, f"({shape})"
+        return self._parse_term()
+
+    def _parse_term(self):
+        kind, name = self._peek()
+        if kind != "word":
+            raise ValueError(f"Expected a column name in filter, found '{name}'" if name is not None else "Filter ends where a column name was expected")
+        self._position += 1
+        column = self.columns.get(name)
+        if column is None:
+            raise ValueError(f"Cannot filter on '{name}'; it is not a screener column")
+        self._terms += 1
+        if self._terms > MAX_FILTER_TERMS:
+            raise ValueError(f"Filter has more than {MAX_FILTER_TERMS} conditions")
+
+        operator = self._accept("op")
+        if operator is not None:
+            return COMPARISONS[operator](column, self._bind(column)), f"{name}{operator}?"
+        if self._accept("keyword", "IS"):
+            negated = self._accept("keyword", "NOT") is not None
+            self._expect("keyword", "NULL", f"after '{name} IS'")
+            return (column.is_not(None), f"{name} IS NOT NULL") if negated else (column.is_(None), f"{name} IS NULL")
+        negated = self._accept("keyword", "NOT") is not None
+        if self._accept("keyword", "IN"):
+            self._expect("punct", "(", f"after '{name} IN'")
+            values = [self._bind(column)]
+            while self._accept("punct", ","):
+                values.append(self._bind(column))
+            self._expect("punct", ")", "to close the IN list")
+            condition = column.in_(values)
+            shape = f"{name} {'NOT ' if negated else ''}IN ({len(values)})"
+        elif self._accept("keyword", "BETWEEN"):
+            low = self._bind(column)
+            self._expect("keyword", "AND", f"in '{name} BETWEEN'")
+            condition = column.between(low, self._bind(column))
+            shape = f"{name} {'NOT ' if negated else ''}BETWEEN"
+        else:
+            found = self._peek()[1]
+            raise ValueError(f"Expected a comparison after '{name}'" + (f", found '{found}'" if found is not None else ""))
+        return (not_(condition) if negated else condition), shape
+
+    def _bind(self, column):
+        # Consume one literal, check it against the column's type and return a named bound parameter
+        kind, raw = self._peek()
+        if kind == "number":
+            if not isinstance(column.type, (Integer, Float, Numeric)):
+                raise ValueError(f"'{column.name}' is a text column; quote the value, e.g. '{raw}'")
+            value = float(raw) if any(mark in raw for mark in ".eE") else int(raw)
+        elif kind == "string":
+            if isinstance(column.type, (Integer, Float, Numeric)):
+                raise ValueError(f"'{column.name}' is numeric; compare it with a number, not {raw}")
+            value = raw[1:-1].replace("''", "'")
+        else:
+            raise ValueError(f"Expected a value for '{column.name}'" + (f", found '{raw}'" if raw is not None else ""))
+        self._position += 1
+        name = f"f{len(self.params)}"
+        self.params[name] = value
+        return bindparam(name, type_=column.type)
@@ -0,0 +1,73 @@
+# db_management/sqlite_pragmas.py
+import os
+from sqlalchemy import event
+import logging
+logger = logging.getLogger(__name__)
+
+# Named pragma presets; values are applied in order on every new DBAPI connection
+PRAGMA_PRESETS = {
+    "default": {
+        "busy_timeout": 5000,         # Wait up to 5s on a locked database instead of failing immediately
+        "journal_mode": "WAL",        # Readers do not block writers and vice versa
+        "synchronous": "NORMAL",      # Safe with WAL, avoids an fsync per commit
+        "cache_size": -16000,         # Negative values are KiB, so ~16MB page cache per connection
+        "mmap_size": 67108864,        # 64MB memory-mapped I/O
+        "temp_store": "MEMORY",       # Keep temp B-trees and sort spills in memory
+    },
+    "write_heavy": {
+        "auto_vacuum": "INCREMENTAL",  # Only takes effect on new files; lets retention return freed pages to disk
+        "busy_timeout": 15000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,         # ~64MB page cache for large batch upserts
+        "mmap_size": 268435456,       # 256MB memory-mapped I/O
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 4000,   # Checkpoint less often during bulk ingest
+    },
+}
+
+# Preset used by each database; override with CLIPSE_SQLITE_PROFILE_<NAME>=<preset>
+DATABASE_PROFILES = {
+    "scrape": "write_heavy",
+    "users": "default",
+    "api_keys": "default",
+    "polygon_stocks": "write_heavy",
+    "jobs_schedule": "default",
+    "scrape_ticker": "default",
+}
+
+
+def resolve_profile(db_name):
+    # Determine the pragma preset for a database, allowing an environment override
+    preset_name = os.environ.get(f"CLIPSE_SQLITE_PROFILE_{db_name.upper()}", DATABASE_PROFILES.get(db_name, "default"))
+    if preset_name not in PRAGMA_PRESETS:
+        logger.warning(f"Unknown SQLite profile '{preset_name}' for {db_name}; using 'default'.")
+        preset_name = "default"
+    return preset_name, dict(PRAGMA_PRESETS[preset_name])
+
+
+def apply_pragmas(engine, pragmas):
+    # Register a connect listener so every pooled connection gets the same pragmas
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def read_effective_pragmas(engine, names):
+    # Query the settings SQLite actually applied, which may differ from the requested ones
+    effective = {}
+    raw_connection = engine.raw_connection()
+    try:
+        cursor = raw_connection.cursor()
+        for name in names:
+            row = cursor.execute(f"PRAGMA {name}").fetchone()
+            effective[name] = row[0] if row else None
+        cursor.close()
+    finally:
+        raw_connection.close()
+    return effective
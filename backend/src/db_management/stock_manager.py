@@ -1,41 +1,64 @@
 # db_management/stock_manager.py
-from sqlalchemy import select, update, func
+from sqlalchemy import select, update, delete, insert, func, case, and_, or_, bindparam
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .core_access import CoreReader
+from .list_query import ListQuery
 from datetime import datetime, timezone
+from .resilience import retry_on_exception, raise_if_retryable
 import logging 
 import time
 logger = logging.getLogger(__name__)
 
-def retry_on_exception(max_retries=3, delay=1):
-    # Decorator to retry a function call if it raises an exception
-    def decorator(func):
-        # Wrapper function that will replace the original function
-        def wrapper(*args, **kwargs):
-            # Attempt to call the function up to max_retries times
-            for attempt in range(max_retries):
-                try:
-                    # Call the original function and return its result
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    # If an exception occurs and it's not the last attempt
-                    if attempt < max_retries - 1:
-                        # Log a warning and wait before retrying
-                        logger.warning(f"Retrying {func.__name__} due to error: {e}")
-                        time.sleep(delay)
-                    else:
-                        # Log an error if max retries are exceeded and raise the exception
-                        logger.error(f"Max retries exceeded for {func.__name__}: {e}")
-                        raise
-        return wrapper
-    return decorator
 
 class StockManager:
-    def __init__(self, session, scrape_session, stocks_table, stocks_scrape_table):
+    def __init__(self, session, scrape_session, stocks_table, stocks_scrape_table, stocks_latest_table, read_session=None):
         # Initialize the class with a session factory and a reference to the stocks table
         self.Session = session
+        # Latest-bar reads go to the read snapshot when one is configured
+        self.ReadSession = read_session or session
+        # Cached statements on pooled Core connections for hot reads
+        self.reader = CoreReader.for_session(session)
+        self.latest_reader = CoreReader.for_session(self.ReadSession)
         self.ScrapeSession = scrape_session
         self.stocks = stocks_table
         self.stocks_scrape = stocks_scrape_table
+        self.stocks_latest = stocks_latest_table
+
+    def _upsert_latest_bar_stmt(self):
+        # Build an upsert that folds one incoming bar into the per-ticker latest-bar row.
+        # SQLite evaluates every SET expression against the old row, so the CASEs see the prior state.
+        latest = self.stocks_latest
+        insert_stmt = sqlite_insert(latest)
+        incoming = insert_stmt.excluded
+        is_newer = incoming.timestamp_end > latest.c.timestamp_end
+        is_current = incoming.timestamp_end >= latest.c.timestamp_end
+        # A backfilled bar between the previous bar and the latest one becomes the new previous bar
+        fills_previous = and_(
+            incoming.timestamp_end < latest.c.timestamp_end,
+            # >= so a restated previous bar refreshes previous_close too
+            or_(latest.c.previous_timestamp_end.is_(None), incoming.timestamp_end >= latest.c.previous_timestamp_end),
+        )
+        return insert_stmt.on_conflict_do_update(
+            index_elements=[latest.c.ticker_symbol],
+            set_={
+                "previous_close": case(
+                    (is_newer, latest.c.close_price),
+                    (fills_previous, incoming.close_price),
+                    else_=latest.c.previous_close,
+                ),
+                "previous_timestamp_end": case(
+                    (is_newer, latest.c.timestamp_end),
+                    (fills_previous, incoming.timestamp_end),
+                    else_=latest.c.previous_timestamp_end,
+                ),
+                "close_price": case((is_current, incoming.close_price), else_=latest.c.close_price),
+                "highest_price": case((is_current, incoming.highest_price), else_=latest.c.highest_price),
+                "lowest_price": case((is_current, incoming.lowest_price), else_=latest.c.lowest_price),
+                "open_price": case((is_current, incoming.open_price), else_=latest.c.open_price),
+                "insert_timestamp": case((is_current, incoming.insert_timestamp), else_=latest.c.insert_timestamp),
+                "timestamp_end": func.max(latest.c.timestamp_end, incoming.timestamp_end),
+            },
+        )
 
     @retry_on_exception()
     def insert_stock(self, ticker, close_price, highest_price, lowest_price, open_price, timestamp_end, timestamp):
@@ -82,9 +105,24 @@ class StockManager:
                 # Execute the insert statement to add the new record
                 session.execute(insert_stmt)
                 logger.debug(f"Stock data for {ticker} at {timestamp_end} inserted successfully.")
+            # Fold the bar into the latest-bar table in the same transaction, as insert_stock_batch does
+            session.execute(
+                self._upsert_latest_bar_stmt(),
+                {
+                    "ticker_symbol": ticker,
+                    "close_price": close_price,
+                    "highest_price": highest_price,
+                    "lowest_price": lowest_price,
+                    "open_price": open_price,
+                    "timestamp_end": timestamp_end,
+                    "insert_timestamp": timestamp,
+                },
+            )
             # Commit the transaction to save the changes in the database
             session.commit()
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Rollback the transaction in case of an error to maintain data integrity
             logger.error(f"Error inserting stock data: {e}")
             session.rollback()
@@ -113,6 +151,8 @@ class StockManager:
                 # Log if no stock data was found
                 logger.debug("No stock data found.")
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Rollback if an error occurs and log the error
             session.rollback()
             logger.error(f"Error selecting stock data: {e}")
@@ -121,132 +161,183 @@ class StockManager:
             session.close()
 
     @retry_on_exception()
-    def insert_stock_batch(self, stock_data_batch):
-        # Insert or update a batch of stock data records in the stocks table
+    def insert_stock_batch(self, stock_data_batch, chunk_size=5000):
+        # Bulk upsert a batch of stock data records into the stocks table
         session = self.Session() # Open a new session for database interaction
+        start_time = time.perf_counter()
         try:
-            for stock in stock_data_batch:
-                # Extract stock data fields from each dictionary in the batch
-                ticker_symbol = stock["T"]
-                close_price = stock["c"]
-                highest_price = stock["h"]
-                lowest_price = stock["l"]
-                open_price = stock["o"]
-                timestamp_end = stock["t"]
-                insert_timestamp = datetime.now(timezone.utc)
-                # Prepare an insert statement with "OR REPLACE" to upsert each stock record
-                insert_stmt = (
-                    sqlite_insert(self.stocks)
-                    .values(
-                        ticker_symbol=ticker_symbol,
-                        close_price=close_price,
-                        highest_price=highest_price,
-                        lowest_price=lowest_price,
-                        open_price=open_price,
-                        timestamp_end=timestamp_end,
-                        insert_timestamp=insert_timestamp,
-                    )
-                    .prefix_with("OR REPLACE") # Use "OR REPLACE" to update existing records with the same primary key
-                )
-                # Execute the upsert (insert or replace) for the current stock record
-                session.execute(insert_stmt)
+            # Compile a single INSERT ... ON CONFLICT DO UPDATE statement for the whole batch
+            insert_stmt = sqlite_insert(self.stocks)
+            upsert_stmt = insert_stmt.on_conflict_do_update(
+                index_elements=[self.stocks.c.ticker_symbol, self.stocks.c.timestamp_end],
+                set_={
+                    "close_price": insert_stmt.excluded.close_price,
+                    "highest_price": insert_stmt.excluded.highest_price,
+                    "lowest_price": insert_stmt.excluded.lowest_price,
+                    "open_price": insert_stmt.excluded.open_price,
+                    "insert_timestamp": insert_stmt.excluded.insert_timestamp,
+                },
+            )
+            insert_timestamp = datetime.now(timezone.utc)
+            # Map the Polygon grouped-daily fields onto the stocks table columns
+            rows = [
+                {
+                    "ticker_symbol": stock["T"],
+                    "close_price": stock["c"],
+                    "highest_price": stock["h"],
+                    "lowest_price": stock["l"],
+                    "open_price": stock["o"],
+                    "timestamp_end": stock["t"],
+                    "insert_timestamp": insert_timestamp,
+                }
+                for stock in stock_data_batch
+            ]
+            # Run the compiled statements through executemany in fixed-size chunks,
+            # folding each chunk into the latest-bar table in the same transaction
+            latest_stmt = self._upsert_latest_bar_stmt()
+            for chunk_start in range(0, len(rows), chunk_size):
+                chunk = rows[chunk_start:chunk_start + chunk_size]
+                session.execute(upsert_stmt, chunk)
+                session.execute(latest_stmt, chunk)
             # Commit the transaction to save all changes in the database
             session.commit()
-            logger.debug(f"Inserted or update batch of {len(stock_data_batch)} stock entries successfully.")
+            elapsed = time.perf_counter() - start_time
+            rows_per_second = len(rows) / elapsed if elapsed > 0 else float(len(rows))
+            logger.info(f"Upserted batch of {len(rows)} stock entries in {elapsed:.3f}s ({rows_per_second:,.0f} rows/sec).")
+            return len(rows)
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Rollback the transaction in case of an error to maintain data integrity
             session.rollback()
             logger.error(f"Error during batch upsert: {e}")
+            return 0
         finally:
             # Close the session to free resources
             session.close()
 
+    def recent_stock_prices_select(self):
+        # Columns the API serves from the latest-bar table; list queries project and sort within these
+        return select(
+            self.stocks_latest.c.ticker_symbol,
+            self.stocks_latest.c.open_price,
+            self.stocks_latest.c.close_price,
+            self.stocks_latest.c.highest_price,
+            self.stocks_latest.c.lowest_price,
+            self.stocks_latest.c.timestamp_end,
+            self.stocks_latest.c.previous_close,
+            self.stocks_latest.c.day_change,
+            self.stocks_latest.c.day_change_percentage,
+        )
+
     @retry_on_exception()
-    def get_recent_stock_prices(self):
-        # Retrieve the most recent stock prices for each ticker symbol in the stocks table
-        session = self.Session() # Open a new session for database interaction
+    def get_recent_stock_prices(self, list_query=None):
+        # Retrieve the most recent stock prices for each ticker symbol from the latest-bar table
+        # A ListQuery pushes the requested columns, order and page window down into SQL
         try:
-            # Define a subquery to get the latest timestamp for each ticker symbol
-            subquery = (
-                select(
-                    self.stocks.c.ticker_symbol,
-                    func.max(self.stocks.c.timestamp_end).label("max_timestamp"),
-                )
-                .group_by(self.stocks.c.ticker_symbol)
-                .subquery()
+            if list_query is None or list_query.is_default:
+                # Execute the cached query and map each row tuple to a dictionary
+                return self.latest_reader.fetch_all("stocks.get_recent_stock_prices", self.recent_stock_prices_select)
+            return self.latest_reader.fetch_all(
+                list_query.cache_name("stocks.get_recent_stock_prices"),
+                lambda: list_query.statement(self.recent_stock_prices_select(), [self.stocks_latest.c.ticker_symbol]),
+                **list_query.parameters(),
             )
-            # Define the main query to get stock data with the most recent timestamp for each ticker
-            query = select(
+        except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
+            # Print an error message and return an empty list if an error occurs
+            logger.debug(f"Error retrieving recent stock prices: {e}")
+            return []
+
+    @retry_on_exception()
+    def count_recent_stock_prices(self):
+        # Number of tickers in the latest-bar table, for paged responses; None on error
+        try:
+            return self.latest_reader.fetch_scalar(
+                "stocks.count_recent_stock_prices",
+                lambda: ListQuery.count_statement(self.recent_stock_prices_select()),
+            )
+        except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
+            logger.error(f"Error counting recent stock prices: {e}")
+            return None
+
+    @retry_on_exception()
+    def rebuild_latest_stock_prices(self):
+        # Rebuild the latest-bar table from the full stocks history in one transaction
+        session = self.Session()
+        try:
+            # Rank each ticker's bars newest first and carry the prior bar's close alongside
+            ranked = select(
                 self.stocks.c.ticker_symbol,
-                self.stocks.c.open_price,
                 self.stocks.c.close_price,
                 self.stocks.c.highest_price,
                 self.stocks.c.lowest_price,
+                self.stocks.c.open_price,
                 self.stocks.c.timestamp_end,
-                subquery.c.max_timestamp,
-            ).join(
-                subquery,
-                (self.stocks.c.ticker_symbol == subquery.c.ticker_symbol)
-                & (self.stocks.c.timestamp_end == subquery.c.max_timestamp),
+                func.lag(self.stocks.c.close_price).over(
+                    partition_by=self.stocks.c.ticker_symbol, order_by=self.stocks.c.timestamp_end
+                ).label("previous_close"),
+                func.lag(self.stocks.c.timestamp_end).over(
+                    partition_by=self.stocks.c.ticker_symbol, order_by=self.stocks.c.timestamp_end
+                ).label("previous_timestamp_end"),
+                self.stocks.c.insert_timestamp,
+                func.row_number().over(
+                    partition_by=self.stocks.c.ticker_symbol, order_by=self.stocks.c.timestamp_end.desc()
+                ).label("bar_rank"),
+            ).subquery()
+            latest_columns = [column for column in ranked.c if column.name != "bar_rank"]
+            session.execute(delete(self.stocks_latest))
+            session.execute(
+                insert(self.stocks_latest).from_select(
+                    [column.name for column in latest_columns],
+                    select(*latest_columns).where(ranked.c.bar_rank == 1),
+                )
             )
-            # Execute the query to retrieve the latest stock data for each ticker
-            result = session.execute(query)
-            # Convert each row of result into a dictionary and store it in a list
-            stocks_data = [
-                {
-                    "ticker_symbol": row.ticker_symbol,
-                    "open_price": row.open_price,
-                    "close_price": row.close_price,
-                    "highest_price": row.highest_price,
-                    "lowest_price": row.lowest_price,
-                    "timestamp_end": row.max_timestamp,
-                }
-                for row in result
-            ]
-            # Return the list of dictionaries containing the latest stock data for each ticker
-            return stocks_data
+            row_count = session.execute(select(func.count()).select_from(self.stocks_latest)).scalar()
+            session.commit()
+            logger.info(f"Rebuilt stocks_latest with {row_count} tickers.")
+            return row_count
         except Exception as e:
-            # Print an error message and return an empty list if an error occurs
-            logger.debug(f"Error retrieving recent stock prices: {e}")
-            return []
+            logger.error(f"Error rebuilding latest stock prices: {e}")
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def ensure_latest_stock_prices(self):
+        # Build the latest-bar table on first start when history exists but the table is empty
+        session = self.Session()
+        try:
+            has_latest = session.execute(select(self.stocks_latest.c.ticker_symbol).limit(1)).first()
+            has_history = session.execute(select(self.stocks.c.ticker_symbol).limit(1)).first()
         finally:
-            # Close the session to free resources
             session.close()
+        if has_history and not has_latest:
+            self.rebuild_latest_stock_prices()
 
     @retry_on_exception()
     def get_stock_data_by_ticker(self, ticker_symbol):
         # Retrieve all stock data for a specific ticker symbol from the stocks table
-        session = self.Session() # Open a new session for database interaction
         try:
-            # Prepare a select query to fetch records for the specified ticker symbol
-            query = select(
-                self.stocks.c.ticker_symbol,
-                self.stocks.c.open_price,
-                self.stocks.c.close_price,
-                self.stocks.c.highest_price,
-                self.stocks.c.lowest_price,
-                self.stocks.c.timestamp_end,
-            ).where(self.stocks.c.ticker_symbol == ticker_symbol)
-            # Execute the query to retrieve the stock data for the given ticker symbol
-            result = session.execute(query)
-            # Convert each row of the result into a dictionary and store it in a list
-            stocks_data = [
-                {
-                    "ticker_symbol": row.ticker_symbol,
-                    "open_price": row.open_price,
-                    "close_price": row.close_price,
-                    "highest_price": row.highest_price,
-                    "lowest_price": row.lowest_price,
-                    "timestamp_end": row.timestamp_end,
-                }
-                for row in result
-            ]
-            # Return the list of dictionaries containing stock data for the specified ticker
-            return stocks_data
+            # Execute the cached query for the ticker and map each row tuple to a dictionary
+            return self.reader.fetch_all(
+                "stocks.get_stock_data_by_ticker",
+                lambda: select(
+                    self.stocks.c.ticker_symbol,
+                    self.stocks.c.open_price,
+                    self.stocks.c.close_price,
+                    self.stocks.c.highest_price,
+                    self.stocks.c.lowest_price,
+                    self.stocks.c.timestamp_end,
+                ).where(self.stocks.c.ticker_symbol == bindparam("ticker_symbol")),
+                ticker_symbol=ticker_symbol,
+            )
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Print an error message and return an empty list if an error occurs
             logger.error(f"Error retrieving stock data for '{ticker_symbol}': {e}")
             return []
-        finally:
-            # Close the session to free resources
-            session.close()
@@ -0,0 +1,42 @@
+# db_management/time_keys.py
+from datetime import datetime, timedelta, timezone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+NAIVE_EPOCH = EPOCH.replace(tzinfo=None)
+ONE_MS = timedelta(milliseconds=1)
+
+
+def to_epoch_ms(value):
+    # Convert a datetime, SQLite datetime string or epoch value to integer epoch milliseconds (UTC)
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        # Naive datetimes in this application are always UTC
+        value = value.replace(tzinfo=timezone.utc)
+    # Floor division drops the sub-millisecond digits, the same key schema_migrations.EPOCH_MS_SQL computes in SQL
+    return (value - EPOCH) // ONE_MS
+
+
+def from_epoch_ms(epoch_ms):
+    # Convert integer epoch milliseconds to a naive UTC datetime, matching what SQLite DateTime columns return
+    if epoch_ms is None:
+        return None
+    return NAIVE_EPOCH + timedelta(milliseconds=epoch_ms)
+
+
+def as_utc_datetime(value):
+    # Convert a stored time key to a naive UTC datetime; legacy text values not yet migrated are parsed
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, int):
+        return from_epoch_ms(value)
+    return from_epoch_ms(to_epoch_ms(value))
+
+
+def now_epoch_ms():
+    # Current UTC time as integer epoch milliseconds, used as a column default
+    return to_epoch_ms(datetime.now(timezone.utc))
@@ -1,40 +1,21 @@
 # db_management/user_manager.py
 import bcrypt
 from datetime import datetime, timezone
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, bindparam
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .core_access import CoreReader
+from .resilience import retry_on_exception, raise_if_retryable
 import logging
-import time
 logger = logging.getLogger(__name__)
 
-def retry_on_exception(max_retries=3, delay=1):
-    # Decorator to retry a function call if it raises an exception
-    def decorator(func):
-        # Wrapper function that will replace the original function
-        def wrapper(*args, **kwargs):
-            # Attempt to call the function up to max_retries times
-            for attempt in range(max_retries):
-                try:
-                    # Call the original function and return its result
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    # If an exception occurs and it's not the last attempt
-                    if attempt < max_retries - 1:
-                        # Log a warning and wait before retrying
-                        logger.warning(f"Retrying {func.__name__} due to error: {e}")
-                        time.sleep(delay)
-                    else:
-                        # Log an error if max retries are exceeded and raise the exception
-                        logger.error(f"Max retries exceeded for {func.__name__}: {e}")
-                        raise
-        return wrapper
-    return decorator
 
 class UserManager:
     def __init__(self, session, users_table):
         # Initialize the class with a session factory and a reference to the users table
         self.Session = session
         self.users = users_table
+        # Cached statements on pooled Core connections for hot reads
+        self.reader = CoreReader.for_session(session)
 
     def _hash_password(self, password):
         # Hash the password using bcrypt for secure storage
@@ -70,6 +51,8 @@ class UserManager:
             session.commit()
             logger.debug(f"User '{username}' created successfully.")
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Rollback the transaction if an error occurs to maintain data integrity
             session.rollback()
             logger.error(f"Error creating user '{username}': {e}")
@@ -80,27 +63,27 @@ class UserManager:
     @retry_on_exception()
     def get_user_by_username(self, username):
         # Retrieve a user's data from the users table based on the provided username
-        session = self.Session() # Open a new session for database interaction
         try:
-            # Prepare a select statement to fetch the user record matching the specified username
-            select_stmt = select(self.users).where(self.users.c.username == username)
-            # Execute the select statement and retrieve the first matching result
-            result = session.execute(select_stmt).first()
+            # Fetch the user record matching the specified username
+            users = self.reader.fetch_all(
+                "users.get_user_by_username",
+                lambda: select(self.users).where(self.users.c.username == bindparam("username")),
+                username=username,
+            )
             # Check if a user record was found
-            if result:
+            if users:
                 logger.debug(f"Retrieved user data for '{username}'")
-                return result._asdict() # Convert the result to a dictionary and return it
+                return users[0]
             else:
                 # Log a message if no user was found with the specified username
                 logger.debug(f"No user found with username '{username}'.")
                 return None
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Log any error that occurs during retrieval
             logger.error(f"Error retrieving user '{username}': {e}")
             return None
-        finally:
-            # Close the session to free resources
-            session.close()
 
     @retry_on_exception()
     def update_user(self, username, new_username=None, new_role=None, new_password=None, new_email=None, new_currency=None, new_theme=None):
@@ -144,6 +127,8 @@ class UserManager:
                 # Log a message if no user was found with the specified username
                 logger.debug(f"No user found with '{username}'.")
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Rollback the transaction if an error occurs and log the error
             session.rollback()
             logger.error(f"Error updating user '{username}': {e}")
@@ -169,6 +154,8 @@ class UserManager:
                 # Log a message if no user was found with the specified username
                 logger.debug(f"No user found with username '{username}'.")
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Rollback the transaction if an error occurs and log the error
             session.rollback()
             logger.error(f"Error deleting user '{username}': {e}")
@@ -200,6 +187,8 @@ class UserManager:
                 logger.debug(f"No user found with username '{username}'.")
                 return False # Return False if no matching user is found
         except Exception as e:
+            # Let lock contention reach the retry decorator
+            raise_if_retryable(e)
             # Log any error that occurs during authentication
             logger.error(f"Error authenticating user '{username}': {e}")
             return False # Return False if an exception occurs
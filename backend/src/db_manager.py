@@ -1,5 +1,7 @@
 # db_manager.py
 import os
+import threading
+import time
 from sqlalchemy import ( create_engine )
 from sqlalchemy.orm import sessionmaker
 from cryptography.fernet import Fernet
@@ -9,11 +11,44 @@ from .db_management.api_key_manager import ApiKeyManager
 from .db_management.stock_manager import StockManager
 from .db_management.user_manager import UserManager
 from .db_management.scrape_manager import ScrapeManager 
+from .db_management.rollup_manager import RollupManager
+from .db_management.retention_manager import RetentionManager
+from .db_management.schema_migrations import SchemaMigrator
+from .db_management.read_snapshot import ReadSnapshotManager, read_snapshot_enabled
+from .db_management.analytics_manager import AnalyticsManager
+from .db_management.data_versions import DataVersions
+from .db_management.event_broker import EventBroker
+from .db_management.sqlite_pragmas import resolve_profile, apply_pragmas, read_effective_pragmas
 import logging 
 logger = logging.getLogger(__name__)
 
 class DBManager:
+    # One engine registry and manager set is shared by every consumer in the process
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+    startup_seconds = 0.0
+    instance_requests = 0
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+            cls.instance_requests += 1
+            return cls._instance
+
     def __init__(self):
+        with self._lock:
+            if self._initialized:
+                return
+            # Track how long the one-time engine, schema and manager setup takes
+            start_time = time.perf_counter()
+            self._initialize()
+            DBManager.startup_seconds = time.perf_counter() - start_time
+            self._initialized = True
+            logger.info(f"DBManager initialized in {self.startup_seconds:.3f}s")
+
+    def _initialize(self):
         # Use DBSchemaManager for database and table setup
         self.schema_manager = DBSchemaManager()
         self.scrape_db_file_path = self.schema_manager.scrape_db_file_path
@@ -24,19 +59,46 @@ class DBManager:
         self.scrape_ticker_db_file_path = self.schema_manager.scrape_ticker_db_file_path
 
         
-        # Create engines for both databases
-        self.scrape_engine = create_engine(f"sqlite:///{self.scrape_db_file_path}")
-        self.users_engine = create_engine(f"sqlite:///{self.users_db_file_path}")
-        self.api_keys_engine = create_engine(f"sqlite:///{self.api_keys_db_file_path}")
-        self.polygon_stocks_engine = create_engine(f"sqlite:///{self.polygon_stocks_db_file_path}")
-        self.jobs_schedule_engine = create_engine(f"sqlite:///{self.jobs_schedule_db_file_path}")
-        self.scrape_ticker_engine = create_engine(f"sqlite:///{self.scrape_ticker_db_file_path}")
+        # Create engines for each database with its SQLite pragma profile applied on connect
+        self.sqlite_settings = {}
+        self.scrape_engine = self._create_engine("scrape", self.scrape_db_file_path)
+        self.users_engine = self._create_engine("users", self.users_db_file_path)
+        self.api_keys_engine = self._create_engine("api_keys", self.api_keys_db_file_path)
+        self.polygon_stocks_engine = self._create_engine("polygon_stocks", self.polygon_stocks_db_file_path)
+        self.jobs_schedule_engine = self._create_engine("jobs_schedule", self.jobs_schedule_db_file_path)
+        self.scrape_ticker_engine = self._create_engine("scrape_ticker", self.scrape_ticker_db_file_path)
+
+        # Registry of engines keyed by database name
+        self.engines = {
+            "scrape": self.scrape_engine,
+            "users": self.users_engine,
+            "api_keys": self.api_keys_engine,
+            "polygon_stocks": self.polygon_stocks_engine,
+            "jobs_schedule": self.jobs_schedule_engine,
+            "scrape_ticker": self.scrape_ticker_engine,
+        }
+        self._report_sqlite_settings()
 
         # Load or generate encryption key
         self.cipher, self.encryption_key = self._initialize_encryption()
 
         # Define the stocks and api_keys tables
-        self.stocks, self.api_keys, self.users, self.stocks_scrape, self.jobs_schedule, self.ticker_scrape = self.schema_manager.define_tables()
+        (
+            self.stocks,
+            self.api_keys,
+            self.users,
+            self.stocks_scrape,
+            self.jobs_schedule,
+            self.ticker_scrape,
+            self.stocks_scrape_latest,
+            self.stocks_latest,
+            self.stocks_scrape_rollup,
+            self.scrape_tickers,
+            self.scrape_industries,
+        ) = self.schema_manager.define_tables()
+
+        # Bring tables created by older releases up to the current shape before create_all
+        scrape_migrator = SchemaMigrator(self.scrape_engine, self.schema_manager.scrape_metadata)
 
         # Create the tables if they do no exist
         self.schema_manager.scrape_metadata.create_all(bind=self.scrape_engine)
@@ -45,6 +107,10 @@ class DBManager:
         self.schema_manager.polygon_stocks_metadata.create_all(bind=self.polygon_stocks_engine)
         self.schema_manager.jobs_schedule_metadata.create_all(bind=self.jobs_schedule_engine)
         self.schema_manager.scrape_ticker_metadata.create_all(bind=self.scrape_ticker_engine)
+        # A legacy stocks_scrape gains its dimension id columns here; the names move over in migrate_scrape_dimensions
+        scrape_migrator.add_missing_columns(self.stocks_scrape)
+        scrape_migrator.add_missing_columns(self.stocks_scrape_latest)
+        scrape_migrator.ensure_indexes()
         logger.debug("Tables created successfully, if they didn't exist.")
 
         # Create sessions
@@ -55,16 +121,142 @@ class DBManager:
         self.jobs_schedule_session = sessionmaker(bind=self.jobs_schedule_engine)
         self.scrape_ticker_session = sessionmaker(bind=self.scrape_ticker_engine)
         
+        # Optionally serve the API list endpoints from a read-only snapshot refreshed after each ingest batch
+        self.read_snapshot = None
+        if read_snapshot_enabled():
+            self.read_snapshot = ReadSnapshotManager(
+                {
+                    "scrape": self.scrape_db_file_path,
+                    "polygon_stocks": self.polygon_stocks_db_file_path,
+                    "scrape_ticker": self.scrape_ticker_db_file_path,
+                },
+                os.path.join("db", "read_snapshot.db"),
+            )
+        read_session = self.read_snapshot.Session if self.read_snapshot else None
+        # Per-database change counters that let the API reuse serialized responses until the next ingest
+        self.data_versions = DataVersions(self.engines)
+        # In-process fan-out of committed changes to the API's Server-Sent Events clients
+        self.event_broker = EventBroker()
+        self._event_scrape_cursor = None
+        # Serializes read, publish and advance of the push cursor between concurrent scrape ingests
+        self._event_scrape_lock = threading.Lock()
+
         # Initialize managers 
-        self.job_manager = JobManager(self.jobs_schedule_session, self.jobs_schedule)
+        self.job_manager = JobManager(
+            self.jobs_schedule_session, self.jobs_schedule, self.event_broker,
+            on_change=lambda: self.publish_data_change("jobs_schedule"),
+        )
         self.api_key_manager = ApiKeyManager(self.api_keys_session, self.api_keys, self.cipher)
-        self.stock_manager = StockManager(self.polygon_stocks_session, self.scrape_session, self.stocks, self.stocks_scrape)
+        self.stock_manager = StockManager(
+            self.polygon_stocks_session, self.scrape_session, self.stocks, self.stocks_scrape, self.stocks_latest, read_session=read_session
+        )
         self.user_manager = UserManager(self.users_session, self.users)
-        self.scrape_manager = ScrapeManager(self.scrape_session, self.scrape_ticker_session, self.stocks_scrape, self.ticker_scrape)
+        self.scrape_manager = ScrapeManager(
+            self.scrape_session,
+            self.scrape_ticker_session,
+            self.stocks_scrape,
+            self.ticker_scrape,
+            self.stocks_scrape_latest,
+            self.scrape_tickers,
+            self.scrape_industries,
+            read_session=read_session,
+            legacy_names=scrape_migrator.has_column(self.stocks_scrape.name, "company_name"),
+        )
+        self.rollup_manager = RollupManager(self.scrape_session, self.stocks_scrape, self.stocks_scrape_rollup)
+        self.retention_manager = RetentionManager(
+            self.scrape_session, self.scrape_engine, self.stocks_scrape, self.rollup_manager, migrator=scrape_migrator
+        )
+        # DuckDB analytics connects lazily on the first query, so it costs nothing unless used
+        self.analytics_manager = AnalyticsManager(
+            {
+                "scrape": self.scrape_db_file_path,
+                "polygon_stocks": self.polygon_stocks_db_file_path,
+                "scrape_ticker": self.scrape_ticker_db_file_path,
+            },
+            os.path.join("db", "analytics"),
+        )
         
         # Initialize default users
         self.initialize_default_users()
 
+        # Populate the latest-snapshot tables from history if they have never been built
+        self.scrape_manager.ensure_latest_stock_scrapes()
+        self.stock_manager.ensure_latest_stock_prices()
+
+        # Small tables switch to epoch millisecond time keys at startup; stocks_scrape history converts in the background
+        self.scrape_migrator = scrape_migrator
+        self.scrape_migrator.convert_text_times_to_epoch_ms(self.stocks_scrape_latest, ["timestamp"])
+        scrape_ticker_migrator = SchemaMigrator(self.scrape_ticker_engine, self.schema_manager.scrape_ticker_metadata)
+        scrape_ticker_migrator.convert_text_times_to_epoch_ms(self.ticker_scrape, ["created_at", "updated_at"])
+        scrape_ticker_migrator.ensure_indexes()
+        # Startup may have rebuilt or converted the hot tables, so publish them before the API starts reading
+        self.refresh_read_snapshot()
+        # Event stream pushes of scrape batches start from the rows already stored
+        self._event_scrape_cursor = self.scrape_manager.get_last_ingest_stamp()
+
+    def refresh_read_snapshot(self, *db_names):
+        # Copy the hot tables of the given databases (all when none are given) into the read snapshot, if enabled
+        if self.read_snapshot is None:
+            return None
+        return self.read_snapshot.refresh(db_names or None)
+
+    def publish_data_change(self, *db_names):
+        # Called after an ingest commits: refresh the read snapshot first so a new data version never serves old rows
+        self.refresh_read_snapshot(*db_names)
+        versions = self.data_versions.bump(db_names)
+        if "scrape" in db_names:
+            self._push_scrape_batch(versions[db_names.index("scrape")])
+        return versions
+
+    def push_event(self, event, build_payload):
+        # Push a committed change to event stream clients; the payload is only built when someone is listening
+        if not self.event_broker.has_subscribers():
+            return 0
+        return self.event_broker.publish(event, build_payload())
+
+    def _push_scrape_batch(self, version):
+        # Push the latest rows changed since the previous push, in the same shape as /api/stock_scrapes?since=
+        # Held across the whole sequence, so two ingests never push the same rows or move the cursor backwards
+        with self._event_scrape_lock:
+            if self._event_scrape_cursor is None or not self.event_broker.has_subscribers():
+                # Nobody to send to, so only move the cursor; the next listener's first push is one batch, not the table
+                self._event_scrape_cursor = self.scrape_manager.get_last_ingest_stamp()
+                return
+            changes = self.scrape_manager.get_stock_scrapes_since(self._event_scrape_cursor)
+            if changes is None:
+                return
+            self._event_scrape_cursor = changes["cursor"]
+            self.event_broker.publish("scrape_batch", dict(changes, version=version))
+
+    def migrate_scrape_dimensions(self, pause_seconds=0.05):
+        # Move legacy stocks_scrape names into the dimension tables in short transactions while the app keeps serving
+        # Reads fall back to the legacy columns until a row is converted, so nothing derived from history changes
+        return self.scrape_migrator.migrate_scrape_dimensions(self.stocks_scrape, pause_seconds=pause_seconds)
+
+    def migrate_scrape_timestamps(self, pause_seconds=0.05):
+        # Convert stocks_scrape history to epoch milliseconds in short transactions while the app keeps serving
+        converted = self.scrape_migrator.convert_text_times_to_epoch_ms(self.stocks_scrape, ["timestamp"], pause_seconds=pause_seconds)
+        if converted:
+            # Text and integer keys do not compare chronologically, so rebuild anything derived while both existed
+            self.scrape_manager.rebuild_latest_stock_scrapes()
+            self.publish_data_change("scrape")
+        return converted
+
+    def _create_engine(self, db_name, db_file_path):
+        # Create a SQLite engine and attach the pragma profile configured for this database
+        profile_name, pragmas = resolve_profile(db_name)
+        engine = create_engine(f"sqlite:///{db_file_path}")
+        apply_pragmas(engine, pragmas)
+        self.sqlite_settings[db_name] = {"profile": profile_name, "requested": pragmas}
+        return engine
+
+    def _report_sqlite_settings(self):
+        # Log the pragma values SQLite actually applied for each database
+        for db_name, engine in self.engines.items():
+            settings = self.sqlite_settings[db_name]
+            settings["effective"] = read_effective_pragmas(engine, settings["requested"].keys())
+            logger.info(f"SQLite profile '{settings['profile']}' for {db_name}: {settings['effective']}")
+
     def _initialize_encryption(self):
         # Initialize encryption by loading or generating an encryption key
         key_file_path = "encrypt_key.txt" # File path to store the encryption key
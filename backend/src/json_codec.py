@@ -0,0 +1,42 @@
+# json_codec.py
+import json
+from datetime import date, datetime, timezone
+import logging
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library encoder writes the same JSON, only slower
+    orjson = None
+
+# Name of the encoder in use, reported with the serialization metrics
+ENCODER = "orjson" if orjson is not None else "json"
+
+
+def _default(value):
+    # Datetimes are ISO 8601 like orjson writes them; naive values are UTC throughout this app
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    # Serialize to compact UTF-8 JSON bytes, with datetimes as ISO 8601 in UTC
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS)
+        except TypeError as e:
+            # orjson rejects a few values the standard library accepts, such as integers wider than 64 bits
+            logger.debug(f"orjson could not serialize a payload, using the standard library: {e}")
+    return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def loads(data):
+    # Parse JSON from str or bytes
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
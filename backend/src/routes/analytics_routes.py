@@ -0,0 +1,129 @@
+# routes/analytics_routes.py
+from flask import Blueprint, request, jsonify, current_app
+from ..db_manager import DBManager
+from ..db_management.time_keys import to_epoch_ms
+import jwt
+from  functools import wraps
+import logging
+logger = logging.getLogger(__name__)
+
+# Initialize Blueprint
+analytics_bp = Blueprint('analytics', __name__)
+
+# Initialize db_manager
+db_manager = DBManager()
+
+# Token protection decorator
+def token_required(f):
+    # Decorator to enforce authentication on routes by requiring a valid JWT token in request headers
+    @wraps(f) # Preserve the original function’s metadata
+    def decorated(*args, **kwargs):
+        # Retrieve the token from the 'Authorization' header in the request
+        token = request.headers.get('Authorization')
+        
+        # Check if the token is missing
+        if not token:
+            # Return a 403 error if the token is not provided
+            return jsonify({'error': 'Token is missing!'}), 403
+        
+        try:
+            # Remove 'Bearer ' prefix if it exists in the token
+            if token.startswith('Bearer '):
+                token = token.split(" ")[1]  # Extract the actual token string
+                
+            # Decode the token using the app's secret key and the HS256 algorithm
+            decoded_token = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
+            
+            # Attach the decoded token data to the request object for access in the protected route
+            request.user = decoded_token
+        except jwt.ExpiredSignatureError:
+            # Handle the error if the token has expired
+            return jsonify({'error': 'Token is expired'}), 401
+        except jwt.InvalidTokenError:
+            # Handle the error if the token is invalid
+            return jsonify({'error': 'Invalid Token'}), 403
+        # Call the original function if the token is valid
+        return f(*args, **kwargs)
+    
+    # Return the decorated function with token validation applied
+    return decorated
+
+def split_param(name, default=None):
+    # Split a comma separated query parameter into a list of non-empty values
+    value = request.args.get(name)
+    if value is None:
+        return default
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def as_of_param():
+    # Parse as_of given as epoch milliseconds or an ISO 8601 date/datetime (UTC)
+    value = request.args.get('as_of')
+    if value is None:
+        return None
+    return int(value) if value.isdigit() else to_epoch_ms(value)
+
+def limit_param(default):
+    # Row limit for analytics responses, capped so one request cannot return the whole table
+    return max(1, min(request.args.get('limit', default=default, type=int), 5000))
+
+def run_ranks():
+    metric = request.args.get('metric')
+    if not metric:
+        raise ValueError("metric is required")
+    return db_manager.analytics_manager.cross_sectional_ranks(
+        metric,
+        group_by=request.args.get('group_by'),
+        limit=limit_param(50),
+        ascending=request.args.get('order', 'desc') == 'asc',
+    )
+
+def run_returns():
+    return db_manager.analytics_manager.returns(
+        periods=split_param('periods', [1, 5, 21]),
+        tickers=split_param('tickers'),
+        as_of=as_of_param(),
+        source=request.args.get('source', 'daily'),
+    )
+
+def run_fundamentals():
+    columns = split_param('columns')
+    if not columns:
+        raise ValueError("columns is required")
+    return db_manager.analytics_manager.fundamentals_with_returns(
+        columns,
+        periods=split_param('periods', [21]),
+        as_of=as_of_param(),
+        source=request.args.get('source', 'daily'),
+        sort=request.args.get('sort'),
+        limit=limit_param(100),
+    )
+
+# Fixed analytical queries exposed by the endpoint; clients choose parameters, never SQL
+ANALYTICS_QUERIES = {
+    'ranks': run_ranks,
+    'returns': run_returns,
+    'fundamentals': run_fundamentals,
+}
+
+@analytics_bp.route('/api/analytics/<string:query_name>', methods=["GET"])
+@token_required
+def get_analytics(query_name):
+    # Run one of the read-only DuckDB analytical queries and return its rows as JSON
+    query = ANALYTICS_QUERIES.get(query_name)
+    if query is None:
+        return jsonify({"error": f"Unknown analytics query '{query_name}'"}), 404
+    try:
+        return jsonify(query()), 200
+    except ValueError as e:
+        # Invalid metric, column, period or sort parameter
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        # DuckDB is not installed or the Parquet mirror has not been built yet
+        logger.error(f"Analytics unavailable: {e}")
+        return jsonify({"error": "Analytics is not available"}), 503
+    except Exception as e:
+        # Log any error that occurs during the query
+        logger.error(f"Error running analytics query '{query_name}': {e}")
+        
+        # Return a JSON error response with a 500 status code if an exception occurs
+        return jsonify({"error": "Unable to run analytics query"}), 500
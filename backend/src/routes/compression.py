@@ -0,0 +1,123 @@
+# routes/compression.py
+import gzip
+import threading
+import time
+from collections import OrderedDict
+from flask import g, request
+import logging
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+# Response types worth compressing; event streams are excluded because they are streamed
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/csv", "text/plain", "text/html"}
+
+
+class ResponseCompressor:
+    def __init__(self, min_size=1024, gzip_level=6, brotli_quality=5, cache_entries=256):
+        # Compress response bodies of at least min_size bytes with the best encoding the client accepts
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = ["br", "gzip"] if brotli is not None else ["gzip"]
+        # Compressed bodies keyed by (ETag, encoding): an ETag names exact bytes, so response cache hits skip compression
+        self.cache_entries = cache_entries
+        self._compressed = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def init_app(self, app):
+        app.after_request(self.compress)
+        app.extensions["response_compressor"] = self
+
+    def _encode(self, body, encoding):
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def _cached_encode(self, body, encoding, etag):
+        # Compress a body, reusing the result for a body already compressed under the same ETag
+        if etag is None:
+            return self._encode(body, encoding), False
+        key = (etag, encoding)
+        with self._lock:
+            compressed = self._compressed.get(key)
+            if compressed is not None:
+                self._compressed.move_to_end(key)
+                return compressed, True
+        compressed = self._encode(body, encoding)
+        with self._lock:
+            self._compressed[key] = compressed
+            while len(self._compressed) > self.cache_entries:
+                self._compressed.popitem(last=False)
+        return compressed, False
+
+    def compress(self, response):
+        # after_request hook: negotiate Content-Encoding and report serialization and compression time in Server-Timing
+        started = time.perf_counter()
+        encoding = None
+        if (
+            response.mimetype in COMPRESSIBLE_MIMETYPES
+            and not response.direct_passthrough
+            and not response.is_streamed
+            and "Content-Encoding" not in response.headers
+        ):
+            response.vary.add("Accept-Encoding")
+            if 200 <= response.status_code < 300 and response.status_code != 204:
+                body = response.get_data()
+                if len(body) >= self.min_size:
+                    encoding = request.accept_encodings.best_match(self.encodings)
+                if encoding is not None:
+                    etag, _ = response.get_etag()
+                    compressed, reused = self._cached_encode(body, encoding, etag)
+                    response.set_data(compressed)
+                    response.headers["Content-Encoding"] = encoding
+                    if etag is not None:
+                        # Like other servers that compress on the fly, the encoded representation carries a weak validator
+                        response.set_etag(etag, weak=True)
+                    self._record(time.perf_counter() - started, len(body), len(compressed), reused)
+
+        timings = []
+        if "serialize_seconds" in g:
+            timings.append(f"serialize;dur={g.serialize_seconds * 1000:.3f}")
+        if encoding is not None:
+            timings.append(f"compress;dur={(time.perf_counter() - started) * 1000:.3f};desc={encoding}")
+        if timings:
+            response.headers["Server-Timing"] = ", ".join(timings)
+        return response
+
+    def _record(self, seconds, raw_size, compressed_size, reused):
+        route = request.endpoint
+        with self._lock:
+            stats = self._stats.get(route)
+            if stats is None:
+                stats = self._stats[route] = {"responses": 0, "reused": 0, "seconds": 0.0, "raw_bytes": 0, "compressed_bytes": 0}
+            stats["responses"] += 1
+            stats["reused"] += int(reused)
+            stats["seconds"] += seconds
+            stats["raw_bytes"] += raw_size
+            stats["compressed_bytes"] += compressed_size
+
+    def metrics(self):
+        # Compressed responses, time spent and bytes saved per route
+        with self._lock:
+            routes = {
+                str(route): {
+                    "responses": stats["responses"],
+                    "reused": stats["reused"],
+                    "total_ms": round(stats["seconds"] * 1000, 3),
+                    "raw_bytes": stats["raw_bytes"],
+                    "compressed_bytes": stats["compressed_bytes"],
+                    "ratio": round(stats["compressed_bytes"] / stats["raw_bytes"], 3) if stats["raw_bytes"] else None,
+                }
+                for route, stats in sorted(self._stats.items(), key=lambda item: str(item[0]))
+            }
+            return {
+                "encodings": list(self.encodings),
+                "min_size": self.min_size,
+                "cached_bodies": len(self._compressed),
+                "routes": routes,
+            }
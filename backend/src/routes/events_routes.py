@@ -0,0 +1,108 @@
+# routes/events_routes.py
+from flask import Blueprint, Response, request, jsonify, current_app
+from ..db_manager import DBManager
+from ..db_management.event_broker import EventBroker
+import jwt
+from  functools import wraps
+import os
+import queue
+import time
+import logging
+logger = logging.getLogger(__name__)
+
+# Seconds between keepalive comments on an idle stream, and the most streams served at once
+KEEPALIVE_SECONDS = 15
+EVENT_STREAM_LIMIT = int(os.environ.get("CLIPSE_EVENT_STREAM_LIMIT", "64"))
+
+# Initialize Blueprint
+events_bp = Blueprint('events', __name__)
+
+# Initialize db_manager
+db_manager = DBManager()
+
+# Token protection decorator
+def token_required(f):
+    # Decorator to enforce authentication on routes by requiring a valid JWT token in request headers
+    # EventSource cannot send headers, so the token may also be passed as the `token` query parameter
+    @wraps(f) # Preserve the original function’s metadata
+    def decorated(*args, **kwargs):
+        # Retrieve the token from the 'Authorization' header in the request
+        token = request.headers.get('Authorization') or request.args.get('token')
+        
+        # Check if the token is missing
+        if not token:
+            # Return a 403 error if the token is not provided
+            return jsonify({'error': 'Token is missing!'}), 403
+        
+        try:
+            # Remove 'Bearer ' prefix if it exists in the token
+            if token.startswith('Bearer '):
+                token = token.split(" ")[1]  # Extract the actual token string
+                
+            # Decode the token using the app's secret key and the HS256 algorithm
+            decoded_token = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
+            
+            # Attach the decoded token data to the request object for access in the protected route
+            request.user = decoded_token
+        except jwt.ExpiredSignatureError:
+            # Handle the error if the token has expired
+            return jsonify({'error': 'Token is expired'}), 401
+        except jwt.InvalidTokenError:
+            # Handle the error if the token is invalid
+            return jsonify({'error': 'Invalid Token'}), 403
+        # Call the original function if the token is valid
+        return f(*args, **kwargs)
+    
+    # Return the decorated function with token validation applied
+    return decorated
+
+def event_stream(expires_at):
+    # Yield the greeting, then pushed messages as they are published, until the client leaves, lags or its token expires
+    broker = db_manager.event_broker
+    # Subscribe before reading the greeting, so nothing committed after it is missed; subscribing here rather than
+    # in the view also means a response that is never iterated leaves no subscription behind
+    subscription = broker.subscribe()
+    try:
+        hello = {
+            "data_versions": db_manager.data_versions.snapshot(),
+            "scrape_cursor": db_manager.scrape_manager.get_last_ingest_stamp(),
+        }
+        # Ask EventSource to reconnect after 5s if the connection drops
+        yield b"retry: 5000\n\n"
+        yield EventBroker.encode("hello", hello)
+        while True:
+            if broker.is_lagging(subscription):
+                # Messages were dropped, so the client must refetch over REST before it can trust pushes again
+                yield EventBroker.encode("resync", {"reason": "Client fell behind the event stream"})
+                return
+            if expires_at is not None and time.time() >= expires_at:
+                yield EventBroker.encode("token_expired", {})
+                return
+            try:
+                message = subscription.get(timeout=KEEPALIVE_SECONDS)
+            except queue.Empty:
+                # Comment lines keep proxies from closing an idle stream and expose disconnected clients on write
+                yield b": keepalive\n\n"
+                continue
+            yield message
+    finally:
+        broker.unsubscribe(subscription)
+
+@events_bp.route('/api/events', methods=["GET"])
+@token_required
+def get_events():
+    # Server-Sent Events stream of scrape batches, Polygon bars and job status changes as they are committed
+    # Each stream holds one server thread, so the number of concurrent streams is capped
+    if db_manager.event_broker.metrics()["subscribers"] >= EVENT_STREAM_LIMIT:
+        return jsonify({"error": "Too many event streams; poll the REST endpoints instead"}), 503
+    return Response(
+        event_stream(request.user.get("exp")),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@events_bp.route('/api/events/metrics', methods=["GET"])
+@token_required
+def get_events_metrics():
+    # Report connected event stream clients, messages published and clients dropped for lagging
+    return jsonify(db_manager.event_broker.metrics()), 200
@@ -2,6 +2,8 @@
 from flask import Blueprint, request, jsonify, current_app
 from ..db_manager import DBManager
 from ..data_ingest.polygon_stock_fetcher import PolygonStockFetcher
+from ..db_management.list_query import ListQuery
+from .response_cache import cached_json_response, page_total
 import jwt
 from datetime import datetime, timezone
 from  functools import wraps
@@ -137,16 +139,27 @@ def schedule_job():
 @jobs_bp.route("/api/jobs_schedule", methods=["GET"])
 @token_required
 def get_jobs_schedule():
+    # Optional fields=, sort=, limit= and offset= select the columns, order and page that are read
     try:
-        # Fetch job schedules from the database
-        jobs_schedule_data = db_manager.job_manager.select_all_job_schedules()
+        list_query = ListQuery.from_args(request.args, db_manager.job_manager.job_schedules_select())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        # Serve job schedules from the response cache until the next job schedule write
+        response = cached_json_response(
+            "jobs_schedule",
+            ("jobs_schedule",),
+            lambda: db_manager.job_manager.select_all_job_schedules(list_query),
+            page_total(list_query, db_manager.job_manager.count_job_schedules),
+        )
         
-        # Check if data is retrieved
-        if not jobs_schedule_data:
+        # Check if data is retrieved; empty lists are never cached, so they always come back as a fresh body
+        # A page past the end is an empty list, not a missing resource
+        if response.status_code == 200 and response.get_data() == b"[]" and not list_query.offset:
             return jsonify({"message": "No job schedules found"}), 404
         
-        # Return the job schedules data as JSON
-        return jsonify(jobs_schedule_data), 200
+        # Return the cached or freshly serialized job schedules
+        return response
     except Exception as e:
         # Print error to server logs and return an error response to the client
         logger.error(f"Error retrieving Job Schedules: {e}")
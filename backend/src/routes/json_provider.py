@@ -0,0 +1,61 @@
+# routes/json_provider.py
+import threading
+import time
+from flask import g, has_request_context, request
+from flask.json.provider import JSONProvider
+from .. import json_codec
+import logging
+logger = logging.getLogger(__name__)
+
+
+class FastJSONProvider(JSONProvider):
+    # Flask JSON provider on json_codec, so jsonify and request.get_json use orjson when it is installed
+    # Responses are always compact and dates are ISO 8601 in UTC; serialization time is recorded per route
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def dumps(self, obj, **kwargs):
+        return json_codec.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return json_codec.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Build the response from the encoder's bytes directly instead of round-tripping through str
+        obj = self._prepare_response_obj(args, kwargs)
+        started = time.perf_counter()
+        body = json_codec.dumps(obj)
+        self._record(time.perf_counter() - started, len(body))
+        return self._app.response_class(body, mimetype="application/json")
+
+    def _record(self, seconds, size):
+        # Attribute serialization time to the route being served; the response compressor reports it in Server-Timing
+        route = request.endpoint if has_request_context() else None
+        if has_request_context():
+            g.serialize_seconds = g.get("serialize_seconds", 0.0) + seconds
+        with self._lock:
+            stats = self._stats.get(route)
+            if stats is None:
+                stats = self._stats[route] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "bytes": 0}
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["bytes"] += size
+
+    def metrics(self):
+        # Serialization calls, time and output size per route
+        with self._lock:
+            routes = {
+                str(route): {
+                    "calls": stats["calls"],
+                    "total_ms": round(stats["seconds"] * 1000, 3),
+                    "avg_ms": round(stats["seconds"] * 1000 / stats["calls"], 3),
+                    "max_ms": round(stats["max_seconds"] * 1000, 3),
+                    "bytes": stats["bytes"],
+                }
+                for route, stats in sorted(self._stats.items(), key=lambda item: str(item[0]))
+            }
+        return {"encoder": json_codec.ENCODER, "routes": routes}
@@ -0,0 +1,112 @@
+# routes/response_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import request, jsonify, current_app
+from ..db_manager import DBManager
+import logging
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    def __init__(self, max_entries=4096, max_bytes=64 * 1024 * 1024):
+        # Serialized JSON bodies keyed by request path, each tagged with the data version it was built from
+        # A paged body is stored with the size of the whole list, so hits and 304s skip the count query
+        # Both bounds evict least recently used bodies; screener pages make the key space client-driven
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def _count(self, route, counter):
+        counters = self._counters.get(route)
+        if counters is None:
+            counters = self._counters[route] = {"hits": 0, "misses": 0, "not_modified": 0}
+        counters[counter] += 1
+
+    def get(self, route, cache_key, version):
+        # Return (etag, body, total) if the cached body was built from the current data version, else None
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(cache_key)
+                self._count(route, "hits")
+                return entry[1], entry[2], entry[3]
+            self._count(route, "misses")
+            return None
+
+    def put(self, cache_key, version, body, total=None):
+        # Store a serialized body and its list total under their data version and return (etag, body, total)
+        # The tag hashes the exact bytes served, so it is a strong validator and survives no-op ingests
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        with self._lock:
+            replaced = self._entries.pop(cache_key, None)
+            if replaced is not None:
+                self._bytes -= len(replaced[2])
+            self._entries[cache_key] = (version, etag, body, total)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or (self._bytes > self.max_bytes and len(self._entries) > 1):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[2])
+        return etag, body, total
+
+    def record_not_modified(self, route):
+        with self._lock:
+            self._count(route, "not_modified")
+
+    def metrics(self):
+        # Hit, miss and 304 counts per route plus the number of cached bodies and their size
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "routes": {route: dict(counters) for route, counters in sorted(self._counters.items())},
+            }
+
+
+db_manager = DBManager()
+
+# Serialized list payloads shared by the API blueprints, reused until a write bumps the data version they were built from
+response_cache = ResponseCache()
+
+
+def page_total(list_query, count_rows):
+    # Paged responses carry the size of the whole list, so clients can render page controls without a second call
+    # Returns the counter for cached_json_response, or None when the request is not paged
+    return count_rows if list_query.limit is not None else None
+
+
+def cached_json_response(route, db_names, load_payload, count_total=None):
+    # Serve a JSON payload from the response cache with a strong ETag, answering If-None-Match with 304
+    # Read the version before the data, so a concurrent ingest can only make the cached entry older, never newer
+    # count_total, when given, runs once per cached body and is sent as X-Total-Count
+    version = db_manager.data_versions.current(db_names)
+    cache_key = request.full_path
+    entry = response_cache.get(route, cache_key, version)
+    if entry is None:
+        payload = load_payload()
+        if payload is None:
+            return None
+        body = jsonify(payload).get_data()
+        total = count_total() if count_total is not None else None
+        if not payload:
+            # Managers return empty results on errors too, so those are never pinned in the cache
+            response = current_app.response_class(body, mimetype="application/json")
+            if total is not None:
+                response.headers["X-Total-Count"] = str(total)
+            return response
+        entry = response_cache.put(cache_key, version, body, total)
+    etag, body, total = entry
+    if request.if_none_match.contains_weak(etag):
+        response_cache.record_not_modified(route)
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+    # Browsers keep the body but revalidate on every poll
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
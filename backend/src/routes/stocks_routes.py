@@ -1,6 +1,10 @@
 # routes/stocks_routes.py
 from flask import Blueprint, request, jsonify, current_app
 from ..db_manager import DBManager
+from ..db_management.resilience import retry_metrics
+from ..db_management.list_query import ListQuery
+from ..db_management.screener_query import ScreenerQuery
+from .response_cache import response_cache, cached_json_response, page_total
 import jwt
 from  functools import wraps
 import logging
@@ -15,6 +19,9 @@ stocks_bp = Blueprint('stocks', __name__)
 # Initialize db_manager
 db_manager = DBManager()
 
+# Page size of screener responses when the client does not pass limit=
+SCREENER_PAGE_SIZE = 50
+
 # Token protection decorator
 def token_required(f):
     # Decorator to enforce authentication on routes by requiring a valid JWT token in request headers
@@ -54,12 +61,19 @@ def token_required(f):
 @token_required
 def get_stocks():
     # Retrieve recent stock prices and return them as a JSON response
+    # Optional fields=, sort=, limit= and offset= select the columns, order and page that are read
     try:
-        # Call the stock manager to fetch recent stock prices
-        stocks_data = db_manager.stock_manager.get_recent_stock_prices()
-        
-        # Return the stock data as a JSON response with a 200 status code
-        return jsonify(stocks_data), 200
+        list_query = ListQuery.from_args(request.args, db_manager.stock_manager.recent_stock_prices_select())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        # Serve the recent stock prices from the response cache until the next Polygon ingest
+        return cached_json_response(
+            "stocks",
+            ("polygon_stocks",),
+            lambda: db_manager.stock_manager.get_recent_stock_prices(list_query),
+            page_total(list_query, db_manager.stock_manager.count_recent_stock_prices),
+        )
     except Exception as e:
         # Log any error that occurs during data retrieval
         logger.error(f"Error retrieving stock data: {e}")
@@ -93,11 +107,34 @@ def get_stock_by_ticker(ticker_symbol):
 @token_required
 def get_stock_scrapes():
     # Retrieve recent stock scrapes and return them as a JSON response
+    # With ?since=<cursor> only tickers whose latest row changed after the cursor are returned, with the next cursor
+    # Otherwise optional fields=, sort=, limit= and offset= select the columns, order and page that are read
+    since = request.args.get("since")
+    try:
+        list_query = ListQuery.from_args(request.args, db_manager.scrape_manager.recent_stock_scrapes_select())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if since is not None and not list_query.is_default:
+        return jsonify({"error": "since cannot be combined with fields, sort, limit or offset"}), 400
     try:
-        # Call the stock manager to fetch recent stock scrapes
-        stock_scrapes_data = db_manager.scrape_manager.get_recent_stock_scrapes()
-        # Return the stock scrapes data as a JSON response with a 200 status code
-        return jsonify(stock_scrapes_data), 200
+        if since is not None:
+            try:
+                cursor = int(since)
+            except ValueError:
+                return jsonify({"error": "since must be a cursor returned by this endpoint"}), 400
+            response = cached_json_response(
+                "stock_scrapes_since", ("scrape",), lambda: db_manager.scrape_manager.get_stock_scrapes_since(cursor)
+            )
+            if response is None:
+                return jsonify({"error": "Unable to retrieve stock scrapes"}), 500
+            return response
+        # Serve the recent stock scrapes from the response cache until the next scrape ingest
+        return cached_json_response(
+            "stock_scrapes",
+            ("scrape",),
+            lambda: db_manager.scrape_manager.get_recent_stock_scrapes(list_query),
+            page_total(list_query, db_manager.scrape_manager.count_recent_stock_scrapes),
+        )
     except Exception as e:
         # Log any error that occurs during data retrieval
         logger.error(f"Error retrieving stock scrapes: {e}")
@@ -127,21 +164,88 @@ def get_stock_scrape_by_ticker(ticker_symbol):
         # Return a JSON error response with a 500 status code if an exception occurs
         return jsonify({"error": f"Unable to retrieve stock scrape data"}), 500
 
+@stocks_bp.route('/api/read_snapshot/metrics', methods=["GET"])
+@token_required
+def get_read_snapshot_metrics():
+    # Report how stale the read snapshot serving the list endpoints is
+    if db_manager.read_snapshot is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify(db_manager.read_snapshot.metrics()), 200
+
+@stocks_bp.route('/api/response_cache/metrics', methods=["GET"])
+@token_required
+def get_response_cache_metrics():
+    # Report response cache hits, misses and 304s per route along with the current data versions
+    return jsonify(dict(response_cache.metrics(), data_versions=db_manager.data_versions.snapshot())), 200
+
+@stocks_bp.route('/api/db/retry_metrics', methods=["GET"])
+@token_required
+def get_retry_metrics():
+    # Report per-method retry counts and backoff wait caused by SQLite lock contention
+    return jsonify(retry_metrics()), 200
+
+@stocks_bp.route('/api/serialization/metrics', methods=["GET"])
+@token_required
+def get_serialization_metrics():
+    # Report JSON serialization time and size, and compression time and savings, per route
+    return jsonify({
+        "json": current_app.json.metrics(),
+        "compression": current_app.extensions["response_compressor"].metrics(),
+    }), 200
+
+def parse_time_param(value):
+    # Parse a query parameter given as epoch milliseconds or an ISO 8601 date/datetime
+    if value is None:
+        return None
+    if value.isdigit():
+        return int(value)
+    return datetime.fromisoformat(value)
+
+@stocks_bp.route('/api/stock_scrapes/<string:ticker_symbol>/bars', methods=["GET"])
+@token_required
+def get_stock_scrape_bars(ticker_symbol):
+    # Retrieve OHLCV rollup bars for a ticker; the resolution is picked from the window unless given
+    try:
+        start = parse_time_param(request.args.get('start'))
+        end = parse_time_param(request.args.get('end'))
+        resolution = request.args.get('resolution')
+        max_points = request.args.get('max_points', default=500, type=int)
+    except ValueError:
+        return jsonify({"error": "Invalid start or end parameter"}), 400
+    
+    try:
+        # Call the rollup manager to fetch bars covering the requested window
+        bars_data = db_manager.rollup_manager.get_rollup_bars(ticker_symbol, start, end, resolution, max_points)
+        
+        # Return the bars as a JSON response with a 200 status code
+        return jsonify(bars_data), 200
+    except ValueError as e:
+        # Unknown resolution requested
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        # Log any error that occurs during data retrieval
+        logger.error(f"Error retrieving rollup bars for ticker symbol '{ticker_symbol}': {e}")
+        
+        # Return a JSON error response with a 500 status code if an exception occurs
+        return jsonify({"error": "Unable to retrieve rollup bars"}), 500
+
 @stocks_bp.route('/api/scrape_ticker_stats/<string:ticker_symbol>', methods=["GET"])
 @token_required
 def get_stock_scrape_ticker_stats(ticker_symbol):
         # Retrieve stock scrape data for a specific ticker symbol and return it as a JSON response
     try:
-        # Call the stock manager to fetch data for the specified ticker symbol
-        stock_scrape_data = db_manager.scrape_manager.get_scrape_ticker_stats(ticker_symbol)
+        # Serve the ticker's stats from the response cache until the next ticker data merge
+        response = cached_json_response(
+            "scrape_ticker_stats", ("scrape_ticker",), lambda: db_manager.scrape_manager.get_scrape_ticker_stats(ticker_symbol)
+        )
         
         # Check if any data was returned for the ticker symbol
-        if stock_scrape_data is None:
+        if response is None:
             # Return a 404 error if no data was found
             return jsonify({"error": f"No Data found for ticker symbol '{ticker_symbol}'"}), 404
         
-        # Return the stock scrape data as a JSON response with a 200 status code
-        return jsonify(stock_scrape_data), 200
+        # Return the cached or freshly serialized stock scrape data
+        return response
     except Exception as e:
         # Log any error that occurs during data retrieval
         logger.error(f"Error retrieving stock scrape data for ticker symbol '{ticker_symbol}': {e}")
@@ -149,6 +253,35 @@ def get_stock_scrape_ticker_stats(ticker_symbol):
         # Return a JSON error response with a 500 status code if an exception occurs
         return jsonify({"error": f"Unable to retrieve stock scrape data"}), 500
     
+@stocks_bp.route('/api/screener', methods=["GET"])
+@token_required
+def screen_tickers():
+    # Screen the ticker_scrape metrics server side and return one page of matches as a JSON response
+    # e.g. ?where=pe_forward < 15 AND sector = 'Technology' AND dividend_yield > 2&sort=-free_cash_flow_yield
+    # fields=, sort=, limit= (default 50) and offset= work as on the other list endpoints; X-Total-Count counts all matches
+    try:
+        screener_query = ScreenerQuery(request.args.get("where"), db_manager.scrape_manager.screener_columns())
+        list_query = ListQuery.from_args(
+            request.args, db_manager.scrape_manager.screener_select(), default_limit=SCREENER_PAGE_SIZE
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        # Serve screens from the response cache until the next stock analysis merge
+        response = cached_json_response(
+            "screener",
+            ("scrape_ticker",),
+            lambda: db_manager.scrape_manager.screen_ticker_stats(screener_query, list_query),
+            page_total(list_query, lambda: db_manager.scrape_manager.count_screened_ticker_stats(screener_query)),
+        )
+        if response is None:
+            return jsonify({"error": "Unable to run the screener"}), 500
+        return response
+    except Exception as e:
+        # Log any error that occurs during the screen
+        logger.error(f"Error running the screener: {e}")
+        return jsonify({"error": "Unable to run the screener"}), 500
+
 @stocks_bp.route('/api/rss/marketwatch', methods=["GET"])
 @token_required
 def get_marketwatch_rss():
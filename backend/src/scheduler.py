@@ -610,5 +610,55 @@ class Scheduler:
         else:
             logger.info("A job is already scheduled for PM; no new job created.")
 
+    def run_retention_task(self):
+        # Apply the scrape retention policy; failures are logged so the next run can try again
+        try:
+            self.db_manager.retention_manager.run_retention()
+        except Exception as e:
+            logger.error(f"Error running scrape retention: {e}")
+
+    def add_retention_job(self):
+        # Run scrape retention daily at 06:30 UTC, outside NYSE hours and the ticker data jobs
+        trigger = CronTrigger(hour=6, minute=30, timezone=timezone.utc)
+        self.scheduler.add_job(self.run_retention_task, trigger=trigger, id="scrape-retention", replace_existing=True)
+        logger.info("Scheduled daily scrape retention job.")
+
+    def run_timestamp_migration_task(self):
+        # Convert legacy text timestamps to epoch milliseconds, then move legacy scrape names to dimension ids
+        # Timestamps go first because retention, rollups and the latest-snapshot rebuild key on them
+        # Both run in one job so they never compete for the write lock; each is a no-op once recorded
+        try:
+            self.db_manager.migrate_scrape_timestamps()
+        except Exception as e:
+            logger.error(f"Error migrating scrape timestamps: {e}")
+        try:
+            self.db_manager.migrate_scrape_dimensions()
+        except Exception as e:
+            logger.error(f"Error migrating scrape dimensions: {e}")
+
+    def add_timestamp_migration_job(self):
+        # Run the stocks_scrape time key migration once, shortly after startup
+        trigger = DateTrigger(run_date=datetime.now(timezone.utc) + timedelta(seconds=30))
+        self.scheduler.add_job(self.run_timestamp_migration_task, trigger=trigger, id="scrape-timestamp-migration", replace_existing=True)
+        logger.info("Scheduled stocks_scrape timestamp migration.")
+
+    def run_analytics_mirror_task(self):
+        # Rebuild the Parquet mirror the analytics endpoint reads; the previous files stay in use on failure
+        try:
+            self.db_manager.analytics_manager.build_parquet_mirror()
+        except Exception as e:
+            logger.error(f"Error building analytics Parquet mirror: {e}")
+
+    def add_analytics_mirror_job(self):
+        # Rebuild the mirror daily at 07:00 UTC after retention, and shortly after startup if it does not exist yet
+        if self.db_manager.analytics_manager.source != "parquet":
+            return
+        trigger = CronTrigger(hour=7, minute=0, timezone=timezone.utc)
+        self.scheduler.add_job(self.run_analytics_mirror_task, trigger=trigger, id="analytics-mirror", replace_existing=True)
+        if not self.db_manager.analytics_manager.mirror_exists():
+            trigger = DateTrigger(run_date=datetime.now(timezone.utc) + timedelta(seconds=60))
+            self.scheduler.add_job(self.run_analytics_mirror_task, trigger=trigger, id="analytics-mirror-initial", replace_existing=True)
+        logger.info("Scheduled daily analytics Parquet mirror job.")
+
 if __name__ == "__main__":
     logger.debug("Placeholder")
\ No newline at end of file
@@ -0,0 +1,66 @@
+# tools/analytics_check.py
+# Build the Parquet mirror of a database upgraded from text time keys and run every analytics query over it.
+# Upgraded databases keep DATETIME declared columns that now hold epoch milliseconds, which fresh ones never have.
+# Run from the backend folder with `python -m src.tools.analytics_check [--source sqlite]`
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+from ..db_manager import DBManager
+from ..db_management.analytics_manager import AnalyticsManager
+from .query_plan_check import seed
+
+# stocks_scrape as it was declared before the dimension tables and epoch millisecond time keys
+LEGACY_STOCKS_SCRAPE = """
+    CREATE TABLE stocks_scrape (
+        ticker_symbol VARCHAR NOT NULL, company_name VARCHAR, price FLOAT, change FLOAT, industry VARCHAR,
+        volume INTEGER, pe_ratio FLOAT, timestamp DATETIME NOT NULL,
+        PRIMARY KEY (ticker_symbol, timestamp)
+    )
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the analytics queries over an upgraded database.")
+    parser.add_argument("--tickers", type=int, default=200, help="Distinct tickers to seed")
+    parser.add_argument("--source", choices=["parquet", "sqlite"], default="parquet", help="Analytics source to query")
+    args = parser.parse_args()
+
+    # DBManager creates its databases relative to the working directory, so run in a scratch folder
+    os.chdir(tempfile.mkdtemp(prefix="analytics_check_"))
+    os.makedirs("db")
+    with sqlite3.connect(os.path.join("db", "nyse_scrape_data.db")) as conn:
+        conn.execute(LEGACY_STOCKS_SCRAPE)
+    db_manager = DBManager()
+    seed(db_manager, args.tickers, 24, 30, 0, 0)
+    db_manager.migrate_scrape_timestamps(pause_seconds=0)
+    db_manager.migrate_scrape_dimensions(pause_seconds=0)
+
+    analytics = AnalyticsManager(db_manager.analytics_manager.db_file_paths, db_manager.analytics_manager.mirror_dir, args.source)
+    if args.source == "parquet":
+        print(f"Mirror: {analytics.build_parquet_mirror()}")
+    checks = [
+        ("returns daily", lambda: analytics.returns(source="daily")),
+        ("returns scrape", lambda: analytics.returns(source="scrape")),
+        ("fundamentals", lambda: analytics.fundamentals_with_returns(["pe_forward"], source="scrape")),
+        ("ranks", lambda: analytics.cross_sectional_ranks("pe_forward", group_by="sector")),
+    ]
+    failures = 0
+    for label, check in checks:
+        try:
+            rows = check()
+        except Exception as e:
+            failures += 1
+            print(f"[FAIL] {label}: {e}")
+            continue
+        if not rows:
+            failures += 1
+            print(f"[FAIL] {label}: no rows")
+        else:
+            print(f"[ok] {label}: {len(rows)} rows")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
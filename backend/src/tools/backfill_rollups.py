@@ -0,0 +1,21 @@
+# tools/backfill_rollups.py
+# Build 15m, 1h and 1d OHLCV rollups from existing scrape history.
+# Run from the backend folder with `python -m src.tools.backfill_rollups [--start YYYY-MM-DD] [--end YYYY-MM-DD]`
+import argparse
+import logging
+import time
+from datetime import datetime
+from ..db_manager import DBManager
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill intraday OHLCV rollups from stocks_scrape.")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="First UTC day to roll up (defaults to the oldest scrape)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="Last UTC timestamp to roll up (defaults to the newest scrape)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db_manager = DBManager()
+
+    start_time = time.perf_counter()
+    bar_count = db_manager.rollup_manager.backfill_rollups(args.start, args.end)
+    print(f"Backfilled {bar_count} rollup bars in {time.perf_counter() - start_time:.2f}s")
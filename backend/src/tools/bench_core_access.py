@@ -0,0 +1,118 @@
+# tools/bench_core_access.py
+# Per-call overhead of the hot read queries: ORM session per call (the previous path) vs cached statements on Core connections.
+# Run from the backend folder with `python -m src.tools.bench_core_access --calls 2000`
+import argparse
+import os
+import tempfile
+import time
+from datetime import timedelta
+from sqlalchemy import select, bindparam
+from ..db_manager import DBManager
+from .query_plan_check import seed
+
+
+def session_call(session_factory, build_stmt, params):
+    # The previous read path: open a session, build and execute the statement, zip rows into dicts, close
+    session = session_factory()
+    try:
+        result = session.execute(build_stmt(**params))
+        column_names = list(result.keys())
+        return [dict(zip(column_names, row)) for row in result.fetchall()]
+    finally:
+        session.close()
+
+
+def bench_cases(db_manager, now, symbols):
+    # (label, session factory, reader, statement built with values, statement built with bind parameters, params)
+    api_keys = db_manager.api_keys
+    users = db_manager.users
+    jobs = db_manager.jobs_schedule
+    ticker_scrape = db_manager.ticker_scrape
+    stocks = db_manager.stocks
+    scrape_manager = db_manager.scrape_manager
+    stock_manager = db_manager.stock_manager
+    job_columns = (jobs.c.job_type, jobs.c.service, jobs.c.frequency, jobs.c.scheduled_start_date)
+    latest = scrape_manager.scrape_latest
+    latest_columns = (
+        latest.c.ticker_symbol, latest.c.company_name, latest.c.price, latest.c.change,
+        latest.c.industry, latest.c.volume, latest.c.pe_ratio, latest.c.timestamp,
+    )
+    stock_columns = (
+        stocks.c.ticker_symbol, stocks.c.open_price, stocks.c.close_price,
+        stocks.c.highest_price, stocks.c.lowest_price, stocks.c.timestamp_end,
+    )
+    return [
+        (
+            "ApiKeyManager.select_api_key", db_manager.api_key_manager.Session, db_manager.api_key_manager.reader,
+            lambda service: select(api_keys.c.encrypted_api_key).where(api_keys.c.service == service),
+            lambda: select(api_keys.c.encrypted_api_key).where(api_keys.c.service == bindparam("service")),
+            {"service": "Polygon.io"},
+        ),
+        (
+            "UserManager.get_user_by_username", db_manager.user_manager.Session, db_manager.user_manager.reader,
+            lambda username: select(users).where(users.c.username == username),
+            lambda: select(users).where(users.c.username == bindparam("username")),
+            {"username": "user_0"},
+        ),
+        (
+            "JobManager.select_job_schedule", db_manager.job_manager.Session, db_manager.job_manager.reader,
+            lambda **values: select(jobs).where(*(column == values[column.name] for column in job_columns)),
+            lambda: select(jobs).where(*(column == bindparam(column.name) for column in job_columns)),
+            {"job_type": "job_3", "service": "Stock Analysis", "frequency": "daily", "scheduled_start_date": now + timedelta(hours=3)},
+        ),
+        (
+            "ScrapeManager.get_scrape_ticker_stats", scrape_manager.TickerScrapeReadSession, scrape_manager.ticker_scrape_reader,
+            lambda ticker_symbol: select(ticker_scrape).where(ticker_scrape.c.ticker_symbol == ticker_symbol),
+            lambda: select(ticker_scrape).where(ticker_scrape.c.ticker_symbol == bindparam("ticker_symbol")),
+            {"ticker_symbol": symbols[0]},
+        ),
+        (
+            "ScrapeManager.get_recent_stock_scrapes", scrape_manager.ReadSession, scrape_manager.latest_reader,
+            lambda: select(*latest_columns),
+            lambda: select(*latest_columns),
+            {},
+        ),
+        (
+            "StockManager.get_stock_data_by_ticker", stock_manager.Session, stock_manager.reader,
+            lambda ticker_symbol: select(*stock_columns).where(stocks.c.ticker_symbol == ticker_symbol),
+            lambda: select(*stock_columns).where(stocks.c.ticker_symbol == bindparam("ticker_symbol")),
+            {"ticker_symbol": symbols[0]},
+        ),
+    ]
+
+
+def time_calls(call, calls):
+    # Microseconds per call after one warm-up call
+    call()
+    start_time = time.perf_counter()
+    for _ in range(calls):
+        call()
+    return (time.perf_counter() - start_time) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ORM session reads with cached Core statement reads.")
+    parser.add_argument("--calls", type=int, default=2000, help="Calls per query and path")
+    parser.add_argument("--tickers", type=int, default=6000, help="Distinct tickers to seed")
+    args = parser.parse_args()
+
+    # DBManager creates its databases relative to the working directory, so run in a scratch folder
+    os.chdir(tempfile.mkdtemp(prefix="bench_core_access_"))
+    db_manager = DBManager()
+    now, symbols = seed(db_manager, args.tickers, scrape_batches=3, polygon_days=30, jobs=20, users=2)
+
+    print(f"{'query':42s} {'rows':>6s} {'session us':>11s} {'core us':>9s} {'speedup':>8s}")
+    for label, session_factory, reader, build_with_values, build_with_binds, params in bench_cases(db_manager, now, symbols):
+        expected = session_call(session_factory, build_with_values, params)
+        actual = reader.fetch_all(f"bench.{label}", build_with_binds, **params)
+        if expected != actual:
+            raise SystemExit(f"{label}: Core rows differ from session rows")
+        # Whole-table reads return thousands of rows, so they get proportionally fewer calls
+        calls = max(20, args.calls * 100 // max(len(actual), 100))
+        session_us = time_calls(lambda: session_call(session_factory, build_with_values, params), calls)
+        core_us = time_calls(lambda: reader.fetch_all(f"bench.{label}", build_with_binds, **params), calls)
+        print(f"{label:42s} {len(actual):>6d} {session_us:>11.1f} {core_us:>9.1f} {session_us / core_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# tools/bench_latest_scrapes.py
+# Compare the GROUP BY/max(timestamp) history query with the stocks_scrape_latest table.
+# Run from the backend folder with `python -m src.tools.bench_latest_scrapes --rows 10000000`
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+HISTORY_QUERY = """
+    SELECT s.ticker_symbol, s.company_name, s.price, s.change, s.industry, s.volume, s.pe_ratio, s.timestamp
+    FROM stocks_scrape s
+    JOIN (
+        SELECT ticker_symbol, max(timestamp) AS max_timestamp
+        FROM stocks_scrape
+        GROUP BY ticker_symbol
+    ) latest ON s.ticker_symbol = latest.ticker_symbol AND s.timestamp = latest.max_timestamp
+"""
+
+LATEST_QUERY = """
+    SELECT ticker_symbol, company_name, price, change, industry, volume, pe_ratio, timestamp
+    FROM stocks_scrape_latest
+"""
+
+
+def create_schema(conn):
+    # Mirror the stocks_scrape schema created by DBSchemaManager
+    conn.executescript("""
+        CREATE TABLE stocks_scrape (
+            ticker_symbol VARCHAR NOT NULL, company_name VARCHAR, price FLOAT, change FLOAT,
+            industry VARCHAR, volume FLOAT, pe_ratio FLOAT, timestamp DATETIME NOT NULL,
+            PRIMARY KEY (ticker_symbol, timestamp)
+        );
+        CREATE INDEX idx_stocks_scrape_timestamp_ticker ON stocks_scrape (ticker_symbol, timestamp);
+        CREATE TABLE stocks_scrape_latest (
+            ticker_symbol VARCHAR NOT NULL PRIMARY KEY, company_name VARCHAR, price FLOAT, change FLOAT,
+            industry VARCHAR, volume FLOAT, pe_ratio FLOAT, timestamp DATETIME NOT NULL
+        );
+    """)
+
+
+def seed(conn, rows, tickers):
+    # Insert batches of one row per ticker, 5 minutes apart, like the scrape job does
+    batches = max(rows // tickers, 1)
+    start = datetime(2024, 1, 2, 14, 30)
+    for batch in range(batches):
+        timestamp = (start + timedelta(minutes=5 * batch)).strftime("%Y-%m-%d %H:%M:%S.%f")
+        conn.executemany(
+            "INSERT INTO stocks_scrape VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (f"T{ticker:05d}", f"Company {ticker}", 100.0 + batch % 50, 0.5, "Industry", 1e6, 15.0, timestamp)
+                for ticker in range(tickers)
+            ),
+        )
+        if batch % 100 == 0:
+            conn.commit()
+            print(f"Seeded {(batch + 1) * tickers:,} rows...")
+    conn.commit()
+    conn.execute("INSERT INTO stocks_scrape_latest " + HISTORY_QUERY)
+    conn.commit()
+    return batches * tickers
+
+
+def time_query(conn, query, repeat):
+    # Return the best wall time over several runs and the number of rows returned
+    timings = []
+    row_count = 0
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        row_count = len(conn.execute(query).fetchall())
+        timings.append(time.perf_counter() - start_time)
+    return min(timings), row_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark stocks_scrape_latest against the history query.")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Number of history rows to seed")
+    parser.add_argument("--tickers", type=int, default=6000, help="Number of distinct tickers")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query; the best time is reported")
+    parser.add_argument("--db", help="SQLite file to use; defaults to a temporary file")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), "bench_latest_scrapes.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    if not conn.execute("SELECT name FROM sqlite_master WHERE name = 'stocks_scrape'").fetchone():
+        create_schema(conn)
+        seeded = seed(conn, args.rows, args.tickers)
+        print(f"Seeded {seeded:,} history rows into {db_path}")
+
+    history_time, history_rows = time_query(conn, HISTORY_QUERY, args.repeat)
+    latest_time, latest_rows = time_query(conn, LATEST_QUERY, args.repeat)
+
+    print(f"History GROUP BY query: {history_time * 1000:10.2f} ms ({history_rows} rows)")
+    print(f"stocks_scrape_latest:   {latest_time * 1000:10.2f} ms ({latest_rows} rows)")
+    if latest_time > 0:
+        print(f"Speedup: {history_time / latest_time:,.1f}x")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
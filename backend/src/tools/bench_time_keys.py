@@ -0,0 +1,126 @@
+# tools/bench_time_keys.py
+# Compare text DATETIME scrape timestamps with integer epoch milliseconds: index size and range-scan speed.
+# Run from the backend folder with `python -m src.tools.bench_time_keys --rows 2000000`
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from ..db_management.schema_migrations import EPOCH_MS_SQL
+from ..db_management.time_keys import to_epoch_ms, from_epoch_ms
+
+TABLE_SQL = """
+    CREATE TABLE {table} (
+        ticker_symbol VARCHAR NOT NULL, ticker_id INTEGER, price FLOAT, change FLOAT,
+        industry_id INTEGER, volume FLOAT, pe_ratio FLOAT, timestamp {column_type} NOT NULL,
+        PRIMARY KEY (ticker_symbol, timestamp)
+    );
+    CREATE INDEX idx_{table} ON {table} (ticker_symbol, timestamp);
+"""
+
+RANGE_QUERY = "SELECT price, volume, timestamp FROM {table} WHERE ticker_symbol = ? AND timestamp >= ? AND timestamp < ?"
+
+
+def seed(conn, rows, tickers):
+    # Fill the text table with 5-minute batches like the scrape job, then copy it as epoch milliseconds
+    conn.executescript(TABLE_SQL.format(table="scrape_text", column_type="DATETIME"))
+    conn.executescript(TABLE_SQL.format(table="scrape_epoch", column_type="INTEGER"))
+    batches = max(rows // tickers, 1)
+    start = datetime(2024, 1, 2, 14, 30)
+    for batch in range(batches):
+        timestamp = (start + timedelta(minutes=5 * batch)).strftime("%Y-%m-%d %H:%M:%S.%f")
+        conn.executemany(
+            "INSERT INTO scrape_text VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ((f"T{ticker:05d}", ticker, 100.0 + batch % 50, 0.5, 1, 1e6, 15.0, timestamp) for ticker in range(tickers)),
+        )
+        if batch % 100 == 0:
+            conn.commit()
+    conn.commit()
+    # Use the migration's conversion expression so the benchmark also checks its throughput
+    start_time = time.perf_counter()
+    conn.execute(
+        "INSERT INTO scrape_epoch SELECT ticker_symbol, ticker_id, price, change, industry_id, volume, pe_ratio, "
+        f"{EPOCH_MS_SQL.format(column='timestamp')} FROM scrape_text"
+    )
+    conn.commit()
+    print(f"Seeded {batches * tickers:,} rows; converted to epoch ms in {time.perf_counter() - start_time:.2f}s")
+    return start, start + timedelta(minutes=5 * batches)
+
+
+def object_sizes(conn):
+    # Return bytes used per table and index, or None when SQLite was built without the dbstat table
+    try:
+        return dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall())
+    except sqlite3.OperationalError:
+        return None
+
+
+def time_range_scans(conn, table, windows, to_key, to_datetime, repeat):
+    # Best-of-repeat seconds for the window queries alone and with the read path's datetime conversion
+    query = RANGE_QUERY.format(table=table)
+    scan_timings, convert_timings = [], []
+    row_count = 0
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        results = [conn.execute(query, (ticker, to_key(start), to_key(end))).fetchall() for ticker, start, end in windows]
+        scan_timings.append(time.perf_counter() - start_time)
+        start_time = time.perf_counter()
+        for rows in results:
+            for price, volume, timestamp in rows:
+                to_datetime(timestamp)
+        convert_timings.append(time.perf_counter() - start_time)
+        row_count = sum(len(rows) for rows in results)
+    return min(scan_timings), min(convert_timings), row_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text vs integer epoch millisecond scrape timestamps.")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Number of history rows to seed")
+    parser.add_argument("--tickers", type=int, default=6000, help="Number of distinct tickers")
+    parser.add_argument("--queries", type=int, default=2000, help="Range scans per layout")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per layout; the best time is reported")
+    parser.add_argument("--window-hours", type=int, default=24, help="Width of each range scan")
+    parser.add_argument("--db", help="SQLite file to use; defaults to a temporary file")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), "bench_time_keys.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    first, last = seed(conn, args.rows, args.tickers)
+
+    sizes = object_sizes(conn)
+    if sizes:
+        for table in ("scrape_text", "scrape_epoch"):
+            primary_key = sizes.get(f"sqlite_autoindex_{table}_1", 0)
+            print(
+                f"{table:13s} table {sizes.get(table, 0) / 1e6:9.2f} MB   primary key {primary_key / 1e6:9.2f} MB   "
+                f"idx {sizes.get(f'idx_{table}', 0) / 1e6:9.2f} MB"
+            )
+    else:
+        print("dbstat is not available in this SQLite build; skipping size report")
+
+    random.seed(42)
+    window = timedelta(hours=args.window_hours)
+    span = max((last - first - window).total_seconds(), 0)
+    windows = []
+    for _ in range(args.queries):
+        window_start = first + timedelta(seconds=random.uniform(0, span))
+        windows.append((f"T{random.randrange(args.tickers):05d}", window_start, window_start + window))
+
+    for label, table, to_key, to_datetime in (
+        ("Text DATETIME", "scrape_text", lambda value: value.strftime("%Y-%m-%d %H:%M:%S.%f"), datetime.fromisoformat),
+        ("Epoch ms", "scrape_epoch", to_epoch_ms, from_epoch_ms),
+    ):
+        scan_time, convert_time, row_count = time_range_scans(conn, table, windows, to_key, to_datetime, args.repeat)
+        print(
+            f"{label:13s} range scans: {scan_time * 1000:10.2f} ms   "
+            f"datetime conversion: {convert_time * 1000:10.2f} ms ({row_count} rows)"
+        )
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,31 @@
+import argparse
+import hashlib
+import json
+import os
+import re
 import sqlite3
-import pandas as pd
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 import logging
 import time
 from typing import Optional, Union
 
+# Resume cursor table kept in the target database, updated in the same transaction as each copied chunk
+STATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS _migration_state (
+        source_db TEXT NOT NULL,
+        source_table TEXT NOT NULL,
+        target_table TEXT NOT NULL,
+        last_key TEXT,
+        rows_copied INTEGER NOT NULL DEFAULT 0,
+        started_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        completed_at REAL,
+        PRIMARY KEY (source_db, source_table, target_table)
+    )
+"""
+
 class Migrator:
     @staticmethod
     def resolve_db_path(db_path: Union[str, Path]) -> Path:
@@ -14,12 +35,24 @@ class Migrator:
         
         return Path(__file__).parents[2] / 'db' / db_path
     
-    def __init__(self, source_db: Union[str, Path], target_db: Union[str, Path], max_retries: int = 3, retry_delay: int = 1):
+    @classmethod
+    def check_distinct(cls, source_db: Union[str, Path], target_db: Union[str, Path]):
+        # Copying a database into itself never ends: every replaced row gets a new rowid past the keyset cursor
+        source_path = cls.resolve_db_path(source_db).resolve()
+        target_path = cls.resolve_db_path(target_db).resolve()
+        same = source_path == target_path or (source_path.exists() and target_path.exists() and os.path.samefile(source_path, target_path))
+        if same:
+            raise ValueError(f"Source and target are the same database: {source_path}")
+
+    def __init__(self, source_db: Union[str, Path], target_db: Union[str, Path], max_retries: int = 3, retry_delay: int = 1, chunk_size: int = 50000):
         # Initialize the migrator variables
+        self.check_distinct(source_db, target_db)
         self.source_db = self.resolve_db_path(source_db)
         self.target_db = self.resolve_db_path(target_db)
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.chunk_size = chunk_size
+        self.stats = {}
         
         # Set up basic logging
         logging.basicConfig(level=logging.INFO)
@@ -38,7 +71,132 @@ class Migrator:
                 self.logger.error(f"Failed to create target database: {str(e)}")
                 raise
     
-    def migrate_table(self, source_table: str, target_table: Optional[str] = None) -> bool:
+    def _connect_source(self) -> sqlite3.Connection:
+        # Open the source read-only so a migration can never modify it
+        return sqlite3.connect(f"file:{self.source_db}?mode=ro", uri=True)
+
+    def _connect_target(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.target_db)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(STATE_TABLE_SQL)
+        return conn
+
+    @staticmethod
+    def _rename_in_ddl(ddl: str, source_table: str, target_table: str, index_name: Optional[str] = None) -> str:
+        # Point a CREATE TABLE/INDEX statement at the target table name
+        # Index names are unique per database, so a copied index is renamed too, or it would collide with the source's
+        if source_table == target_table:
+            return ddl
+        if index_name is not None:
+            target_index = Migrator._target_index_name(index_name, source_table, target_table)
+            ddl = re.sub(
+                rf'^(\s*CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?["`\[]?){re.escape(index_name)}\b',
+                lambda match: f"{match.group(1)}{target_index}",
+                ddl,
+                count=1,
+                flags=re.IGNORECASE,
+            )
+        return re.sub(rf'(["`\[]?)\b{re.escape(source_table)}\b(["`\]]?)', rf'\g<1>{target_table}\g<2>', ddl)
+
+    @staticmethod
+    def _target_index_name(index_name: str, source_table: str, target_table: str) -> str:
+        # idx_<source>_col becomes idx_<target>_col; names without the table name get the target as a prefix
+        if source_table in index_name:
+            return index_name.replace(source_table, target_table)
+        return f"{target_table}_{index_name}"
+
+    def _copy_schema(self, source: sqlite3.Connection, target: sqlite3.Connection, source_table: str, target_table: str):
+        # Create the target table with the source's primary key, constraints and indexes when it does not exist yet
+        if target.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (target_table,)).fetchone():
+            return
+        schema = source.execute(
+            "SELECT type, name, sql FROM sqlite_master WHERE tbl_name = ? AND sql IS NOT NULL ORDER BY type = 'index'",
+            (source_table,),
+        ).fetchall()
+        if not schema:
+            raise ValueError(f"Source table '{source_table}' not found in {self.source_db}")
+        with target:
+            for object_type, name, ddl in schema:
+                index_name = name if object_type == "index" else None
+                target.execute(self._rename_in_ddl(ddl, source_table, target_table, index_name))
+        self.logger.info(f"Created '{target_table}' in {self.target_db} with {len(schema) - 1} indexes")
+
+    @staticmethod
+    def _key_columns(conn: sqlite3.Connection, table: str) -> list:
+        # Keyset order: rowid for ordinary tables, the primary key for WITHOUT ROWID tables
+        try:
+            conn.execute(f'SELECT rowid FROM "{table}" LIMIT 0')
+            return ["rowid"]
+        except sqlite3.OperationalError:
+            pk_columns = sorted((row[5], row[1]) for row in conn.execute(f'PRAGMA table_info("{table}")') if row[5])
+            return [name for _, name in pk_columns]
+
+    def _load_state(self, target: sqlite3.Connection, source_table: str, target_table: str):
+        return target.execute(
+            "SELECT last_key, rows_copied, completed_at FROM _migration_state WHERE source_db = ? AND source_table = ? AND target_table = ?",
+            (str(self.source_db), source_table, target_table),
+        ).fetchone()
+
+    def _save_state(self, target: sqlite3.Connection, source_table: str, target_table: str, last_key, rows_copied: int, completed: bool = False):
+        now = time.time()
+        target.execute(
+            "INSERT INTO _migration_state (source_db, source_table, target_table, last_key, rows_copied, started_at, updated_at, completed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (source_db, source_table, target_table) DO UPDATE SET "
+            "last_key = excluded.last_key, rows_copied = excluded.rows_copied, updated_at = excluded.updated_at, completed_at = excluded.completed_at",
+            (str(self.source_db), source_table, target_table, json.dumps(last_key), rows_copied, now, now, now if completed else None),
+        )
+
+    def _copy_rows(self, source: sqlite3.Connection, target: sqlite3.Connection, source_table: str, target_table: str, restart: bool) -> int:
+        # Stream the table in keyset-ordered chunks, committing each chunk together with the resume cursor
+        state = None if restart else self._load_state(target, source_table, target_table)
+        if state and state[2] is not None:
+            self.logger.info(f"'{source_table}' -> '{target_table}' already migrated ({state[1]} rows); pass restart=True to copy again")
+            return 0
+        last_key = json.loads(state[0]) if state and state[0] else None
+        rows_copied = state[1] if state else 0
+        if last_key is not None:
+            self.logger.info(f"Resuming '{source_table}' after key {last_key} ({rows_copied} rows already copied)")
+
+        key_columns = self._key_columns(source, source_table)
+        columns = [row[1] for row in source.execute(f'PRAGMA table_info("{source_table}")')]
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        key_list = ", ".join(key_columns if key_columns == ["rowid"] else (f'"{column}"' for column in key_columns))
+        key_tuple = f"({key_list})" if len(key_columns) > 1 else key_list
+        placeholders = ", ".join("?" * len(key_columns))
+        key_params = f"({placeholders})" if len(key_columns) > 1 else placeholders
+        first_query = f'SELECT {key_list}, {column_list} FROM "{source_table}" ORDER BY {key_list} LIMIT ?'
+        next_query = f'SELECT {key_list}, {column_list} FROM "{source_table}" WHERE {key_tuple} > {key_params} ORDER BY {key_list} LIMIT ?'
+        # OR REPLACE makes a chunk that is copied twice (after a crash) land once
+        insert_sql = f'INSERT OR REPLACE INTO "{target_table}" ({column_list}) VALUES ({", ".join("?" * len(columns))})'
+
+        key_width = len(key_columns)
+        copied_this_run = 0
+        start_time = time.perf_counter()
+        while True:
+            if last_key is None:
+                rows = source.execute(first_query, (self.chunk_size,)).fetchall()
+            else:
+                rows = source.execute(next_query, (*last_key, self.chunk_size)).fetchall()
+            if not rows:
+                break
+            last_key = list(rows[-1][:key_width])
+            rows_copied += len(rows)
+            copied_this_run += len(rows)
+            with target:
+                target.executemany(insert_sql, (row[key_width:] for row in rows))
+                self._save_state(target, source_table, target_table, last_key, rows_copied)
+            elapsed = time.perf_counter() - start_time
+            self.logger.info(f"'{source_table}': {rows_copied} rows copied ({copied_this_run / elapsed if elapsed else 0:,.0f} rows/s)")
+            if len(rows) < self.chunk_size:
+                break
+
+        with target:
+            self._save_state(target, source_table, target_table, last_key, rows_copied, completed=True)
+        return copied_this_run
+
+    def migrate_table(self, source_table: str, target_table: Optional[str] = None, restart: bool = False) -> bool:
         if target_table is None:
             target_table = source_table
             
@@ -49,25 +207,27 @@ class Migrator:
         self._create_target_if_not_exists()
         
         retry_count = 0
+        start_time = time.perf_counter()
+        copied = 0
         while retry_count < self.max_retries:
+            source = target = None
             try:
-                source_query = f"SELECT * FROM {source_table}"
-                df = pd.read_sql_query(source_query, sqlite3.connect(self.source_db))
-                
-                if df.empty:
-                    self.logger.info(f"Source table '{source_table}' is empty")
-                    return True
-                
-                with sqlite3.connect(self.target_db) as conn:
-                    df.to_sql(
-                        name=target_table,
-                        con=conn,
-                        if_exists='replace',
-                        index=False
-                    )
-                    
+                source = self._connect_source()
+                target = self._connect_target()
+                self._copy_schema(source, target, source_table, target_table)
+                # Each attempt resumes from the cursor the previous one committed
+                copied += self._copy_rows(source, target, source_table, target_table, restart and retry_count == 0)
+
+                elapsed = time.perf_counter() - start_time
+                self.stats = {
+                    "table": source_table,
+                    "rows": copied,
+                    "seconds": round(elapsed, 3),
+                    "rows_per_second": round(copied / elapsed) if elapsed else 0,
+                }
                 self.logger.info(
-                    f"Successfully migrated table '{len(df)}' rows from '{source_table}' to '{target_table}'"
+                    f"Successfully migrated {copied} rows from '{source_table}' to '{target_table}' "
+                    f"in {elapsed:.2f}s ({self.stats['rows_per_second']:,} rows/s)"
                 )
                 return True
             
@@ -81,7 +241,7 @@ class Migrator:
                     time.sleep(self.retry_delay)
                 continue
             
-            except pd.io.sql.DatabaseError as e:
+            except sqlite3.DatabaseError as e:
                 self.logger.error(f"Database error: {str(e)}")
                 return False
             
@@ -89,20 +249,159 @@ class Migrator:
                 self.logger.error(f"Unexpected error during migration: {str(e)}")
                 return False
             
+            finally:
+                if source is not None:
+                    source.close()
+                if target is not None:
+                    target.close()
+
         self.logger.error(f"Failed to migrate table '{source_table}' after {self.max_retries} attempts")
         return False
     
-if __name__ == "__main__":
-    migrator = Migrator(
-        source_db="nyse_data.db",
-        target_db="ct_jobs_schedule.db",
-        max_retries=3,
-        retry_delay=2
+def table_fingerprint(db_path: Union[str, Path], table: str, batch_size: int = 50000) -> tuple:
+    # Row count and an order-independent checksum (sum of 64-bit row hashes), so sources merged into one target add up
+    count = 0
+    checksum = 0
+    with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) as conn:
+        columns = ", ".join(f'"{row[1]}"' for row in conn.execute(f'PRAGMA table_info("{table}")'))
+        cursor = conn.execute(f'SELECT {columns} FROM "{table}"')
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            count += len(rows)
+            for row in rows:
+                checksum += int.from_bytes(hashlib.blake2b(repr(row).encode(), digest_size=8).digest(), "little")
+    return count, checksum % 2 ** 64
+
+def _migrate_target_group(target_db: str, entries: list, options: dict) -> list:
+    # Worker process: copy every table bound for one target file in order, then verify each target table
+    results = []
+    for entry in entries:
+        migrator = Migrator(entry["source_db"], target_db, options["max_retries"], options["retry_delay"], options["chunk_size"])
+        start_time = time.perf_counter()
+        ok = migrator.migrate_table(entry["source_table"], entry["target_table"], restart=options["restart"])
+        results.append({**entry, "target_db": str(migrator.target_db), "ok": ok, "rows": migrator.stats.get("rows", 0), "seconds": time.perf_counter() - start_time})
+
+    # Several sources may be consolidated into one target table, so compare against their combined fingerprint
+    verify_start = time.perf_counter()
+    expected = {}
+    for result in results:
+        if result["ok"]:
+            count, checksum = table_fingerprint(Migrator.resolve_db_path(result["source_db"]), result["source_table"])
+            total_count, total_checksum = expected.get(result["target_table"], (0, 0))
+            expected[result["target_table"]] = (total_count + count, (total_checksum + checksum) % 2 ** 64)
+    for target_table, (expected_count, expected_checksum) in expected.items():
+        actual_count, actual_checksum = table_fingerprint(Migrator.resolve_db_path(target_db), target_table)
+        verified = (actual_count, actual_checksum) == (expected_count, expected_checksum)
+        for result in results:
+            if result["target_table"] == target_table:
+                result.update(verified=verified, source_count=expected_count, target_count=actual_count)
+    verify_seconds = time.perf_counter() - verify_start
+    for result in results:
+        result["verify_seconds"] = verify_seconds / len(results)
+    return results
+
+def load_manifest(manifest_path: Union[str, Path]) -> dict:
+    # Read a migration manifest and expand table entries into (source, target, source_table, target_table) jobs
+    with open(manifest_path) as manifest_file:
+        manifest = json.load(manifest_file)
+    jobs = []
+    for migration in manifest["migrations"]:
+        if "target" not in migration:
+            raise ValueError(f"Migration from '{migration['source']}' has no target database")
+        Migrator.check_distinct(migration["source"], migration["target"])
+        for table in migration["tables"]:
+            source_table = table if isinstance(table, str) else table["source"]
+            target_table = source_table if isinstance(table, str) else table.get("target", source_table)
+            jobs.append({
+                "source_db": migration["source"],
+                "target_db": migration["target"],
+                "source_table": source_table,
+                "target_table": target_table,
+            })
+    manifest["jobs"] = jobs
+    return manifest
+
+def migrate_manifest(manifest_path: Union[str, Path], workers: Optional[int] = None, restart: bool = False) -> bool:
+    # Migrate every table in the manifest, running independent target databases in parallel worker processes
+    manifest = load_manifest(manifest_path)
+    options = {
+        "max_retries": manifest.get("max_retries", 3),
+        "retry_delay": manifest.get("retry_delay", 1),
+        "chunk_size": manifest.get("chunk_size", 50000),
+        "restart": restart,
+    }
+    # SQLite allows one writer per file, so all tables bound for the same target file share a worker
+    groups = {}
+    for job in manifest["jobs"]:
+        groups.setdefault(str(Migrator.resolve_db_path(job["target_db"])), []).append(job)
+    workers = workers or manifest.get("workers") or len(groups)
+
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger(__name__)
+    logger.info(f"Migrating {len(manifest['jobs'])} tables into {len(groups)} databases with {workers} workers")
+
+    start_time = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_migrate_target_group, target_db, entries, options): target_db for target_db, entries in groups.items()}
+        for future in as_completed(futures):
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                logger.error(f"Worker for {futures[future]} failed: {e}")
+                results.extend({**entry, "target_db": futures[future], "ok": False, "rows": 0, "seconds": 0.0} for entry in groups[futures[future]])
+    wall_seconds = time.perf_counter() - start_time
+
+    print(f"{'source':40} {'target':40} {'rows':>12} {'seconds':>9} {'rows/s':>11}  verified")
+    for result in sorted(results, key=lambda result: (result["target_db"], result["target_table"])):
+        source = f"{Path(result['source_db']).name}:{result['source_table']}"
+        target = f"{Path(result['target_db']).name}:{result['target_table']}"
+        rate = result["rows"] / result["seconds"] if result["seconds"] else 0
+        if not result["ok"]:
+            status = "FAILED"
+        elif result.get("verified"):
+            status = "ok"
+        elif result.get("source_count") == result.get("target_count"):
+            status = "MISMATCH (checksum)"
+        else:
+            status = f"MISMATCH ({result.get('source_count')} source vs {result.get('target_count')} target rows)"
+        print(f"{source:40} {target:40} {result['rows']:>12,} {result['seconds']:>9.2f} {rate:>11,.0f}  {status}")
+    total_rows = sum(result["rows"] for result in results)
+    copy_seconds = sum(result["seconds"] for result in results)
+    verify_seconds = sum(result.get("verify_seconds", 0.0) for result in results)
+    print(
+        f"Copied and verified {total_rows:,} rows in {wall_seconds:.2f}s wall ({total_rows / wall_seconds if wall_seconds else 0:,.0f} rows/s); "
+        f"workers spent {copy_seconds:.2f}s copying and {verify_seconds:.2f}s verifying in total"
     )
-    
-    success = migrator.migrate_table("jobs_schedule")
+    return all(result["ok"] and result.get("verified") for result in results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy SQLite tables between databases in resumable chunks.")
+    parser.add_argument("--manifest", help="JSON manifest of databases and tables to migrate in parallel")
+    parser.add_argument("--workers", type=int, help="Worker processes for manifest mode; defaults to one per target database")
+    parser.add_argument("--source", help="Source database for a single-table migration")
+    parser.add_argument("--target", help="Target database for a single-table migration")
+    parser.add_argument("--table", help="Table to migrate in single-table mode")
+    parser.add_argument("--target-table", help="Target table name, if different from --table")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Rows per chunk in single-table mode")
+    parser.add_argument("--restart", action="store_true", help="Ignore saved resume cursors and copy from the start")
+    args = parser.parse_args()
+
+    try:
+        if args.manifest:
+            success = migrate_manifest(args.manifest, workers=args.workers, restart=args.restart)
+        elif args.source and args.target and args.table:
+            migrator = Migrator(source_db=args.source, target_db=args.target, max_retries=3, retry_delay=2, chunk_size=args.chunk_size)
+            success = migrator.migrate_table(args.table, args.target_table, restart=args.restart)
+        else:
+            parser.error("pass --manifest, or --source, --target and --table")
+    except ValueError as e:
+        parser.error(str(e))
     
     if success:
         print("Migration completed successfully.")
     else:
-        print("Migration failed.")
\ No newline at end of file
+        print("Migration failed.")
+        sys.exit(1)
@@ -0,0 +1,285 @@
+# tools/query_plan_check.py
+# Seed realistic data volumes, run every manager query and check its EXPLAIN QUERY PLAN.
+# Fails (exit status 1) when a query does a full table scan or a temp B-tree sort that is not allowlisted.
+# Run from the backend folder with `python -m src.tools.query_plan_check`
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+from ..db_manager import DBManager
+from ..db_management.list_query import ListQuery
+from ..db_management.screener_query import ScreenerQuery
+
+# Plan findings that are intended, keyed by manager call and the offending plan line prefix
+ALLOWLIST = {
+    ("ScrapeManager.get_recent_stock_scrapes", "SCAN stocks_scrape_latest"): "Returns the whole one-row-per-ticker snapshot",
+    ("StockManager.get_recent_stock_prices", "SCAN stocks_latest"): "Returns the whole one-row-per-ticker snapshot",
+    ("StockManager.select_stock", "SCAN stocks"): "Debug dump of the whole table",
+    ("ScrapeManager.get_scrapes", "SCAN stocks_scrape"): "Full history export used by the timezone audit",
+    ("ScrapeManager.rebuild_latest_stock_scrapes", "SCAN stocks_scrape"): "Offline rebuild reads all history by design",
+    ("ScrapeManager.rebuild_latest_stock_scrapes", "SCAN stocks_scrape_latest"): "Row count after the rebuild",
+    ("StockManager.rebuild_latest_stock_prices", "SCAN stocks"): "Offline rebuild reads all history by design",
+    ("StockManager.rebuild_latest_stock_prices", "SCAN stocks_latest"): "Row count after the rebuild",
+    ("StockManager.rebuild_latest_stock_prices", "USE TEMP B-TREE"): "Window function partitions need a sort",
+    ("ScrapeManager.ensure_latest_stock_scrapes", "SCAN stocks_scrape"): "LIMIT 1 existence probe stops at the first row",
+    ("ScrapeManager.ensure_latest_stock_scrapes", "SCAN stocks_scrape_latest"): "LIMIT 1 existence probe stops at the first row",
+    ("StockManager.ensure_latest_stock_prices", "SCAN stocks"): "LIMIT 1 existence probe stops at the first row",
+    ("StockManager.ensure_latest_stock_prices", "SCAN stocks_latest"): "LIMIT 1 existence probe stops at the first row",
+    ("RollupManager.backfill_rollups", "SCAN stocks_scrape"): "Backfill is an offline job; a timestamp index would tax every scrape insert",
+    ("JobManager.select_all_job_schedules", "SCAN jobs_schedule"): "Lists every job; the table holds a few dozen rows",
+    ("ApiKeyManager.select_all_api_keys", "SCAN api_keys"): "Lists every key; one row per service",
+    ("ScrapeManager.get_recent_stock_scrapes.page", "SCAN stocks_scrape_latest"): "Walks the ticker key in order and stops at the page limit",
+    ("ScrapeManager.get_recent_stock_scrapes.sorted_page", "SCAN stocks_scrape_latest"): "Client-chosen sort over the one-row-per-ticker snapshot",
+    ("ScrapeManager.get_recent_stock_scrapes.sorted_page", "USE TEMP B-TREE"): "An index per sortable column would tax every scrape ingest",
+    ("ScrapeManager.count_recent_stock_scrapes", "SCAN stocks_scrape_latest"): "Counts the snapshot from its narrowest index",
+    ("StockManager.get_recent_stock_prices.page", "SCAN stocks_latest"): "Walks the ticker key in order and stops at the page limit",
+    ("StockManager.count_recent_stock_prices", "SCAN stocks_latest"): "Counts the snapshot from its narrowest index",
+    ("ScrapeManager.screen_ticker_stats", "USE TEMP B-TREE"): "Sorts only the rows the sector and pe_forward index seek found",
+    ("ScrapeManager.screen_ticker_stats.ranking", "SCAN ticker_scrape"): "Walks the free_cash_flow_yield index in order and stops at the page limit",
+    ("ScrapeManager.screen_ticker_stats.ranking", "USE TEMP B-TREE"): "Only the ticker tiebreak within equal metric values is sorted",
+    ("JobManager.select_all_job_schedules.page", "SCAN jobs_schedule"): "Walks the primary key in order and stops at the page limit",
+    ("JobManager.count_job_schedules", "SCAN jobs_schedule"): "The table holds a few dozen rows",
+}
+
+SCAN_PATTERN = re.compile(r"^SCAN (\w+)")
+CAPTURED_PREFIXES = ("SELECT", "UPDATE", "DELETE", "WITH", "INSERT INTO")
+
+
+class QueryCapture:
+    def __init__(self, engines):
+        # Record statements issued on every engine while a manager call is labelled
+        self.label = None
+        self.statements = []
+        for db_name, engine in engines.items():
+            event.listen(engine, "before_cursor_execute", self._listener(db_name))
+
+    def _listener(self, db_name):
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if self.label is None:
+                return
+            normalized = " ".join(statement.split())
+            # Plain INSERT ... VALUES has no plan worth checking; INSERT ... SELECT does
+            if not normalized.upper().startswith(CAPTURED_PREFIXES):
+                return
+            if normalized.upper().startswith("INSERT INTO") and " SELECT " not in normalized.upper():
+                return
+            if executemany:
+                parameters = parameters[0] if parameters else ()
+            self.statements.append((self.label, db_name, normalized, parameters))
+        return before_cursor_execute
+
+    def run(self, label, call):
+        # Run one manager call with its statements attributed to the label
+        self.label = label
+        try:
+            call()
+        finally:
+            self.label = None
+
+
+def explain(engine, statement, parameters):
+    # Return the EXPLAIN QUERY PLAN detail lines for a captured statement
+    raw_connection = engine.raw_connection()
+    try:
+        cursor = raw_connection.cursor()
+        rows = cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        table_names = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        cursor.close()
+    finally:
+        raw_connection.rollback()
+        raw_connection.close()
+    return [row[3] for row in rows], table_names
+
+
+def findings(plan_lines, table_names):
+    # Full scans of real tables (not subqueries or CTEs) and temp B-tree sorts
+    found = []
+    for line in plan_lines:
+        scan = SCAN_PATTERN.match(line)
+        if scan and scan.group(1) in table_names:
+            found.append(f"SCAN {scan.group(1)}")
+        elif line.startswith("USE TEMP B-TREE"):
+            found.append("USE TEMP B-TREE")
+    return found
+
+
+def seed(db_manager, tickers, scrape_batches, polygon_days, jobs, users):
+    # Fill every database through the managers so the data has the shape production writes
+    start_time = time.perf_counter()
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    symbols = [f"T{ticker:05d}" for ticker in range(tickers)]
+
+    # One batch two days back gives retention something to expire; the rest are recent 5-minute scrapes
+    scrape_times = [now - timedelta(days=2)] + [now - timedelta(minutes=5 * (scrape_batches - batch)) for batch in range(scrape_batches)]
+    for batch, timestamp in enumerate(scrape_times):
+        stock_data_list = [
+            {
+                "ticker_symbol": symbol,
+                "company_name": f"Company {symbol}",
+                "price": 100.0 + batch % 50,
+                "change": 0.5,
+                "industry": f"Industry {index % 150}",
+                "volume": 1e6 + batch,
+                "pe_ratio": 15.0,
+                "timestamp": timestamp,
+            }
+            for index, symbol in enumerate(symbols)
+        ]
+        db_manager.scrape_manager.create_scrape_batch(stock_data_list)
+        db_manager.rollup_manager.apply_scrape_batch(stock_data_list)
+
+    day_ms = 24 * 60 * 60 * 1000
+    first_day_ms = (int(now.timestamp() * 1000) // day_ms - polygon_days) * day_ms
+    for day in range(polygon_days):
+        db_manager.stock_manager.insert_stock_batch([
+            {"T": symbol, "c": 10.0 + day, "h": 11.0 + day, "l": 9.0 + day, "o": 10.0, "t": first_day_ms + day * day_ms}
+            for symbol in symbols
+        ])
+
+    sectors = ["Technology", "Healthcare", "Financials", "Industrials", "Energy", "Utilities", "Real Estate"]
+    db_manager.scrape_manager.batch_create_or_update_scrape_ticker_stats([
+        {
+            "ticker_symbol": symbol,
+            "sector": sectors[index % len(sectors)],
+            "market_cap_group": ["Small", "Mid", "Large"][index % 3],
+            "pe_forward": 5.0 + index % 40,
+            "dividend_yield": (index % 9) * 0.5,
+            "free_cash_flow_yield": (index % 23) * 0.4,
+        }
+        for index, symbol in enumerate(symbols)
+    ])
+
+    for job in range(jobs):
+        db_manager.job_manager.insert_job_schedule(
+            job_type=f"job_{job}", service="Stock Analysis", owner="Admin", frequency="daily",
+            scheduled_start_date=now + timedelta(hours=job), run_time="09:30",
+        )
+    for user in range(users):
+        db_manager.user_manager.create_user(f"user_{user}", "password", "User")
+    for service in ("Polygon.io", "Alpha Vantage", "Finnhub"):
+        db_manager.api_key_manager.insert_api_key(service, f"key-{service}")
+
+    print(f"Seeded {tickers} tickers x {scrape_batches} scrapes and {polygon_days} Polygon days in {time.perf_counter() - start_time:.1f}s")
+    return now, symbols
+
+
+def manager_calls(db_manager, now, symbols):
+    # Every manager query path, with arguments that hit seeded rows
+    symbol = symbols[len(symbols) // 2]
+    scrape_time = now - timedelta(minutes=5)
+    job_start = now + timedelta(hours=1)
+    scrape_manager = db_manager.scrape_manager
+    stock_manager = db_manager.stock_manager
+    job_manager = db_manager.job_manager
+    user_manager = db_manager.user_manager
+    api_key_manager = db_manager.api_key_manager
+    rollup_manager = db_manager.rollup_manager
+    retention_manager = db_manager.retention_manager
+    # The screener's first page, and the same page sorted by a column with no index of its own
+    first_page = ListQuery(fields=["ticker_symbol", "price", "change"], limit=50)
+    sorted_page = ListQuery(sort=[("volume", True)], limit=50, offset=50)
+    # A typical fundamentals screen, and a ranking over all tickers by one indexed metric
+    screen = ScreenerQuery("pe_forward < 15 AND sector = 'Technology' AND dividend_yield > 2", scrape_manager.screener_columns())
+    no_screen = ScreenerQuery("", scrape_manager.screener_columns())
+    screen_page = ListQuery(fields=["ticker_symbol", "pe_forward", "dividend_yield"], sort=[("free_cash_flow_yield", True)], limit=50)
+    return [
+        ("ScrapeManager.get_recent_stock_scrapes", scrape_manager.get_recent_stock_scrapes),
+        ("ScrapeManager.get_recent_stock_scrapes.page", lambda: scrape_manager.get_recent_stock_scrapes(first_page)),
+        ("ScrapeManager.get_recent_stock_scrapes.sorted_page", lambda: scrape_manager.get_recent_stock_scrapes(sorted_page)),
+        ("ScrapeManager.count_recent_stock_scrapes", scrape_manager.count_recent_stock_scrapes),
+        ("ScrapeManager.get_stock_scrapes_since", lambda: scrape_manager.get_stock_scrapes_since(1)),
+        ("ScrapeManager.get_stock_scrape_data_by_ticker", lambda: scrape_manager.get_stock_scrape_data_by_ticker(symbol)),
+        ("ScrapeManager.get_scrape", lambda: scrape_manager.get_scrape(symbol, scrape_time)),
+        ("ScrapeManager.get_scrapes", scrape_manager.get_scrapes),
+        ("ScrapeManager.update_scrape", lambda: scrape_manager.update_scrape(symbol, scrape_time, price=1.0, industry="Industry 1")),
+        ("ScrapeManager.replace_scrape", lambda: scrape_manager.replace_scrape(symbol, scrape_time, scrape_time + timedelta(seconds=1))),
+        ("ScrapeManager.delete_scrape", lambda: scrape_manager.delete_scrape(symbol, scrape_time + timedelta(seconds=1))),
+        ("ScrapeManager.create_scrape", lambda: scrape_manager.create_scrape("NEW01", "New Company", 1.0, 0.0, "New Industry")),
+        ("ScrapeManager.get_scrape_ticker_stats", lambda: scrape_manager.get_scrape_ticker_stats(symbol)),
+        ("ScrapeManager.screen_ticker_stats", lambda: scrape_manager.screen_ticker_stats(screen, screen_page)),
+        ("ScrapeManager.screen_ticker_stats.ranking", lambda: scrape_manager.screen_ticker_stats(no_screen, screen_page)),
+        ("ScrapeManager.count_screened_ticker_stats", lambda: scrape_manager.count_screened_ticker_stats(screen)),
+        ("ScrapeManager.ensure_latest_stock_scrapes", scrape_manager.ensure_latest_stock_scrapes),
+        ("ScrapeManager.rebuild_latest_stock_scrapes", scrape_manager.rebuild_latest_stock_scrapes),
+        ("StockManager.get_recent_stock_prices", stock_manager.get_recent_stock_prices),
+        ("StockManager.get_recent_stock_prices.page", lambda: stock_manager.get_recent_stock_prices(ListQuery(limit=50))),
+        ("StockManager.count_recent_stock_prices", stock_manager.count_recent_stock_prices),
+        ("StockManager.get_stock_data_by_ticker", lambda: stock_manager.get_stock_data_by_ticker(symbol)),
+        ("StockManager.select_stock", stock_manager.select_stock),
+        ("StockManager.ensure_latest_stock_prices", stock_manager.ensure_latest_stock_prices),
+        ("StockManager.rebuild_latest_stock_prices", stock_manager.rebuild_latest_stock_prices),
+        ("RollupManager.get_rollup_bars", lambda: rollup_manager.get_rollup_bars(symbol, now - timedelta(days=1), now)),
+        ("RollupManager.backfill_rollups", lambda: rollup_manager.backfill_rollups(now - timedelta(hours=1), now)),
+        ("RetentionManager.run_retention", lambda: retention_manager.run_retention(raw_retention_days=1)),
+        ("JobManager.select_job_schedule", lambda: job_manager.select_job_schedule("job_1", "Stock Analysis", "daily", job_start)),
+        ("JobManager.select_all_job_schedules", job_manager.select_all_job_schedules),
+        ("JobManager.select_all_job_schedules.page", lambda: job_manager.select_all_job_schedules(ListQuery(limit=50))),
+        ("JobManager.count_job_schedules", job_manager.count_job_schedules),
+        ("JobManager.update_job_schedule_status", lambda: job_manager.update_job_schedule_status("job_1", "Stock Analysis", "daily", job_start, "Running")),
+        ("JobManager.update_job_schedule_run_time", lambda: job_manager.update_job_schedule_run_time("job_1", "Stock Analysis", "daily", job_start, "10:00")),
+        ("JobManager.delete_job_schedule", lambda: job_manager.delete_job_schedule("job_1", "Stock Analysis", "daily", job_start)),
+        ("UserManager.get_user_by_username", lambda: user_manager.get_user_by_username("user_1")),
+        ("UserManager.authenticate_user", lambda: user_manager.authenticate_user("user_1", "password")),
+        ("UserManager.update_user", lambda: user_manager.update_user("user_1", new_email="user_1@example.com")),
+        ("UserManager.delete_user", lambda: user_manager.delete_user("user_2")),
+        ("ApiKeyManager.select_api_key", lambda: api_key_manager.select_api_key("Finnhub")),
+        ("ApiKeyManager.select_all_api_keys", api_key_manager.select_all_api_keys),
+        ("ApiKeyManager.delete_api_key", lambda: api_key_manager.delete_api_key("Finnhub")),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when a manager query falls back to a full scan or temp B-tree sort.")
+    parser.add_argument("--tickers", type=int, default=6000, help="Distinct tickers to seed")
+    parser.add_argument("--scrape-batches", type=int, default=24, help="5-minute scrape batches to seed")
+    parser.add_argument("--polygon-days", type=int, default=30, help="Daily Polygon bars per ticker")
+    parser.add_argument("--jobs", type=int, default=50, help="Job schedules to seed")
+    parser.add_argument("--users", type=int, default=5, help="Users to seed (bcrypt makes these slow)")
+    parser.add_argument("--show-plans", action="store_true", help="Print the plan of every captured statement")
+    args = parser.parse_args()
+
+    # DBManager creates its databases relative to the working directory, so run in a scratch folder
+    os.chdir(tempfile.mkdtemp(prefix="query_plan_check_"))
+    db_manager = DBManager()
+    now, symbols = seed(db_manager, args.tickers, args.scrape_batches, args.polygon_days, args.jobs, args.users)
+    # Retention waits for the background time key migration, which a fresh database finishes at once
+    db_manager.migrate_scrape_timestamps(pause_seconds=0)
+    capture = QueryCapture(db_manager.engines)
+    for label, call in manager_calls(db_manager, now, symbols):
+        capture.run(label, call)
+
+    violations = []
+    used_allowlist = set()
+    seen = set()
+    for label, db_name, statement, parameters in capture.statements:
+        if (label, statement) in seen:
+            continue
+        seen.add((label, statement))
+        plan_lines, table_names = explain(db_manager.engines[db_name], statement, parameters)
+        problems = []
+        for finding in findings(plan_lines, table_names):
+            if (label, finding) in ALLOWLIST:
+                used_allowlist.add((label, finding))
+            else:
+                problems.append(finding)
+        status = "FAIL" if problems else "ok"
+        if problems or args.show_plans:
+            print(f"[{status}] {label} ({db_name}): {statement[:160]}")
+            for line in plan_lines:
+                print(f"         {line}")
+        if problems:
+            violations.append((label, problems))
+
+    for entry in sorted(set(ALLOWLIST) - used_allowlist):
+        print(f"[stale allowlist] {entry[0]}: {entry[1]}")
+
+    print(f"Checked {len(seen)} statements from {len({label for label, *_ in capture.statements})} manager calls; {len(violations)} violations.")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+# tools/rebuild_latest.py
+# Rebuild the latest-snapshot tables from history; run from the backend folder with `python -m src.tools.rebuild_latest`
+import logging
+import time
+from ..db_manager import DBManager
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    db_manager = DBManager()
+
+    start_time = time.perf_counter()
+    ticker_count = db_manager.scrape_manager.rebuild_latest_stock_scrapes()
+    print(f"stocks_scrape_latest rebuilt with {ticker_count} tickers in {time.perf_counter() - start_time:.2f}s")
+
+    start_time = time.perf_counter()
+    ticker_count = db_manager.stock_manager.rebuild_latest_stock_prices()
+    print(f"stocks_latest rebuilt with {ticker_count} tickers in {time.perf_counter() - start_time:.2f}s")
@@ -1,5 +1,5 @@
 // src/components/helper.jsx
-import React from "react";
+import React, { useEffect, useRef } from "react";
 import { Box } from "@mui/material";
 import { GridToolbarQuickFilter } from "@mui/x-data-grid";
 import { z } from "zod";
@@ -242,4 +242,28 @@ export const formatNumericMagnitude = (value) => {
 export const calculatePERatio = (price, eps) => {
   if (!price || !eps || eps === 0) return null;
   return (price / eps).toFixed(2);
-};
\ No newline at end of file
+};
+
+// Subscribes to the server's /api/events stream while the component is mounted.
+// `handlers` maps event names (scrape_batch, polygon_bars, job_status, resync) to callbacks receiving the parsed data.
+// EventSource cannot send headers, so the token goes in the query string; the browser reconnects on its own.
+export const useEventStream = (handlers) => {
+  const handlersRef = useRef(handlers);
+  handlersRef.current = handlers;
+
+  useEffect(() => {
+    const token = localStorage.getItem("auth_token");
+    const source = new EventSource(`/api/events?token=${encodeURIComponent(token)}`);
+    Object.keys(handlersRef.current).forEach((name) => {
+      source.addEventListener(name, (event) => {
+        const handler = handlersRef.current[name];
+        if (handler) {
+          handler(JSON.parse(event.data));
+        }
+      });
+    });
+    // An expired token cannot reconnect, so stop instead of retrying with it
+    source.addEventListener("token_expired", () => source.close());
+    return () => source.close();
+  }, []);
+};
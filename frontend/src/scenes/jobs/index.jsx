@@ -6,7 +6,7 @@ import { tokens } from "../../theme";
 import Header from "../../components/header";
 import ScheduleJobDialog from "../../components/schedule_job_dialog";
 import AddCircleOutlineIcon from "@mui/icons-material/AddCircleOutline";
-import { formatRunTime, convertToLocalTime, formatString, parseWeekdays } from "../../components/helper";
+import { formatRunTime, convertToLocalTime, formatString, parseWeekdays, useEventStream } from "../../components/helper";
 import { useAuth } from "../../context/auth_context";
 import { styled } from '@mui/material/styles';
 import MuiAccordion from '@mui/material/Accordion';
@@ -358,6 +358,11 @@ const Jobs = () => {
     fetchData();
   }, [fetchData]);
 
+  // Reload the job list whenever a job's status change is pushed
+  useEventStream({
+    job_status: () => fetchData(),
+  });
+
   useEffect(() => {
     const runningJobs = Jobs.filter(job => job.status === "Running").length > 0;
     const scheduledJobs = Jobs.filter(job => job.status === "Scheduled").length > 0;
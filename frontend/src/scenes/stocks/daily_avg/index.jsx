@@ -5,7 +5,7 @@ import { tokens } from "../../../theme";
 import React, { useState, useEffect, useCallback, useMemo } from "react";
 import Header from "../../../components/header";
 import { Link, useNavigate } from "react-router-dom";
-import { QuickSearchToolbar, formatCurrency, formatDate } from "../../../components/helper";
+import { QuickSearchToolbar, formatCurrency, formatDate, useEventStream } from "../../../components/helper";
 
 // Stocks Component - Displays the latest stock data in a DataGrid format
 // - Shows most recent OHLC (Open, High, Low, Close) data for stocks in NYSE.
@@ -144,12 +144,18 @@ const Stocks = () => {
   }, [navigate]);
 
   // Set interval to refetch data every 30 seconds
+  // Initial load, plus a slow poll as a safety net for pushes lost while the stream reconnects
   useEffect(() => {
     fetchData();
-    const intervalId = setInterval(fetchData, 30000);
+    const intervalId = setInterval(fetchData, 300000);
     return () => clearInterval(intervalId);
   }, [fetchData]);
 
+  // Reload the latest bars when a Polygon batch is pushed; unchanged tables come back as 304 from the ETag cache
+  useEventStream({
+    polygon_bars: () => fetchData(),
+  });
+
   return (
     <Box m="20px">
       <Header title="NYSE" subtitle="Most Recent Daily Aggregated Average OHLC Data" />
@@ -2,13 +2,14 @@
 import { Box, useTheme, Typography, Stack } from "@mui/material";
 import { DataGrid } from "@mui/x-data-grid";
 import { tokens } from "../../../theme";
-import React, { useState, useEffect, useCallback, useMemo } from "react";
+import React, { useState, useEffect, useCallback, useMemo, useRef } from "react";
 import Header from "../../../components/header";
 import { Link, useNavigate } from "react-router-dom";
 import {
     QuickSearchToolbar,
     formatCurrency,
     formatPE,
+    useEventStream,
 } from "../../../components/helper";
 import moment from "moment";
 
@@ -19,6 +20,10 @@ const Stocks = () => {
     const navigate = useNavigate();
     const [stocksData, setStocksData] = useState([]);
     const [loading, setLoading] = useState(true);
+    // Cursor returned by the last poll; 0 asks for the full snapshot
+    const cursorRef = useRef(0);
+    // Latest formatted row per ticker, updated in place with each delta
+    const rowsRef = useRef(new Map());
 
     // Column definitions for DataGrid
     const columns = useMemo(() => [
@@ -127,12 +132,37 @@ const Stocks = () => {
     ], [colors]);
 
 
-    // Fetch data from /api/stock_scrapes
+    // Merge a delta (polled or pushed) into the grid rows; a full response replaces every row
+    const applyChanges = useCallback((data) => {
+        if (data.full) {
+            rowsRef.current = new Map();
+        }
+        data.stock_scrapes.forEach((stock) => {
+            rowsRef.current.set(stock.ticker_symbol, {
+                id: stock.ticker_symbol,
+                ticker_symbol: stock.ticker_symbol,
+                company_name: stock.company_name,
+                price: formatCurrency(stock.price),
+                change: stock.change,
+                industry: stock.industry,
+                volume: stock.volume.toLocaleString(),
+                pe_ratio: formatPE(stock.pe_ratio),
+                timestamp: moment(stock.timestamp).local().format("MM/DD/YYYY hh:mm:ss A"),
+            });
+        });
+        // A full response resets the cursor (the server's may have moved back, e.g. after a restore); deltas only advance it
+        cursorRef.current = data.full ? data.cursor : Math.max(cursorRef.current, data.cursor);
+        // Skip the re-render when nothing changed
+        if (data.full || data.stock_scrapes.length > 0) {
+            setStocksData(Array.from(rowsRef.current.values()));
+        }
+    }, []);
+
+    // Fetch changes from /api/stock_scrapes since the last cursor and merge them into the grid rows
     const fetchData = useCallback(async () => {
-        setLoading(true); // Set loading to true before fetching
         try {
             const token = localStorage.getItem("auth_token");
-            const response = await fetch("/api/stock_scrapes", {
+            const response = await fetch(`/api/stock_scrapes?since=${cursorRef.current}`, {
                 method: "GET",
                 headers: {
                     "Authorization": `Bearer ${token}`,
@@ -145,29 +175,26 @@ const Stocks = () => {
                 return;
             }
 
-            const data = await response.json();
-            const formattedData = data.map((stock, index) => ({
-                id: index,
-                ticker_symbol: stock.ticker_symbol,
-                company_name: stock.company_name,
-                price: formatCurrency(stock.price),
-                change: stock.change,
-                industry: stock.industry,
-                volume: stock.volume.toLocaleString(),
-                pe_ratio: formatPE(stock.pe_ratio),
-                timestamp: moment(stock.timestamp).local().format("MM/DD/YYYY hh:mm:ss A"),
-            }));
-            setStocksData(formattedData);
+            applyChanges(await response.json());
             setLoading(false);
         } catch (error) {
             console.error("Error fetching stock scrapes data:", error);
         }
-    }, [navigate]);
+    }, [navigate, applyChanges]);
+
+    // New scrape batches are pushed as they are committed; after missed pushes, reload the full snapshot
+    useEventStream({
+        scrape_batch: applyChanges,
+        resync: () => {
+            cursorRef.current = 0;
+            fetchData();
+        },
+    });
 
-    // Sets up periodic data fetching
+    // Initial load, plus a slow poll as a safety net for pushes lost while the stream reconnects
     useEffect(() => {
         fetchData();
-        const intervalId = setInterval(fetchData, 30000);
+        const intervalId = setInterval(fetchData, 300000);
         return () => clearInterval(intervalId);
     }, [fetchData]);
 